@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+"""
+Upload benchmark runner for the Cultural Heritage Platform
+Measures the upload paths against the local stub API (see utils/upload_benchmark.py)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.upload_benchmark import main
+
+if __name__ == "__main__":
+    sys.exit(main())
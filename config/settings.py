@@ -12,14 +12,81 @@ class Settings:
     APP_NAME = os.getenv("APP_NAME", "మన ఆటలు - Mana Aatalu")
     APP_VERSION = os.getenv("APP_VERSION", "1.0.0")
     DEBUG = os.getenv("DEBUG", "False").lower() == "true"
-    
+
+    # HTTP Transport Configuration
+    HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "4"))  # hosts kept in the pool
+    HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "32"))  # keep-alive connections per host
+    HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))  # connection-level retries only
+    HTTP_WARMUP = os.getenv("HTTP_WARMUP", "True").lower() == "true"
+    API_FANOUT_MAX_WORKERS = int(os.getenv("API_FANOUT_MAX_WORKERS", "5"))  # concurrent calls per batch
+    API_COALESCE_TTL = float(os.getenv("API_COALESCE_TTL", "2.0"))  # seconds a shared GET result is reused
+    API_COALESCE_JITTER = float(os.getenv("API_COALESCE_JITTER", "0.25"))  # +/- fraction of the TTL
+    API_RESPONSE_CACHE_BYTES = int(os.getenv("API_RESPONSE_CACHE_BYTES", str(32 * 1024 * 1024)))  # conditional-GET cache budget
+    API_STALE_CACHE_BYTES = int(os.getenv("API_STALE_CACHE_BYTES", str(16 * 1024 * 1024)))  # last good responses kept for outages
+    CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))  # consecutive failures before opening
+    CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))  # seconds open before a half-open probe
+
+    # Timeouts and Deadline Budgets (seconds)
+    API_CONNECT_TIMEOUT = float(os.getenv("API_CONNECT_TIMEOUT", "5"))
+    API_METADATA_TIMEOUT = float(os.getenv("API_METADATA_TIMEOUT", "10"))  # read timeout for lookups and listings
+    API_AUTH_TIMEOUT = float(os.getenv("API_AUTH_TIMEOUT", "15"))  # read timeout for login/OTP calls
+    API_UPLOAD_TIMEOUT = float(os.getenv("API_UPLOAD_TIMEOUT", "60"))  # read timeout per chunk/finalize call
+    RENDER_BUDGET = float(os.getenv("RENDER_BUDGET", "20"))  # total API time per Streamlit render
+    FLASK_REQUEST_BUDGET = float(os.getenv("FLASK_REQUEST_BUDGET", "25"))  # total API time per Flask request
+    SUBMIT_BUDGET = float(os.getenv("SUBMIT_BUDGET", "600"))  # total time for one content submission
+    OPTIONAL_WIDGET_MIN_BUDGET = float(os.getenv("OPTIONAL_WIDGET_MIN_BUDGET", "3"))  # skip optional widgets below this
+
+    # Metrics Configuration
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")  # bearer token for /metrics scrapes; localhost only when unset
+    METRICS_ADMIN_PANEL = os.getenv("METRICS_ADMIN_PANEL", "False").lower() == "true"  # show API metrics page in Streamlit
+
+    # Local Cache Configuration
+    CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache"))
+    CATEGORY_CACHE_TTL = int(os.getenv("CATEGORY_CACHE_TTL", "600"))  # seconds before a background refresh
+    CATEGORY_MAX_STALE = int(os.getenv("CATEGORY_MAX_STALE", "86400"))  # seconds stale data may still be served
+    CATEGORY_API_TOKEN = os.getenv("CATEGORY_API_TOKEN")  # service token for category refreshes; anonymous when unset
+    RECORD_MIRROR_PATH = os.getenv("RECORD_MIRROR_PATH", os.path.join(CACHE_DIR, "records.sqlite3"))  # local copy of /records/
+    RECORD_SYNC_INTERVAL = float(os.getenv("RECORD_SYNC_INTERVAL", "300"))  # seconds before a background incremental sync
+    RECORD_RECONCILE_INTERVAL = float(os.getenv("RECORD_RECONCILE_INTERVAL", "86400"))  # seconds between full reconciles
+    RECORD_SYNC_PAGE_SIZE = int(os.getenv("RECORD_SYNC_PAGE_SIZE", "1000"))  # records per /records/ page (API maximum)
+    RECORD_API_TOKEN = os.getenv("RECORD_API_TOKEN")  # service token for record mirror syncs; anonymous when unset
+
     # File Upload Configuration
     MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+    UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(5 * 1024 * 1024)))  # bytes in the first /records/upload/chunk call
+    UPLOAD_ADAPTIVE = os.getenv("UPLOAD_ADAPTIVE", "True").lower() == "true"  # size later chunks from measured throughput
+    UPLOAD_CHUNK_MIN = int(os.getenv("UPLOAD_CHUNK_MIN", str(256 * 1024)))  # smallest adaptive chunk
+    UPLOAD_CHUNK_MAX = int(os.getenv("UPLOAD_CHUNK_MAX", str(32 * 1024 * 1024)))  # largest adaptive chunk
+    UPLOAD_CHUNK_TARGET_SECONDS = float(os.getenv("UPLOAD_CHUNK_TARGET_SECONDS", "4"))  # aimed-for duration of one chunk call
+    UPLOAD_WINDOW = int(os.getenv("UPLOAD_WINDOW", "4"))  # chunks of one file in flight at once
+    UPLOAD_CHUNK_ATTEMPTS = int(os.getenv("UPLOAD_CHUNK_ATTEMPTS", "3"))  # tries per chunk before giving up
+    UPLOAD_RETRY_BACKOFF = float(os.getenv("UPLOAD_RETRY_BACKOFF", "0.5"))  # seconds, doubled per retry
+    UPLOAD_STREAM_MAX_BYTES = int(os.getenv("UPLOAD_STREAM_MAX_BYTES", str(1024 * 1024 * 1024)))  # largest file the Flask app streams through
+    UPLOAD_FORM_MAX_BYTES = int(os.getenv("UPLOAD_FORM_MAX_BYTES", str(1024 * 1024)))  # form fields sent with a file
+    UPLOAD_JOURNAL_PATH = os.getenv("UPLOAD_JOURNAL_PATH", os.path.join(CACHE_DIR, "uploads.sqlite3"))  # resumable upload state
+    UPLOAD_RESUME_MAX_AGE = float(os.getenv("UPLOAD_RESUME_MAX_AGE", "86400"))  # seconds an interrupted upload can resume
+    UPLOAD_DEDUP = os.getenv("UPLOAD_DEDUP", "True").lower() == "true"  # offer existing records for identical files
+    CONTENT_INDEX_PATH = os.getenv("CONTENT_INDEX_PATH", os.path.join(CACHE_DIR, "content_index.sqlite3"))
+    IMAGE_NORMALIZE = os.getenv("IMAGE_NORMALIZE", "True").lower() == "true"  # orient, strip and downsize images before upload
+    IMAGE_MAX_EDGE = int(os.getenv("IMAGE_MAX_EDGE", "2560"))  # pixels on the long edge
+    IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "85"))
+    IMAGE_OUTPUT_FORMAT = os.getenv("IMAGE_OUTPUT_FORMAT", "JPEG")  # JPEG or WEBP
+    IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))  # processes in the image pool
+    IMAGE_PROCESS_TIMEOUT = float(os.getenv("IMAGE_PROCESS_TIMEOUT", "60"))  # seconds before uploading the original
+    UPLOAD_BACKGROUND = os.getenv("UPLOAD_BACKGROUND", "True").lower() == "true"  # queue submissions instead of uploading inline
+    UPLOAD_QUEUE_DIR = os.getenv("UPLOAD_QUEUE_DIR", os.path.join(CACHE_DIR, "upload_queue"))  # job table and spooled files
+    UPLOAD_QUEUE_WORKERS = int(os.getenv("UPLOAD_QUEUE_WORKERS", "2"))  # submissions uploaded at once
+    UPLOAD_QUEUE_POLL = float(os.getenv("UPLOAD_QUEUE_POLL", "5"))  # seconds an idle worker waits before checking again
+    UPLOAD_STATUS_REFRESH = float(os.getenv("UPLOAD_STATUS_REFRESH", "2"))  # seconds between pending-upload view refreshes
+    OUTBOX_RETRY_BASE = float(os.getenv("OUTBOX_RETRY_BASE", "5"))  # seconds before retrying a queued upload that could not reach the API
+    OUTBOX_RETRY_MAX = float(os.getenv("OUTBOX_RETRY_MAX", "300"))  # cap on that delay as it doubles per attempt
     ALLOWED_EXTENSIONS = ['png', 'jpg', 'jpeg', 'gif', 'mp4', 'mov', 'avi', 'mp3', 'wav', 'pdf']
     
     # Pagination
     DEFAULT_PAGE_SIZE = 20
     MAX_PAGE_SIZE = 100
+    MY_RECORDS_CACHE_TTL = float(os.getenv("MY_RECORDS_CACHE_TTL", "60"))  # seconds a My Records tab's list is reused while paging
     
     # Regional Configuration
     INDIAN_STATES = [
@@ -39,5 +106,29 @@ class Settings:
     
     # Age Groups
     AGE_GROUPS = ["3-6 years", "7-12 years", "13-18 years", "18+ years", "All ages"]
+    
+    # Record Vocabularies (form choice -> value the API accepts)
+    LANGUAGE_MAPPING = {
+        'telugu': 'telugu',
+        'english': 'english',
+        'hindi': 'hindi',
+        'tamil': 'tamil',
+        'bengali': 'bengali',
+        'marathi': 'marathi',
+        'gujarati': 'gujarati',
+        'kannada': 'kannada',
+        'malayalam': 'malayalam',
+        'punjabi': 'punjabi',
+        'odia': 'odia',
+        'urdu': 'urdu',
+        'assamese': 'assamese'
+    }
+    
+    RELEASE_RIGHTS_MAPPING = {
+        'I created this content myself': 'creator',
+        'I have permission from family/friends who created this': 'family_or_friend',
+        'I downloaded this or am unsure of the rights': 'downloaded',
+        'Not applicable': 'NA'
+    }
 
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+"""
+Bulk import runner for the Cultural Heritage Platform
+Uploads a folder or a CSV/JSONL manifest of records (see utils/bulk_import.py)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.bulk_import import main
+
+if __name__ == "__main__":
+    sys.exit(main())
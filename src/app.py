@@ -7,8 +7,29 @@ import requests
 from typing import Optional, Dict, List, Any
 import json
 from datetime import datetime
+from io import BytesIO
 import uuid
 
+# Make the shared config/ and utils/ packages importable when run via `streamlit run src/app.py`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import settings
+from utils.api_gateway import api_call
+from utils.category_catalog import api_category_fetcher, get_category_catalog
+from utils.chunked_upload import ChunkUploadError, UploadResult, chunk_fields
+from utils.circuit_breaker import OPEN, all_breakers, get_breaker
+from utils.content_index import get_content_index, sha256_of
+from utils.contribution_analytics import mirror_frame, time_buckets, top_n, user_contributions_frame
+from utils.deadline import DeadlineExceeded, deadline_scope, has_budget
+from utils.http_transport import warm_up_async
+from utils.image_pipeline import format_size, normalize_image
+from utils.metrics import get_metrics, render_prometheus
+from utils.pagination import page_size, paginate
+from utils.record_mirror import add_created_record, get_record_mirror, records_page_fetcher
+from utils.request_coalescing import get_coalescer
+from utils.upload_journal import content_fingerprint, get_upload_journal, resumable_upload
+from utils.upload_queue import get_upload_queue
+
 # Load environment variables if .env file exists
 try:
     from dotenv import load_dotenv
@@ -21,6 +42,14 @@ API_BASE_URL = os.getenv("API_BASE_URL", "https://api.corpus.swecha.org/api/v1")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 SWECHA_API_KEY = os.getenv("SWECHA_API_KEY")
 
+# Open a keep-alive connection to the API host while the first page renders
+warm_up_async(API_BASE_URL)
+CATEGORY_FETCHER = api_category_fetcher(API_BASE_URL)
+RECORDS_FETCHER = records_page_fetcher(API_BASE_URL)
+
+# Load the on-disk category snapshot so the first form render needs no API call
+get_category_catalog()
+
 # Translation dictionaries
 TRANSLATIONS = {
     'english': {
@@ -206,54 +235,37 @@ def init_session_state():
 def api_request(endpoint: str, method: str = 'GET', data: Optional[Dict] = None, 
                 token: Optional[str] = None, form_data: bool = False, files: Optional[Dict] = None) -> Optional[requests.Response]:
     """Make API requests to the corpus API"""
-    url = f"{API_BASE_URL}{endpoint}"
-    headers = {}
-    
-    if token:
-        headers['Authorization'] = f'Bearer {token}'
-    
-    # Don't set Content-Type for multipart uploads (requests will set it automatically)
-    if not form_data and not files:
-        headers['Content-Type'] = 'application/json'
-    
     # Debug logging
     if form_data or files:
-        st.info(f"Making {method} request to {url}")
+        st.info(f"Making {method} request to {API_BASE_URL}{endpoint}")
         if data:
             st.info(f"Request data keys: {list(data.keys()) if isinstance(data, dict) else type(data)}")
     
-    try:
-        if method == 'POST':
-            if files:
-                # For multipart uploads - longer timeout
-                response = requests.post(url, data=data, files=files, headers=headers, timeout=60)
-            elif form_data:
-                # For form data submissions - longer timeout
-                response = requests.post(url, data=data, headers=headers, timeout=30)
-            else:
-                # For JSON data
-                response = requests.post(url, json=data, headers=headers, timeout=10)
-        elif method == 'GET':
-            response = requests.get(url, headers=headers, params=data, timeout=10)
-        else:
-            return None
-        
-        # Debug logging for responses
-        if form_data or files:
-            st.info(f"Response status: {response.status_code}")
-            if response.status_code not in [200, 201]:
-                st.error(f"Response content: {response.text[:500]}")
-            
-        return response
-    except requests.exceptions.Timeout as e:
-        st.error(f"API request timeout after waiting for response: {str(e)}")
-        return None
-    except requests.exceptions.ConnectionError as e:
-        st.error(f"API connection error - could not reach server: {str(e)}")
-        return None
-    except requests.exceptions.RequestException as e:
-        st.error(f"API request failed ({type(e).__name__}): {str(e)}")
-        return None
+    response = api_call(API_BASE_URL, endpoint, method, data, token, form_data, files,
+                        on_stale=show_stale_notice, on_error=show_api_error)
+    
+    # Debug logging for responses
+    if response is not None and (form_data or files):
+        st.info(f"Response status: {response.status_code}")
+        if response.status_code not in [200, 201]:
+            st.error(f"Response content: {response.text[:500]}")
+    return response
+
+def show_stale_notice(endpoint: str, stored_at: float) -> None:
+    """Tell the user a saved response is shown because the API is unavailable"""
+    saved_at = datetime.fromtimestamp(stored_at).strftime('%d %b %H:%M')
+    st.warning(f"⚠️ The server is unreachable right now. Showing saved data from {saved_at}.")
+
+def show_api_error(endpoint: str, error: requests.RequestException) -> None:
+    """Report a failed API call that had no saved response to fall back on"""
+    if isinstance(error, DeadlineExceeded):
+        return  # the render budget ran out; the widgets that need this call skip themselves
+    if isinstance(error, requests.exceptions.Timeout):
+        st.error(f"API request timeout after waiting for response: {str(error)}")
+    elif isinstance(error, requests.exceptions.ConnectionError):
+        st.error(f"API connection error - could not reach server: {str(error)}")
+    else:
+        st.error(f"API request failed ({type(error).__name__}): {str(error)}")
 
 # Fallback data for when API is not available
 def get_fallback_categories():
@@ -269,6 +281,10 @@ def get_fallback_categories():
         {"id": "550e8400-e29b-41d4-a716-446655440008", "name": "Festivals"}
     ]
 
+def get_categories() -> List[Dict]:
+    """Return categories from the process-wide catalog (refreshed in the background)"""
+    return get_category_catalog(CATEGORY_FETCHER).categories()
+
 def get_fallback_user_data():
     """Return fallback user data when API is not available"""
     return {
@@ -279,29 +295,9 @@ def get_fallback_user_data():
         "total_contributions": 0
     }
 
-# Language mappings
-language_mapping = {
-    'telugu': 'telugu',
-    'english': 'english',
-    'hindi': 'hindi',
-    'tamil': 'tamil',
-    'bengali': 'bengali',
-    'marathi': 'marathi',
-    'gujarati': 'gujarati',
-    'kannada': 'kannada',
-    'malayalam': 'malayalam',
-    'punjabi': 'punjabi',
-    'odia': 'odia',
-    'urdu': 'urdu',
-    'assamese': 'assamese'
-}
-
-release_rights_mapping = {
-    'I created this content myself': 'creator',
-    'I have permission from family/friends who created this': 'family_or_friend',
-    'I downloaded this or am unsure of the rights': 'downloaded',
-    'Not applicable': 'NA'
-}
+# Language and release-rights mappings (form choice -> API value), shared with the bulk importer
+language_mapping = settings.LANGUAGE_MAPPING
+release_rights_mapping = settings.RELEASE_RIGHTS_MAPPING
 
 # Page configuration
 try:
@@ -360,6 +356,11 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 def main():
+    # Every API call in this render shares one time budget
+    with deadline_scope(settings.RENDER_BUDGET):
+        render_app()
+
+def render_app():
     init_session_state()
     
     # Language selector in sidebar
@@ -737,10 +738,16 @@ def show_main_app():
     st.sidebar.title("Navigation")
     st.sidebar.markdown(f"**{get_text('welcome_back')}, {st.session_state.user_data.get('name', 'User')}!**")
     
-    page = st.sidebar.selectbox(
-        "Choose a page",
-        [get_text("home"), get_text("dashboard"), get_text("submit_content"), get_text("my_records"), get_text("profile")]
-    )
+    pages = [get_text("home"), get_text("dashboard"), get_text("submit_content"), get_text("my_records"), get_text("profile")]
+    owner = str(st.session_state.user_data.get('id'))
+    pending_uploads = get_upload_queue().pending_count(owner)
+    if settings.UPLOAD_BACKGROUND or pending_uploads:
+        pages.insert(3, "Pending Uploads")
+    if settings.METRICS_ADMIN_PANEL:
+        pages.append("API Metrics")
+    page = st.sidebar.selectbox("Choose a page", pages)
+    if pending_uploads:
+        st.sidebar.caption(f"📤 {pending_uploads} submission(s) waiting to sync")
     
     # Logout button
     if st.sidebar.button(get_text("logout"), use_container_width=True):
@@ -760,6 +767,107 @@ def show_main_app():
         show_my_records_page()
     elif page == get_text("profile"):
         show_profile_page()
+    elif page == "Pending Uploads":
+        show_pending_uploads_page()
+    elif page == "API Metrics":
+        show_api_metrics_page()
+
+UPLOAD_STATUS_LABELS = {
+    'queued': "⏳ Queued",
+    'waiting': "📴 Waiting for connection",
+    'uploading': "📤 Uploading",
+    'finalizing': "🗂️ Finalizing",
+    'done': "✅ Submitted",
+    'failed': "❌ Failed",
+}
+
+def show_pending_uploads_page():
+    """Progress of submissions handed to the background upload queue"""
+    st.header("📤 Pending Uploads")
+    st.caption("Submissions upload in the background; you can keep using the app while they finish.")
+    render_upload_jobs()
+
+@st.fragment(run_every=settings.UPLOAD_STATUS_REFRESH)
+def render_upload_jobs():
+    """Job list, refreshed on its own so polling does not rerun the whole page"""
+    queue = get_upload_queue()
+    owner = str(st.session_state.user_data.get('id'))
+    jobs = queue.jobs_for(owner)
+    if not jobs:
+        st.info("No uploads yet. Submissions you make will appear here.")
+        return
+    
+    for job in jobs:
+        with st.container(border=True):
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                st.markdown(f"**{job.title}** · {job.media_type} · {datetime.fromtimestamp(job.created_at).strftime('%Y-%m-%d %H:%M')}")
+                if job.status in ('uploading', 'finalizing') and job.total_chunks:
+                    st.progress(job.progress, text=f"Chunk {job.chunks_done} of {job.total_chunks}")
+                if job.note:
+                    st.caption(f"🖼️ {job.note}")
+                if job.status == 'waiting':
+                    st.warning(job.error or "Waiting for the API to become reachable.")
+                    st.caption(f"Attempt {job.attempts}; saved on this device and retried automatically.")
+                elif job.error:
+                    st.error(job.error)
+                if job.record_uid:
+                    st.caption(f"Record: `{job.record_uid}`")
+            with col2:
+                st.markdown(UPLOAD_STATUS_LABELS.get(job.status, job.status))
+                if job.status in ('failed', 'waiting') and st.button("Retry now" if job.status == 'waiting' else "Retry",
+                                                                     key=f"retry_{job.id}", use_container_width=True):
+                    queue.retry(job.id, owner, token=st.session_state.access_token)
+                    st.rerun(scope="fragment")
+                if job.finished and st.button("Dismiss", key=f"dismiss_{job.id}", use_container_width=True):
+                    queue.dismiss(job.id, owner)
+                    st.rerun(scope="fragment")
+
+def show_api_metrics_page():
+    """Admin panel: per-endpoint latency, errors and traffic for calls made by this process"""
+    st.header("📈 API Metrics")
+    
+    rows = get_metrics().summary()
+    if not rows:
+        st.info("No API calls recorded yet.")
+    else:
+        total_calls = sum(r['calls'] for r in rows)
+        total_errors = sum(r['errors'] for r in rows)
+        col1, col2, col3 = st.columns(3)
+        col1.metric("API Calls", total_calls)
+        col2.metric("Errors", total_errors)
+        col3.metric("Retries", sum(r['retries'] for r in rows))
+        
+        st.subheader("Endpoints (slowest p95 first)")
+        st.dataframe(
+            [{**r, 'statuses': ', '.join(f"{s}×{n}" for s, n in sorted(r['statuses'].items()))} for r in rows],
+            use_container_width=True
+        )
+    
+    uploads = get_metrics().upload_summary()
+    if uploads['chunks']:
+        st.subheader("Chunked Uploads")
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Chunks", uploads['chunks'], help=f"{uploads['chunk_retries']} resent after a failed attempt")
+        col2.metric("Typical Chunk", format_size(uploads['p50_chunk_bytes']))
+        col3.metric("Per-Chunk Throughput", f"{format_size(uploads['p50_chunk_bytes_per_second'])}/s")
+        if uploads['uploads']:
+            col4.metric("Upload Throughput", f"{format_size(uploads['p50_upload_bytes_per_second'])}/s",
+                        help=f"Median of {uploads['uploads']} uploads; slowest 5% below "
+                             f"{format_size(uploads['p5_upload_bytes_per_second'])}/s")
+    
+    breakers = all_breakers()
+    if breakers:
+        st.subheader("Circuit Breakers")
+        for group, breaker in sorted(breakers.items()):
+            st.write(f"**{group}:** {breaker.state}")
+    
+    with st.expander("Prometheus exposition"):
+        st.code(render_prometheus(), language="text")
+    
+    if st.button("Reset metrics"):
+        get_metrics().reset()
+        st.rerun()
 
 def show_home_page():
     """Show the home page with project overview"""
@@ -789,11 +897,10 @@ def show_home_page():
     with col2:
         st.markdown(f"### 📊 {get_text('platform_statistics')}")
         
-        # Get some basic stats
+        # Get some basic stats (optional: fall back once the render budget is spent)
         try:
-            categories_response = api_request('/categories/')
-            if categories_response and categories_response.status_code == 200:
-                categories = categories_response.json()
+            categories = get_categories() if has_budget() else None
+            if categories:
                 st.metric(get_text("content_categories"), len(categories))
             else:
                 # Use fallback categories
@@ -863,9 +970,13 @@ def show_dashboard():
                         with st.expander(f"{contrib.get('title', 'Untitled')} ({contrib.get('type', 'unknown').title()})"):
                             st.write(f"**Description:** {contrib.get('description', 'No description')[:200]}...")
                             st.write(f"**Language:** {contrib.get('language', 'Not specified')}")
+                            st.write(f"**Category:** {get_category_catalog().name_for(contrib.get('category_id'), 'Not specified')}")
                             st.write(f"**Submitted:** {contrib.get('timestamp', 'Unknown')}")
                 else:
                     st.info("No contributions yet. Start by submitting some content!")
+                
+                show_activity(user_contributions_frame(contributions_data, get_category_catalog().name_by_id()),
+                              "📈 Your Activity")
             else:
                 # Show demo dashboard when API is not available
                 col1, col2, col3, col4 = st.columns(4)
@@ -899,6 +1010,84 @@ def show_dashboard():
         
         st.subheader("📋 Your Recent Contributions")
         st.info("👋 Welcome! Start contributing to see your dashboard with real data.")
+    
+    show_platform_overview()
+
+def show_activity(frame, title: str):
+    """Weekly contributions by media type, and the most used languages and categories, for a contributions frame"""
+    buckets = time_buckets(frame, 'W', by='media_type')
+    if not len(buckets):
+        return
+    st.subheader(title)
+    st.bar_chart(buckets.tail(26))
+    languages = ", ".join(f"{name.title()} ({count})" for name, count in top_n(frame, 'language', 3).items())
+    categories = ", ".join(f"{name} ({count})" for name, count in top_n(frame, 'category', 3).items())
+    st.caption(f"Top languages: {languages or 'none yet'} · Top categories: {categories or 'none yet'}")
+
+def get_records_mirror():
+    """Local copy of /records/, synced in the background with the process-wide credential
+
+    The first sync also runs in the background, so until it completes pages
+    show whatever has been mirrored so far.
+    """
+    mirror = get_record_mirror(RECORDS_FETCHER)
+    mirror.ensure_fresh()
+    return mirror
+
+def show_platform_overview():
+    """Platform-wide counts and latest records, read from the local record mirror"""
+    mirror = get_records_mirror()
+    total = mirror.count()
+    if not total:
+        return
+    
+    st.subheader("🌏 Across the Platform")
+    by_media_type = mirror.counts_by('media_type')
+    columns = st.columns(5)
+    for column, media_type in zip(columns, ['text', 'audio', 'video', 'image', 'document']):
+        column.metric(media_type.title(), by_media_type.get(media_type, 0))
+    
+    catalog = get_category_catalog()
+    query = st.text_input("🔍 Search records", placeholder="Title or description, in any language")
+    if query:
+        show_record_search(mirror, query)
+    else:
+        for record in mirror.records(limit=5):
+            category = catalog.name_for(record.get('category_id'), 'Uncategorized')
+            st.write(f"• **{record.get('title') or 'Untitled'}** ({record.get('media_type', 'text')}, {category})")
+    if mirror.last_sync is None:
+        st.caption(f"{total} records loaded so far · still syncing with the server")
+    else:
+        st.caption(f"{total} records · synced {int(mirror.age // 60)} min ago")
+    
+    show_activity(mirror_frame(mirror, catalog.name_by_id()), "📈 Platform Activity")
+
+def show_record_search(mirror, query: str):
+    """Ranked full-text matches for query in the record mirror, narrowed by language, media type and category"""
+    categories = {c['name']: str(c['id']) for c in get_categories()}
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        language = st.selectbox("Language", ["All"] + sorted(mirror.counts_by('language')), key="search_language")
+    with col2:
+        media_type = st.selectbox("Media type", ["All", 'text', 'audio', 'video', 'image', 'document'], key="search_media_type")
+    with col3:
+        category = st.selectbox("Category", ["All"] + sorted(categories), key="search_category")
+    
+    results = mirror.search(
+        query,
+        limit=20,
+        language=None if language == "All" else language,
+        media_type=None if media_type == "All" else media_type,
+        category_id=categories.get(category)
+    )
+    if not results:
+        st.info("No records match your search.")
+        return
+    catalog = get_category_catalog()
+    for record in results:
+        category_name = catalog.name_for(record.get('category_id'), 'Uncategorized')
+        st.write(f"• **{record.get('title') or 'Untitled'}** ({record.get('media_type', 'text')}, "
+                 f"{record.get('language') or 'unknown'}, {category_name})")
 
 def show_submit_content_page():
     """Show content submission form with multiple content types"""
@@ -954,37 +1143,27 @@ def show_submit_content_page():
     
     st.subheader(f"Selected: {content_type_labels[st.session_state.content_type]}")
     
-    # Get categories first - try different API endpoints
-    categories_response = None
-    categories = []
-    
-    # Try the authenticated endpoint first
-    if st.session_state.access_token:
-        categories_response = api_request('/categories/', token=st.session_state.access_token)
-    
-    # If that fails, try without auth
-    if not categories_response or categories_response.status_code != 200:
-        categories_response = api_request('/categories/')
-    
-    # Try alternative endpoint
-    if not categories_response or categories_response.status_code != 200:
-        categories_response = api_request('/category/')
-        
-    if categories_response and categories_response.status_code == 200:
-        categories = categories_response.json()
-        if categories:
-            st.info(f"✅ Loaded {len(categories)} categories from API")
-            # Debug: Show first few categories
-            with st.expander("Debug: Available Categories"):
-                for cat in categories[:3]:
-                    st.text(f"ID: {cat.get('id')}, Name: {cat.get('name')}")
+    # Categories come from the process-wide catalog; no API round trip once it is warm
+    categories = get_categories()
+    if categories:
+        st.info(f"✅ Loaded {len(categories)} categories from API")
+        # Debug: Show first few categories
+        with st.expander("Debug: Available Categories"):
+            for cat in categories[:3]:
+                st.text(f"ID: {cat.get('id')}, Name: {cat.get('name')}")
     
     # For now, allow using fallback categories but warn the user
-    if not categories:
+    using_fallback_categories = not categories
+    if using_fallback_categories:
         st.warning("⚠️ Using demo categories. Some submissions may fail.")
         st.info("The app will work but submissions might not succeed until API connection is restored.")
         categories = get_fallback_categories()
     
+    if 'image_savings' in st.session_state:
+        st.info(f"🖼️ {st.session_state.pop('image_savings')}")
+    if 'submit_notice' in st.session_state:
+        st.success(st.session_state.pop('submit_notice'))
+    
     # Show appropriate form based on content type
     with st.form("submit_content_form"):
         col1, col2 = st.columns([2, 1])
@@ -1026,7 +1205,8 @@ def show_submit_content_page():
                                      placeholder="Describe your document content...")
             
             # Category selection
-            category_options = {cat['name']: cat['id'] for cat in categories}
+            # name→id index is precomputed by the catalog
+            category_options = get_category_catalog().id_by_name() if not using_fallback_categories else {cat['name']: cat['id'] for cat in categories}
             selected_category = st.selectbox("Category *", list(category_options.keys()))
             
             language = st.selectbox("Language *", list(language_mapping.keys()))
@@ -1063,93 +1243,218 @@ def show_submit_content_page():
         elif len(content.strip()) < 10:
             st.error("Content must be at least 10 characters long")
         else:
-            with st.spinner("Submitting your content..."):
-                # Prepare submission data
-                submission_data = {
-                    'title': title,
-                    'content': content,
-                    'category_id': category_options[selected_category],
-                    'language': language,
-                    'release_rights': release_rights,
-                    'media_type': st.session_state.content_type,
-                    'place': place if place else None
-                }
-                
-                # Handle file upload or text content
-                if uploaded_file and st.session_state.content_type != "text":
-                    success, message = submit_file_content(submission_data, uploaded_file, content)
-                else:
-                    success, message = submit_content_chunk(submission_data, content)
-                
-                if success:
-                    st.success("🎉 Content submitted successfully!")
-                    st.balloons()
-                    # Clear form by rerunning
-                    st.rerun()
+            # Prepare submission data
+            submission_data = {
+                'title': title,
+                'content': content,
+                'category_id': category_options[selected_category],
+                'language': language,
+                'release_rights': release_rights,
+                'media_type': st.session_state.content_type,
+                'place': place if place else None
+            }
+            
+            # Handle file upload or text content
+            if uploaded_file and st.session_state.content_type != "text":
+                content_hash = sha256_of(uploaded_file) if settings.UPLOAD_DEDUP else None
+                existing = find_duplicate_record(content_hash) if content_hash else None
+                if existing:
+                    # Same bytes already uploaded by this user: ask before sending them again
+                    st.session_state.duplicate_submission = {
+                        'submission_data': submission_data,
+                        'content_hash': content_hash,
+                        'file_id': uploaded_file.file_id,
+                        'record_uid': existing.record_uid,
+                        'title': existing.title,
+                    }
                 else:
-                    st.error(f"Submission failed: {message}")
+                    process_submission(submission_data, uploaded_file, content, content_hash)
+            else:
+                process_submission(submission_data, None, content)
+    
+    if st.session_state.get('duplicate_submission'):
+        show_duplicate_prompt(uploaded_file, content)
 
-def submit_content_chunk(data: Dict[str, Any], content_text: str) -> tuple[bool, str]:
-    """Handle content submission with chunk upload process"""
-    try:
-        # Step 1: Upload content chunk
-        upload_uuid = str(uuid.uuid4())
-        clean_title = "".join(c for c in data['title'] if c.isalnum() or c in (' ', '-', '_')).strip()
-        if not clean_title:
-            clean_title = "content"
-        filename = f"{clean_title[:50]}.txt"
-        
-        chunk_payload = {
-            'filename': filename,
-            'chunk_index': 0,
-            'total_chunks': 1,
-            'upload_uuid': upload_uuid
-        }
-        
-        # Prepare file content
-        from io import BytesIO
-        content_bytes = content_text.encode('utf-8')
-        file_obj = BytesIO(content_bytes)
-        files = {'chunk': (filename, file_obj, 'text/plain')}
-        
-        # Upload chunk
-        chunk_response = api_request(
+def process_submission(data: Dict[str, Any], uploaded_file, content_text: str, content_hash: Optional[str] = None):
+    """Queue a submission for the background uploader, or upload it inline when queueing is off
+
+    Even with queueing off, a submission made while the API is known to be
+    down goes to the outbox rather than failing.
+    """
+    offline = get_breaker('/records/upload').state == OPEN
+    if settings.UPLOAD_BACKGROUND or offline:
+        queue_submission(data, uploaded_file, content_text, content_hash)
+        if offline:
+            st.session_state.submit_notice = f"📴 The API is unreachable, so \"{data['title']}\" was saved on this device. It will upload automatically once the connection is back."
+        else:
+            st.session_state.submit_notice = f"📤 \"{data['title']}\" is queued for upload. Follow its progress under Pending Uploads."
+        # Clear form by rerunning
+        st.rerun()
+    
+    # Uploads get their own budget rather than whatever is left of the render's
+    with st.spinner("Submitting your content..."), deadline_scope(settings.SUBMIT_BUDGET, inherit=False):
+        if uploaded_file is not None:
+            success, message = submit_file_content(data, uploaded_file, content_text, content_hash)
+        else:
+            success, message = submit_content_chunk(data, content_text)
+    show_submission_outcome(success, message)
+
+def show_submission_outcome(success: bool, message: str):
+    """Report the result of a submission"""
+    if success:
+        # Don't let a coalesced contributions list hide the new record
+        get_coalescer().invalidate('/contributions')
+        st.session_state.pop('my_records_lists', None)
+        st.success("🎉 Content submitted successfully!")
+        st.balloons()
+        # Clear form by rerunning
+        st.rerun()
+    else:
+        st.error(f"Submission failed: {message}")
+
+def find_duplicate_record(content_hash: str):
+    """Record the current user already created from a file with this hash, if it still exists"""
+    owner = str(st.session_state.user_data.get('id'))
+    existing = get_content_index().lookup(owner, content_hash)
+    if existing:
+        response = api_request(f'/records/{existing.record_uid}', token=st.session_state.access_token)
+        if response is not None and response.status_code == 404:
+            # The record was deleted upstream; the file is new again
+            get_content_index().forget_record(existing.record_uid)
+            return None
+    return existing
+
+def show_duplicate_prompt(uploaded_file, content_text: str):
+    """Offer the existing record instead of uploading an identical file again"""
+    pending = st.session_state.duplicate_submission
+    title = pending.get('title') or pending['record_uid']
+    st.warning(f"📎 You have already submitted this exact file as **{title}**.")
+    st.caption(f"Existing record: `{pending['record_uid']}` (listed under My Records)")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("Use existing record", use_container_width=True, type="primary"):
+            del st.session_state.duplicate_submission
+            st.success(f"Using your existing record `{pending['record_uid']}`; nothing was uploaded.")
+    with col2:
+        if st.button("Upload as a new record anyway", use_container_width=True):
+            del st.session_state.duplicate_submission
+            # Streamlit gives every upload a new file_id, so an unchanged id means the bytes hashed above
+            if uploaded_file is None or uploaded_file.file_id != pending['file_id']:
+                st.error("The selected file has changed. Please submit the form again.")
+                return
+            process_submission(pending['submission_data'], uploaded_file, content_text, pending['content_hash'])
+
+def upload_file_chunks(file_obj, filename: str, content_type: str, noun: str,
+                       fingerprint: Optional[str] = None) -> tuple[Optional[UploadResult], str]:
+    """Send file_obj to /records/upload/chunk in chunks sized to the link, under one upload_uuid
+
+    Chunks acknowledged by an earlier, interrupted attempt at the same file are
+    not sent again. fingerprint, when the file is already hashed, spares the
+    journal another pass over it.
+    """
+    def send_chunk(upload_uuid: str, chunk_index: int, total_chunks: int, chunk: bytes):
+        response = api_request(
             '/records/upload/chunk',
             method='POST',
-            data=chunk_payload,
+            data=chunk_fields(filename, chunk_index, total_chunks, upload_uuid),
             token=st.session_state.access_token,
-            files=files
+            files={'chunk': (filename, chunk, content_type)}
         )
+        if not response or response.status_code != 200:
+            raise ChunkUploadError(chunk_index=chunk_index, response=response)
+    
+    progress = st.progress(0.0, text=f"Uploading {noun}...")
+    
+    def on_progress(done: int, total: int):
+        # total is an estimate until the last chunk: sizes follow the measured throughput
+        progress.progress(min(1.0, done / total), text=f"Uploading {noun}... chunk {done} of ~{total}")
+    
+    try:
+        upload = resumable_upload(file_obj, send_chunk, get_upload_journal(),
+                                  owner=str(st.session_state.user_data.get('id')),
+                                  filename=filename, on_progress=on_progress, fingerprint=fingerprint)
+        if upload.resumed_chunks:
+            st.info(f"Resumed an earlier upload: {upload.resumed_chunks} of {upload.total_chunks} chunks were already on the server.")
+        return upload, ''
+    except ChunkUploadError as e:
+        response = e.response
+        if response is not None and response.status_code == 500:
+            try:
+                if response.json().get('detail') == 'Failed to save chunk':
+                    return None, f'The server is experiencing issues saving your {noun}. This might be a temporary problem with the external API. Please try again in a few moments.'
+            except ValueError:
+                pass
+        return None, f'Failed to upload {noun} chunk {e.chunk_index + 1}. Please try again.'
+    finally:
+        progress.empty()
+
+def submission_filename(title: str, extension: str) -> str:
+    """Upload filename derived from the record title"""
+    clean_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).strip()
+    if not clean_title:
+        clean_title = "content"
+    return f"{clean_title[:50]}.{extension}"
+
+def record_fields(data: Dict[str, Any], content_text: str) -> Dict[str, Any]:
+    """Finalize fields that describe the record, as opposed to its uploaded chunks"""
+    fields = {
+        'title': data['title'],
+        'description': content_text,
+        'category_id': str(data['category_id']),
+        'user_id': str(st.session_state.user_data.get('id')),
+        'media_type': data.get('media_type', 'text'),
+        'release_rights': release_rights_mapping[data['release_rights']],
+        'language': language_mapping[data['language']],
+        'use_uid_filename': False
+    }
+    
+    # Add place if provided
+    if data.get('place'):
+        fields['place'] = str(data['place'])
+    return fields
+
+def queue_submission(data: Dict[str, Any], uploaded_file, content_text: str, content_hash: Optional[str] = None) -> str:
+    """Hand a submission to the background upload queue and return its job id"""
+    if uploaded_file is not None:
+        file_extension = uploaded_file.name.split('.')[-1] if '.' in uploaded_file.name else 'bin'
+        source, content_type = uploaded_file, uploaded_file.type or 'application/octet-stream'
+    else:
+        file_extension, source, content_type = 'txt', BytesIO(content_text.encode('utf-8')), 'text/plain'
+    
+    return get_upload_queue().submit(
+        source,
+        owner=str(st.session_state.user_data.get('id')),
+        token=st.session_state.access_token,
+        api_base_url=API_BASE_URL,
+        title=data['title'],
+        filename=submission_filename(data['title'], file_extension),
+        content_type=content_type,
+        media_type=data.get('media_type', 'text'),
+        record_data=record_fields(data, content_text),
+        content_hash=content_hash,
+        # Oriented, stripped and downsized in the image process pool by the worker
+        normalize=data.get('media_type') == 'image'
+    )
+
+def submit_content_chunk(data: Dict[str, Any], content_text: str) -> tuple[bool, str]:
+    """Handle content submission with chunk upload process"""
+    try:
+        # Step 1: Upload content chunks
+        filename = submission_filename(data['title'], 'txt')
         
-        if not chunk_response or chunk_response.status_code != 200:
-            if chunk_response and chunk_response.status_code == 500:
-                try:
-                    error_data = chunk_response.json()
-                    if error_data.get('detail') == 'Failed to save chunk':
-                        return False, 'The server is experiencing issues saving your content. This might be a temporary problem with the external API. Please try again in a few moments.'
-                except:
-                    pass
-            return False, 'Failed to upload content chunk. Please try again.'
+        upload, error_message = upload_file_chunks(BytesIO(content_text.encode('utf-8')), filename, 'text/plain', 'content')
+        if upload is None:
+            return False, error_message
         
         # Step 2: Finalize record
         record_data = {
-            'title': data['title'],
-            'description': content_text,
-            'category_id': str(data['category_id']),
-            'user_id': str(st.session_state.user_data.get('id')),
-            'media_type': data.get('media_type', 'text'),
-            'upload_uuid': upload_uuid,
+            **record_fields(data, content_text),
+            'upload_uuid': upload.upload_uuid,
             'filename': filename,
-            'total_chunks': 1,
-            'release_rights': release_rights_mapping[data['release_rights']],
-            'language': language_mapping[data['language']],
-            'use_uid_filename': False
+            'total_chunks': upload.total_chunks
         }
         
-        # Add place if provided
-        if data.get('place'):
-            record_data['place'] = str(data['place'])
-        
         # Debug logging
         st.info(f"Debug - Sending record data: {record_data}")
         
@@ -1161,8 +1466,10 @@ def submit_content_chunk(data: Dict[str, Any], content_text: str) -> tuple[bool,
             token=st.session_state.access_token,
             form_data=True
         )
+        get_upload_journal().record_finalize(upload.upload_uuid, response.status_code if response is not None else None)
         
         if response and response.status_code == 201:
+            add_created_record(response)
             return True, 'Content submitted successfully!'
         else:
             # Get detailed error information
@@ -1182,68 +1489,40 @@ def submit_content_chunk(data: Dict[str, Any], content_text: str) -> tuple[bool,
     except Exception as e:
         return False, f'An error occurred: {str(e)}'
 
-def submit_file_content(data: Dict[str, Any], uploaded_file, content_text: str) -> tuple[bool, str]:
-    """Handle file content submission with chunk upload process"""
+def submit_file_content(data: Dict[str, Any], uploaded_file, content_text: str,
+                        content_hash: Optional[str] = None) -> tuple[bool, str]:
+    """Handle file content submission with chunk upload process
+
+    content_hash, the SHA-256 of the file, is indexed against the new record so
+    later submissions of the same bytes can be offered that record instead.
+    """
     try:
-        # Step 1: Upload file chunk
-        upload_uuid = str(uuid.uuid4())
-        
+        # Step 1: Upload file chunks
         # Get file extension and create proper filename
         file_extension = uploaded_file.name.split('.')[-1] if '.' in uploaded_file.name else 'bin'
-        clean_title = "".join(c for c in data['title'] if c.isalnum() or c in (' ', '-', '_')).strip()
-        if not clean_title:
-            clean_title = "content"
-        filename = f"{clean_title[:50]}.{file_extension}"
-        
-        chunk_payload = {
-            'filename': filename,
-            'chunk_index': 0,
-            'total_chunks': 1,
-            'upload_uuid': upload_uuid
-        }
-        
-        # Prepare file for upload
-        uploaded_file.seek(0)  # Reset file pointer to beginning
-        files = {'chunk': (filename, uploaded_file, uploaded_file.type)}
+        upload_source, content_type = uploaded_file, uploaded_file.type
+        # The dedup check already hashed these bytes; the journal can reuse the digest
+        fingerprint = content_fingerprint(uploaded_file.size, content_hash) if content_hash else None
+        image = None
+        if data.get('media_type') == 'image':
+            # Oriented, stripped and downsized in the image process pool
+            image = normalize_image(uploaded_file, uploaded_file.name, uploaded_file.type)
+            upload_source, content_type, file_extension = BytesIO(image.data), image.content_type, image.extension
+            fingerprint = None
+        filename = submission_filename(data['title'], file_extension)
         
-        # Upload chunk
-        chunk_response = api_request(
-            '/records/upload/chunk',
-            method='POST',
-            data=chunk_payload,
-            token=st.session_state.access_token,
-            files=files
-        )
-        
-        if not chunk_response or chunk_response.status_code != 200:
-            if chunk_response and chunk_response.status_code == 500:
-                try:
-                    error_data = chunk_response.json()
-                    if error_data.get('detail') == 'Failed to save chunk':
-                        return False, 'The server is experiencing issues saving your file. This might be a temporary problem with the external API. Please try again in a few moments.'
-                except:
-                    pass
-            return False, 'Failed to upload file chunk. Please try again.'
+        upload, error_message = upload_file_chunks(upload_source, filename, content_type, 'file', fingerprint)
+        if upload is None:
+            return False, error_message
         
         # Step 2: Finalize record
         record_data = {
-            'title': data['title'],
-            'description': content_text,
-            'category_id': str(data['category_id']),
-            'user_id': str(st.session_state.user_data.get('id')),
-            'media_type': data.get('media_type', 'text'),
-            'upload_uuid': upload_uuid,
+            **record_fields(data, content_text),
+            'upload_uuid': upload.upload_uuid,
             'filename': filename,
-            'total_chunks': 1,
-            'release_rights': release_rights_mapping[data['release_rights']],
-            'language': language_mapping[data['language']],
-            'use_uid_filename': False
+            'total_chunks': upload.total_chunks
         }
         
-        # Add place if provided
-        if data.get('place'):
-            record_data['place'] = str(data['place'])
-        
         # Debug logging
         st.info(f"Debug - Sending record data: {record_data}")
         
@@ -1255,8 +1534,21 @@ def submit_file_content(data: Dict[str, Any], uploaded_file, content_text: str)
             token=st.session_state.access_token,
             form_data=True
         )
+        get_upload_journal().record_finalize(upload.upload_uuid, response.status_code if response is not None else None)
         
         if response and response.status_code == 201:
+            add_created_record(response)
+            if content_hash:
+                try:
+                    record_uid = response.json().get('uid')
+                except ValueError:
+                    record_uid = None
+                if record_uid:
+                    get_content_index().add(str(st.session_state.user_data.get('id')), content_hash, record_uid,
+                                            filename=filename, title=data['title'], size=getattr(uploaded_file, 'size', None))
+            if image is not None:
+                # Shown on the submit page after the post-submission rerun
+                st.session_state.image_savings = image.summary()
             return True, 'File content submitted successfully!'
         else:
             # Get detailed error information
@@ -1276,8 +1568,17 @@ def submit_file_content(data: Dict[str, Any], uploaded_file, content_text: str)
     except Exception as e:
         return False, f'An error occurred while uploading file: {str(e)}'
 
+# My Records tabs: (media type, tab label, icon, noun)
+MY_RECORDS_TABS = [
+    ('text', "📝 Text", "📝", "Text"),
+    ('audio', "🎵 Audio", "🎵", "Audio"),
+    ('video', "📹 Video", "📹", "Video"),
+    ('image', "🖼️ Images", "🖼️", "Image"),
+    ('document', "📄 Documents", "📄", "Document"),
+]
+
 def show_my_records_page():
-    """Show user's submitted records"""
+    """Show user's submitted records, one page of the open tab at a time"""
     st.header(f"📚 {get_text('my_contributions')}")
     
     try:
@@ -1285,148 +1586,112 @@ def show_my_records_page():
         if not user_id:
             st.error("❌ User ID not found. Please try logging in again.")
             return
-            
-        # Try to fetch contributions using the most likely endpoint
-        with st.spinner("Loading your contributions..."):
-            contributions_response = api_request(
-                f'/users/{user_id}/contributions', 
-                token=st.session_state.access_token
-            )
         
-        if contributions_response and contributions_response.status_code == 200:
-            contributions_data = contributions_response.json()
-            
-            # Show total contributions count
-            total_contributions = contributions_data.get('total_contributions', 0)
+        # Counts come from the local record mirror, so no tab has to be fetched to show them
+        mirror = get_records_mirror()
+        if mirror.last_sync is not None:
+            total_contributions = mirror.count(user_id=user_id)
             st.metric("📊 Total Contributions", total_contributions)
-            
-            if total_contributions > 0:
-                # Create tabs for different media types
-                tab1, tab2, tab3, tab4, tab5 = st.tabs(["📝 Text", "🎵 Audio", "📹 Video", "🖼️ Images", "📄 Documents"])
-                
-                with tab1:
-                    text_contribs = contributions_data.get('text_contributions', [])
-                    if text_contribs:
-                        st.write(f"**Text Contributions:** {len(text_contribs)}")
-                        for idx, contrib in enumerate(text_contribs):
-                            with st.expander(f"📝 {contrib.get('title', f'Text {idx+1}')}"):
-                                col1, col2 = st.columns([2, 1])
-                                with col1:
-                                    st.write(f"**Description:** {contrib.get('description', 'No description')}")
-                                    st.write(f"**Language:** {contrib.get('language', 'Not specified')}")
-                                with col2:
-                                    st.write(f"**Date:** {contrib.get('timestamp', 'Not available')[:10] if contrib.get('timestamp') else 'Not available'}")
-                                    st.write(f"**Status:** {'✅ Reviewed' if contrib.get('reviewed') else '⏳ Pending'}")
-                    else:
-                        st.info("No text contributions found.")
-                
-                with tab2:
-                    audio_contribs = contributions_data.get('audio_contributions', [])
-                    if audio_contribs:
-                        st.write(f"**Audio Contributions:** {len(audio_contribs)}")
-                        for idx, contrib in enumerate(audio_contribs):
-                            with st.expander(f"🎵 {contrib.get('title', f'Audio {idx+1}')}"):
-                                col1, col2 = st.columns([2, 1])
-                                with col1:
-                                    st.write(f"**Description:** {contrib.get('description', 'No description')}")
-                                    st.write(f"**Language:** {contrib.get('language', 'Not specified')}")
-                                    if contrib.get('duration'):
-                                        st.write(f"**Duration:** {contrib.get('duration')} seconds")
-                                with col2:
-                                    st.write(f"**Date:** {contrib.get('timestamp', 'Not available')[:10] if contrib.get('timestamp') else 'Not available'}")
-                                    st.write(f"**Status:** {'✅ Reviewed' if contrib.get('reviewed') else '⏳ Pending'}")
-                    else:
-                        st.info("No audio contributions found.")
-                
-                with tab3:
-                    video_contribs = contributions_data.get('video_contributions', [])
-                    if video_contribs:
-                        st.write(f"**Video Contributions:** {len(video_contribs)}")
-                        for idx, contrib in enumerate(video_contribs):
-                            with st.expander(f"📹 {contrib.get('title', f'Video {idx+1}')}"):
-                                col1, col2 = st.columns([2, 1])
-                                with col1:
-                                    st.write(f"**Description:** {contrib.get('description', 'No description')}")
-                                    st.write(f"**Language:** {contrib.get('language', 'Not specified')}")
-                                    if contrib.get('duration'):
-                                        st.write(f"**Duration:** {contrib.get('duration')} seconds")
-                                with col2:
-                                    st.write(f"**Date:** {contrib.get('timestamp', 'Not available')[:10] if contrib.get('timestamp') else 'Not available'}")
-                                    st.write(f"**Status:** {'✅ Reviewed' if contrib.get('reviewed') else '⏳ Pending'}")
-                    else:
-                        st.info("No video contributions found.")
-                        
-                with tab4:
-                    image_contribs = contributions_data.get('image_contributions', [])
-                    if image_contribs:
-                        st.write(f"**Image Contributions:** {len(image_contribs)}")
-                        for idx, contrib in enumerate(image_contribs):
-                            with st.expander(f"🖼️ {contrib.get('title', f'Image {idx+1}')}"):
-                                col1, col2 = st.columns([2, 1])
-                                with col1:
-                                    st.write(f"**Description:** {contrib.get('description', 'No description')}")
-                                    st.write(f"**Language:** {contrib.get('language', 'Not specified')}")
-                                with col2:
-                                    st.write(f"**Date:** {contrib.get('timestamp', 'Not available')[:10] if contrib.get('timestamp') else 'Not available'}")
-                                    st.write(f"**Status:** {'✅ Reviewed' if contrib.get('reviewed') else '⏳ Pending'}")
-                    else:
-                        st.info("No image contributions found.")
-                        
-                with tab5:
-                    doc_contribs = contributions_data.get('document_contributions', [])
-                    if doc_contribs:
-                        st.write(f"**Document Contributions:** {len(doc_contribs)}")
-                        for idx, contrib in enumerate(doc_contribs):
-                            with st.expander(f"📄 {contrib.get('title', f'Document {idx+1}')}"):
-                                col1, col2 = st.columns([2, 1])
-                                with col1:
-                                    st.write(f"**Description:** {contrib.get('description', 'No description')}")
-                                    st.write(f"**Language:** {contrib.get('language', 'Not specified')}")
-                                with col2:
-                                    st.write(f"**Date:** {contrib.get('timestamp', 'Not available')[:10] if contrib.get('timestamp') else 'Not available'}")
-                                    st.write(f"**Status:** {'✅ Reviewed' if contrib.get('reviewed') else '⏳ Pending'}")
-                    else:
-                        st.info("No document contributions found.")
-            
-            else:
-                st.info("🎯 You haven't submitted any content yet!")
-                st.markdown("### Start Contributing")
-                st.markdown("• Go to **Submit Content** to add your first contribution")
-                st.markdown("• Share traditional stories, recipes, games, or cultural practices") 
-                st.markdown("• Help preserve India's rich cultural heritage")
-                
-        elif contributions_response and contributions_response.status_code == 401:
-            st.error("🔒 Authentication failed. Please log in again.")
-        elif contributions_response and contributions_response.status_code == 404:
-            st.warning("⚠️ Contributions endpoint not found. Using fallback display.")
-            # Show empty state but don't show error
-            st.info("🎯 You haven't submitted any content yet!")
-            st.markdown("### Start Contributing")
-            st.markdown("• Go to **Submit Content** to add your first contribution")
-            st.markdown("• Share traditional stories, recipes, games, or cultural practices") 
-            st.markdown("• Help preserve India's rich cultural heritage")
-        else:
-            status_code = contributions_response.status_code if contributions_response else "No response"
-            st.error(f"❌ Could not load your contributions (Status: {status_code})")
-            st.info("💡 This might be because:")
-            st.info("• Your submissions are still being processed")
-            st.info("• There's a temporary server issue")
-            st.info("• The API service is being updated")
-            if contributions_response:
-                try:
-                    error_detail = contributions_response.text[:200]
-                    if error_detail:
-                        st.text_area("Debug Info:", error_detail, height=100)
-                except:
-                    pass
-            
-            if st.button("🔄 Retry"):
-                st.rerun()
+            if total_contributions == 0:
+                show_no_contributions()
+                return
+        
+        sizes = sorted({size for size in (10, 50, settings.DEFAULT_PAGE_SIZE, settings.MAX_PAGE_SIZE)
+                        if size <= settings.MAX_PAGE_SIZE})
+        st.selectbox("Records per page", sizes, index=sizes.index(page_size()), key='my_records_page_size')
+        
+        # Only the selected media type is rendered, so only its contributions are fetched
+        labels = {media_type: label for media_type, label, _, _ in MY_RECORDS_TABS}
+        selected = st.radio("Media type", list(labels), format_func=labels.get, horizontal=True,
+                            key='my_records_tab', label_visibility="collapsed")
+        media_type, _, icon, noun = next(tab for tab in MY_RECORDS_TABS if tab[0] == selected)
+        show_contributions_tab(user_id, media_type, icon, noun)
                 
     except Exception as e:
         st.error(f"❌ An error occurred: {str(e)}")
         st.info("Please try refreshing the page or contact support if the problem persists.")
 
+def show_no_contributions():
+    """Empty state for a contributor with nothing submitted yet"""
+    st.info("🎯 You haven't submitted any content yet!")
+    st.markdown("### Start Contributing")
+    st.markdown("• Go to **Submit Content** to add your first contribution")
+    st.markdown("• Share traditional stories, recipes, games, or cultural practices") 
+    st.markdown("• Help preserve India's rich cultural heritage")
+
+def fetch_media_contributions(user_id: str, media_type: str) -> tuple[Optional[List[Dict]], Optional[requests.Response]]:
+    """Return (contributions of one media type newest first, or None on failure; the response)
+
+    A tab's list is kept in the session for MY_RECORDS_CACHE_TTL seconds, so
+    moving between its pages does not fetch it again.
+    """
+    lists = st.session_state.setdefault('my_records_lists', {})
+    cached = lists.get(media_type)
+    if cached and datetime.now().timestamp() - cached['fetched_at'] < settings.MY_RECORDS_CACHE_TTL:
+        return cached['items'], None
+    
+    with st.spinner(f"Loading your {media_type} contributions..."):
+        response = api_request(f'/users/{user_id}/contributions/{media_type}', token=st.session_state.access_token)
+    if response is None or response.status_code != 200:
+        return None, response
+    items = response.json().get('contributions', [])
+    items.sort(key=lambda contrib: contrib.get('timestamp') or '', reverse=True)
+    lists[media_type] = {'items': items, 'fetched_at': datetime.now().timestamp()}
+    return items, response
+
+def set_records_cursor(media_type: str, offset: int):
+    """Remember where the user is in a tab's list (a button callback)"""
+    st.session_state.setdefault('my_records_cursor', {})[media_type] = offset
+
+def forget_media_contributions(media_type: str):
+    """Drop a tab's cached list so the next render fetches it again (a button callback)"""
+    st.session_state.setdefault('my_records_lists', {}).pop(media_type, None)
+
+def show_contributions_tab(user_id: str, media_type: str, icon: str, noun: str):
+    """One page of a media type's contributions with previous/next controls"""
+    items, response = fetch_media_contributions(user_id, media_type)
+    if items is None:
+        if response is not None and response.status_code == 401:
+            st.error("🔒 Authentication failed. Please log in again.")
+        elif response is not None and response.status_code == 404:
+            st.warning("⚠️ Contributions endpoint not found.")
+        else:
+            status_code = response.status_code if response is not None else "No response"
+            st.error(f"❌ Could not load your {noun.lower()} contributions (Status: {status_code})")
+            st.button("🔄 Retry", key=f"retry_{media_type}", on_click=forget_media_contributions, args=(media_type,))
+        return
+    if not items:
+        st.info(f"No {noun.lower()} contributions found.")
+        return
+    
+    cursors = st.session_state.setdefault('my_records_cursor', {})
+    page = paginate(items, cursors.get(media_type, 0), st.session_state.get('my_records_page_size'))
+    cursors[media_type] = page.offset
+    
+    st.write(f"**{noun} Contributions:** {page.total}")
+    for idx, contrib in enumerate(page.items, start=page.offset):
+        with st.expander(f"{icon} {contrib.get('title', f'{noun} {idx+1}')}"):
+            col1, col2 = st.columns([2, 1])
+            with col1:
+                st.write(f"**Description:** {contrib.get('description', 'No description')}")
+                st.write(f"**Language:** {contrib.get('language', 'Not specified')}")
+                if media_type in ('audio', 'video') and contrib.get('duration'):
+                    st.write(f"**Duration:** {contrib.get('duration')} seconds")
+            with col2:
+                st.write(f"**Date:** {contrib.get('timestamp', 'Not available')[:10] if contrib.get('timestamp') else 'Not available'}")
+                st.write(f"**Status:** {'✅ Reviewed' if contrib.get('reviewed') else '⏳ Pending'}")
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        st.button("← Previous", key=f"previous_{media_type}", disabled=not page.has_previous,
+                  on_click=set_records_cursor, args=(media_type, page.previous_offset))
+    with col2:
+        st.caption(f"Showing {page.first}–{page.last} of {page.total} · page {page.number} of {page.pages}")
+    with col3:
+        st.button("Next →", key=f"next_{media_type}", disabled=not page.has_next,
+                  on_click=set_records_cursor, args=(media_type, page.next_offset))
+    st.button("🔄 Refresh", key=f"refresh_{media_type}", on_click=forget_media_contributions, args=(media_type,))
+
 def show_profile_page():
     """Show user profile page"""
     st.header(f"👤 {get_text('user_profile')}")
@@ -1449,7 +1714,10 @@ def show_profile_page():
             # Get detailed stats
             try:
                 user_id = user.get('id')
-                if user_id:
+                if not has_budget():
+                    # Optional widget: skip it rather than push the page past its budget
+                    st.write("Contribution statistics are temporarily unavailable")
+                elif user_id:
                     contributions_response = api_request(
                         f'/users/{user_id}/contributions', 
                         token=st.session_state.access_token
@@ -1,16 +1,29 @@
 # Clean Flask Application
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, has_request_context, g, Response
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, TextAreaField, SelectField, SubmitField
 from wtforms.validators import DataRequired, Length, Email
 import requests
 import os
+import sys
 from datetime import datetime
 import uuid
 
+# Make the shared config/ and utils/ packages importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import settings
+from utils.api_gateway import api_call
+from utils.deadline import DeadlineExceeded, end_deadline, start_deadline
+from utils.http_transport import warm_up_async
+from utils.metrics import PROMETHEUS_CONTENT_TYPE, render_prometheus, scrape_allowed
+
 # Configuration
-API_BASE_URL = "https://api.corpus.swecha.org/api/v1"
+API_BASE_URL = os.getenv("API_BASE_URL", "https://api.corpus.swecha.org/api/v1")
+
+# Open a keep-alive connection to the API host at process start
+warm_up_async(API_BASE_URL)
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'cultural-heritage-platform-secret-key-2025'
@@ -43,35 +56,37 @@ def load_user(user_id):
             )
     return None
 
+# Every API call made while handling a request shares one time budget
+@app.before_request
+def start_request_deadline():
+    g.deadline_token = start_deadline(settings.FLASK_REQUEST_BUDGET)
+
+@app.teardown_request
+def end_request_deadline(exc=None):
+    token = g.pop('deadline_token', None)
+    if token is not None:
+        end_deadline(token)
+
 # API Helper Functions
 def api_request(endpoint, method='GET', data=None, token=None, form_data=False, files=None):
     """Make API requests to the corpus API"""
-    url = f"{API_BASE_URL}{endpoint}"
-    headers = {}
-    
-    if token:
-        headers['Authorization'] = f'Bearer {token}'
-    
-    if not form_data and not files:
-        headers['Content-Type'] = 'application/json'
-    
-    try:
-        if method == 'POST':
-            if files:
-                response = requests.post(url, data=data, files=files, headers=headers, timeout=60)
-            elif form_data:
-                response = requests.post(url, data=data, headers=headers, timeout=30)
-            else:
-                response = requests.post(url, json=data, headers=headers, timeout=10)
-        elif method == 'GET':
-            response = requests.get(url, headers=headers, params=data, timeout=10)
-        else:
-            return None
-            
-        return response
-    except requests.exceptions.RequestException as e:
-        print(f"API request failed: {e}")
-        return None
+    return api_call(API_BASE_URL, endpoint, method, data, token, form_data, files,
+                    on_stale=show_stale_notice, on_error=report_api_error)
+
+def show_stale_notice(endpoint, stored_at):
+    """Tell the user a saved response is shown because the API is unavailable"""
+    saved_at = datetime.fromtimestamp(stored_at).strftime('%d %b %H:%M')
+    print(f"Serving stale response for {endpoint} saved at {saved_at}")
+    if has_request_context():
+        flash(f'The server is unreachable right now. Showing saved data from {saved_at}.', 'warning')
+
+def report_api_error(endpoint, error):
+    """Log a failed API call that had no saved response to fall back on"""
+    if isinstance(error, DeadlineExceeded):
+        print(f"Skipping {endpoint}: request deadline exceeded")
+    else:
+        print(f"API request failed: {type(error).__name__}: {error}")
+
 
 # Routes
 @app.route('/')
@@ -106,5 +121,12 @@ def my_records():
 def profile():
     return render_template('profile.html', user=current_user)
 
+# Per-endpoint upstream API metrics for Prometheus to scrape (METRICS_TOKEN, or localhost only)
+@app.route('/metrics')
+def metrics():
+    if not scrape_allowed(request.remote_addr, request.headers.get('Authorization')):
+        return Response('Not Found\n', status=404, content_type='text/plain')
+    return Response(render_prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5001, debug=True)
\ No newline at end of file
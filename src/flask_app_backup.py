@@ -1,19 +1,43 @@
 # Pure API-based Flask Application
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, has_request_context, g, Response
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, TextAreaField, SelectField, SubmitField
 from wtforms.validators import DataRequired, Length, Email
 import requests
 import os
+import sys
 from datetime import datetime
 import uuid
 from io import BytesIO
 
+# Make the shared config/ and utils/ packages importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import settings
+from utils.api_gateway import api_call
+from utils.category_catalog import api_category_fetcher, get_category_catalog
+from utils.bulk_import import MEDIA_TYPES_BY_EXTENSION
+from utils.chunked_upload import ChunkUploadError, chunk_fields, upload_in_chunks, upload_stream
+from utils.circuit_breaker import OPEN, get_breaker
+from utils.deadline import DeadlineExceeded, end_deadline, start_deadline
+from utils.http_transport import warm_up_async
+from utils.metrics import PROMETHEUS_CONTENT_TYPE, render_prometheus, scrape_allowed
+from utils.multipart_stream import MultipartError, MultipartStream, UploadTooLarge
+from utils.pagination import page_size, paginate
+from utils.record_mirror import add_created_record, get_record_mirror, records_page_fetcher
+from utils.upload_queue import get_upload_queue
+
 # Configuration
-API_BASE_URL = "https://api.corpus.swecha.org/api/v1"
+API_BASE_URL = os.getenv("API_BASE_URL", "https://api.corpus.swecha.org/api/v1")
+
+# Open a keep-alive connection to the API host at process start
+warm_up_async(API_BASE_URL)
+CATEGORY_FETCHER = api_category_fetcher(API_BASE_URL)
+RECORDS_FETCHER = records_page_fetcher(API_BASE_URL)
 
-app = Flask(__name__)
+# Templates and static files live at the repository root, next to src/
+app = Flask(__name__, template_folder='../templates', static_folder='../static')
 app.config['SECRET_KEY'] = 'cultural-heritage-platform-secret-key-2025'
 app.config['WTF_CSRF_ENABLED'] = False  # Disable CSRF for API integration
 
@@ -128,67 +152,90 @@ def load_user(user_id):
             )
     return None
 
+# Every API call made while handling a request shares one time budget;
+# upload routes get the larger submission budget
+UPLOAD_ENDPOINTS = {'submit_content'}
+
+@app.before_request
+def start_request_deadline():
+    budget = settings.SUBMIT_BUDGET if request.endpoint in UPLOAD_ENDPOINTS else settings.FLASK_REQUEST_BUDGET
+    g.deadline_token = start_deadline(budget)
+
+@app.teardown_request
+def end_request_deadline(exc=None):
+    token = g.pop('deadline_token', None)
+    if token is not None:
+        end_deadline(token)
+
 # API Helper Functions
 def api_request(endpoint, method='GET', data=None, token=None, form_data=False, files=None):
     """Make API requests to the corpus API"""
-    url = f"{API_BASE_URL}{endpoint}"
-    headers = {}
-    
-    if token:
-        headers['Authorization'] = f'Bearer {token}'
-    
-    # Don't set Content-Type for multipart uploads (requests will set it automatically)
-    if not form_data and not files:
-        headers['Content-Type'] = 'application/json'
-    
     # Debug logging for file uploads
     if files:
-        print(f"Making file upload request to {url}")
+        print(f"Making file upload request to {API_BASE_URL}{endpoint}")
         print(f"Data: {data}")
         print(f"Files: {list(files.keys()) if files else None}")
-    try:
-        if method == 'POST':
-            if files:
-                # For multipart uploads (chunk upload)
-                # Increase timeout for file uploads and ensure proper encoding
-                response = requests.post(url, data=data, files=files, headers=headers, timeout=60)
-            elif form_data:
-                # For form data (record finalization)
-                response = requests.post(url, data=data, headers=headers, timeout=30)
-            else:
-                # For JSON data
-                response = requests.post(url, json=data, headers=headers, timeout=10)
-        elif method == 'PUT':
-            if form_data:
-                response = requests.put(url, data=data, headers=headers, timeout=30)
-            else:
-                response = requests.put(url, json=data, headers=headers, timeout=10)
-        elif method == 'PATCH':
-            if form_data:
-                response = requests.patch(url, data=data, headers=headers, timeout=30)
-            else:
-                response = requests.patch(url, json=data, headers=headers, timeout=10)
-        elif method == 'DELETE':
-            response = requests.delete(url, headers=headers, timeout=10)
+    
+    response = api_call(API_BASE_URL, endpoint, method, data, token, form_data, files,
+                        on_stale=show_stale_notice, on_error=report_api_error)
+    
+    # Log response status for debugging
+    if files and response is not None:
+        print(f"Response status: {response.status_code}")
+        if response.status_code != 200:
+            print(f"Response content: {response.text[:500]}")
+    return response
+
+def show_stale_notice(endpoint, stored_at):
+    """Tell the user a saved response is shown because the API is unavailable"""
+    saved_at = datetime.fromtimestamp(stored_at).strftime('%d %b %H:%M')
+    print(f"Serving stale response for {endpoint} saved at {saved_at}")
+    if has_request_context():
+        flash(f'The server is unreachable right now. Showing saved data from {saved_at}.', 'warning')
+
+def report_api_error(endpoint, error):
+    """Log a failed API call that had no saved response to fall back on"""
+    if isinstance(error, DeadlineExceeded):
+        print(f"Skipping {endpoint}: request deadline exceeded")
+    else:
+        print(f"API request failed: {type(error).__name__}: {error}")
+
+
+def get_categories(token=None):
+    """Return categories from the process-wide catalog (refreshed in the background)
+
+    token is not used: the shared catalog refreshes with its own credential.
+    """
+    return get_category_catalog(CATEGORY_FETCHER).categories()
+
+# Load the on-disk category snapshot at start-up
+get_category_catalog()
+
+def get_records_mirror():
+    """Local copy of /records/, synced in the background with the process-wide credential"""
+    mirror = get_record_mirror(RECORDS_FETCHER)
+    mirror.ensure_fresh()
+    return mirror
+
+def category_page(template, category_name):
+    """Render a category page with its latest records (or those matching ?q=) and the user's count, from the record mirror"""
+    token = current_user.access_token
+    names = {c['name'].casefold(): str(c['id']) for c in get_categories(token=token)}
+    category_id = names.get(category_name.casefold())
+    query = request.args.get('q', '').strip()
+    records, my_count = [], 0
+    if category_id:
+        mirror = get_records_mirror()
+        if query:
+            records = mirror.search(query, limit=20, **dict(search_filters(request.args), category_id=category_id))
         else:
-            response = requests.get(url, headers=headers, params=data, timeout=10)
-        
-        # Log response status for debugging
-        if files:
-            print(f"Response status: {response.status_code}")
-            if response.status_code != 200:
-                print(f"Response content: {response.text[:500]}")
-            
-        return response
-    except requests.exceptions.Timeout as e:
-        print(f"API request timeout: {e}")
-        return None
-    except requests.exceptions.ConnectionError as e:
-        print(f"API connection error: {e}")
-        return None
-    except requests.exceptions.RequestException as e:
-        print(f"API request failed: {type(e).__name__}: {e}")
-        return None
+            records = mirror.records(category_id=category_id, limit=10)
+        my_count = mirror.count(category_id=category_id, user_id=current_user.id)
+    return render_template(template, records=records, my_count=my_count, query=query)
+
+def search_filters(args):
+    """Record mirror filters from ?language=, ?media_type= and ?category_id= (blank means any)"""
+    return {column: args.get(column) or None for column in ('language', 'media_type', 'category_id')}
 
 def get_user_token():
     """Get current user's access token"""
@@ -212,9 +259,7 @@ def index():
     # Get categories from API for homepage
     categories = []
     try:
-        response = api_request('/categories/')
-        if response and response.status_code == 200:
-            categories = response.json()
+        categories = get_categories()
     except:
         pass
     return render_template('index.html', categories=categories)
@@ -383,9 +428,7 @@ def content(media_type='text'):
     # Get categories from API
     categories = []
     try:
-        response = api_request('/categories/', token=current_user.access_token)
-        if response and response.status_code == 200:
-            categories = response.json()
+        categories = get_categories(token=current_user.access_token)
     except:
         pass
     
@@ -395,8 +438,10 @@ def content(media_type='text'):
 def submit_content():
     """
     Submit new content to the backend:
+    - Accepts JSON (text content) or multipart/form-data (form fields, then one file)
     - Validates request fields
-    - Uploads text content as a chunk
+    - Uploads the content in chunks; a file is streamed from the request body
+      as it arrives, so it is never held in worker memory
     - Finalizes the record upload
     """
 
@@ -432,10 +477,24 @@ def submit_content():
         'I downloaded this from the internet and/or I don\'t know if it is free to share.': 'unknown'
     }
 
-    try:
-        data = request.get_json(force=True)
-    except Exception:
-        return jsonify({'success': False, 'message': 'Invalid JSON body'}), 400
+    # A multipart body is read straight from the WSGI input: never touch request.form/files here
+    file_part = None
+    if request.mimetype == 'multipart/form-data':
+        max_bytes = settings.UPLOAD_STREAM_MAX_BYTES
+        if request.content_length and request.content_length > max_bytes + settings.UPLOAD_FORM_MAX_BYTES:
+            return jsonify({'success': False, 'message': str(UploadTooLarge(max_bytes))}), 413
+        boundary = request.mimetype_params.get('boundary')
+        if not boundary:
+            return jsonify({'success': False, 'message': 'Invalid multipart body'}), 400
+        try:
+            data, file_part = MultipartStream(request.stream, boundary, settings.UPLOAD_FORM_MAX_BYTES).read_fields(max_bytes)
+        except MultipartError:
+            return jsonify({'success': False, 'message': 'Invalid multipart body'}), 400
+    else:
+        try:
+            data = request.get_json(force=True)
+        except Exception:
+            return jsonify({'success': False, 'message': 'Invalid JSON body'}), 400
 
     # --- Step 1: Validation ---
     title = data.get('title', '').strip()
@@ -463,42 +522,32 @@ def submit_content():
     if release_rights not in release_rights_mapping:
         return jsonify({'success': False, 'message': f'Release rights "{release_rights}" is not supported'}), 400
 
+    media_type = data.get('media_type') or 'text'
+    extension, content_type = 'txt', 'text/plain'
+    if file_part is not None:
+        extension = os.path.splitext(file_part.filename)[1].lstrip('.').lower()
+        if extension not in MEDIA_TYPES_BY_EXTENSION:
+            return jsonify({'success': False, 'message': f'File type ".{extension}" is not supported'}), 400
+        if media_type == 'text':
+            media_type = MEDIA_TYPES_BY_EXTENSION[extension]
+        content_type = file_part.content_type
+
     # --- Step 2: Prepare upload ---
-    upload_uuid = str(uuid.uuid4())
     clean_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).strip()
-    filename = f"{clean_title[:50]}.txt"
+    filename = f"{clean_title[:50]}.{extension}"
 
     # Check authentication
     if not current_user or not current_user.access_token:
         return jsonify({'success': False, 'message': 'Authentication required'}), 401
 
-    # Upload chunk (only 1 chunk for text)
-    chunk_data = {
-        'filename': filename,
-        'chunk_index': 0,
-        'total_chunks': 1,
-        'upload_uuid': upload_uuid
-    }
-    files = {'chunk': (filename, content_text.encode('utf-8'), 'text/plain')}
-
-    chunk_response = api_request('/records/upload/chunk', 'POST', chunk_data,
-                                 token=current_user.access_token, files=files)
-
-    if not chunk_response or chunk_response.status_code != 200:
-        return jsonify({'success': False, 'message': 'Failed to upload content chunk'}), 400
-
-    # --- Step 3: Finalize upload ---
     record_data = {
         'title': title,
         'description': content_text,
-        'media_type': data.get('media_type', 'text'),
+        'media_type': media_type,
         'language': language_mapping[language.lower()],
         'user_id': current_user.id,
         'category_id': category_id,
         'release_rights': release_rights_mapping[release_rights],
-        'upload_uuid': upload_uuid,
-        'filename': filename,
-        'total_chunks': 1,
         'use_uid_filename': False
     }
 
@@ -510,10 +559,62 @@ def submit_content():
     except (ValueError, TypeError):
         pass  # skip invalid location
 
+    # Hand the upload to the background queue and answer at once; the page polls the job.
+    # While the API is known to be down the queue is the outbox even if queueing is off.
+    offline = get_breaker('/records/upload').state == OPEN
+    if settings.UPLOAD_BACKGROUND or offline:
+        try:
+            job_id = get_upload_queue().submit(
+                file_part or BytesIO(content_text.encode('utf-8')),
+                owner=current_user.id,
+                token=current_user.access_token,
+                api_base_url=API_BASE_URL,
+                title=title,
+                filename=filename,
+                content_type=content_type,
+                media_type=media_type,
+                record_data=record_data,
+                normalize=file_part is not None and media_type == 'image' and settings.IMAGE_NORMALIZE
+            )
+        except UploadTooLarge as e:
+            return jsonify({'success': False, 'message': str(e)}), 413
+        except MultipartError:
+            return jsonify({'success': False, 'message': 'The upload was interrupted'}), 400
+        message = ('The API is unreachable; your content was saved and will upload once the connection is back.'
+                   if offline else 'Content queued for upload.')
+        return jsonify({'success': True, 'message': message, 'job_id': job_id,
+                        'status_url': url_for('upload_status', job_id=job_id)}), 202
+
+    # Upload the content in fixed-size chunks under one upload_uuid
+    def send_chunk(upload_uuid, chunk_index, total_chunks, chunk):
+        chunk_response = api_request('/records/upload/chunk', 'POST',
+                                     chunk_fields(filename, chunk_index, total_chunks, upload_uuid),
+                                     token=current_user.access_token,
+                                     files={'chunk': (filename, chunk, content_type)})
+        if not chunk_response or chunk_response.status_code != 200:
+            raise ChunkUploadError(chunk_index=chunk_index, response=chunk_response)
+
+    try:
+        if file_part is not None:
+            # Chunks are read from the request only as fast as the API accepts them
+            upload = upload_stream(file_part, send_chunk, size_hint=request.content_length or settings.UPLOAD_STREAM_MAX_BYTES)
+        else:
+            upload = upload_in_chunks(BytesIO(content_text.encode('utf-8')), send_chunk)
+    except ChunkUploadError:
+        return jsonify({'success': False, 'message': 'Failed to upload content chunk'}), 400
+    except UploadTooLarge as e:
+        return jsonify({'success': False, 'message': str(e)}), 413
+    except MultipartError:
+        return jsonify({'success': False, 'message': 'The upload was interrupted'}), 400
+
+    # --- Step 3: Finalize upload ---
+    record_data.update(upload_uuid=upload.upload_uuid, filename=filename, total_chunks=upload.total_chunks)
+
     response = api_request('/records/upload', 'POST', record_data,
                            token=current_user.access_token, form_data=True)
 
     if response and response.status_code == 201:
+        add_created_record(response)
         return jsonify({'success': True, 'message': 'Content submitted successfully!'}), 201
     elif response and response.status_code == 403:
         return jsonify({'success': False, 'message': 'Authentication expired. Please log in again.'}), 401
@@ -534,48 +635,107 @@ def submit_content():
         return jsonify({'success': False, 'message': error_msg}), 400
 
 
+@app.route('/uploads')
+@login_required
+def pending_uploads():
+    """Queued and recent submissions with their upload progress"""
+    jobs = get_upload_queue().jobs_for(current_user.id)
+    return render_template('pending_uploads.html', jobs=jobs)
+
+
+@app.route('/uploads/<job_id>')
+@login_required
+def upload_status(job_id):
+    """Status and progress of one queued submission, for polling"""
+    job = get_upload_queue().get(job_id, owner=current_user.id)
+    if job is None:
+        return jsonify({'success': False, 'message': 'Upload not found'}), 404
+    return jsonify({'success': True, 'job': job.to_dict()})
+
+
+@app.route('/uploads/<job_id>/retry', methods=['POST'])
+@login_required
+def retry_upload(job_id):
+    if not get_upload_queue().retry(job_id, current_user.id, token=current_user.access_token):
+        return jsonify({'success': False, 'message': 'Only failed uploads can be retried'}), 409
+    return jsonify({'success': True, 'status_url': url_for('upload_status', job_id=job_id)}), 202
+
+
+@app.route('/uploads/<job_id>/dismiss', methods=['POST'])
+@login_required
+def dismiss_upload(job_id):
+    if not get_upload_queue().dismiss(job_id, current_user.id):
+        return jsonify({'success': False, 'message': 'Only finished uploads can be dismissed'}), 409
+    return jsonify({'success': True})
+
+
+MY_RECORDS_MEDIA_TYPES = ('text', 'audio', 'video', 'image', 'document')
+
 @app.route('/my-records')
 @login_required
 def my_records():
-    # Get user's contributions from API using the correct endpoint
+    """One page of the user's contributions of one media type
+
+    Only the selected media type is fetched. The selected type, page size
+    and each type's position are kept in the session, so coming back to
+    the page (or to a type) returns to where the user left off.
+    """
+    state = session.get('my_records', {})
+    cursors = dict(state.get('cursors', {}))
+    media_type = request.args.get('type') or state.get('type') or 'text'
+    if media_type not in MY_RECORDS_MEDIA_TYPES:
+        media_type = 'text'
+    size = page_size(request.args.get('per_page', type=int) or state.get('per_page'))
+    page_number = request.args.get('page', type=int)
+    offset = (page_number - 1) * size if page_number else cursors.get(media_type, 0)
+
     records = []
-    stats = {'total_contributions': 0, 'contributions_by_media_type': {'text': 0, 'audio': 0, 'video': 0, 'image': 0, 'document': 0}}
     try:
-        response = api_request(f'/users/{current_user.id}/contributions', token=current_user.access_token)
+        response = api_request(f'/users/{current_user.id}/contributions/{media_type}', token=current_user.access_token)
         if response and response.status_code == 200:
-            contributions_data = response.json()
-            stats = {
-                'total_contributions': contributions_data.get('total_contributions', 0),
-                'contributions_by_media_type': contributions_data.get('contributions_by_media_type', {'text': 0, 'audio': 0, 'video': 0, 'image': 0, 'document': 0})
-            }
-            # Combine all contribution types into one list
-            records = []
-            records.extend(contributions_data.get('text_contributions', []))
-            records.extend(contributions_data.get('audio_contributions', []))
-            records.extend(contributions_data.get('video_contributions', []))
-            records.extend(contributions_data.get('image_contributions', []))
-            records.extend(contributions_data.get('document_contributions', []))
+            records = response.json().get('contributions', [])
+            records.sort(key=lambda record: record.get('timestamp') or record.get('created_at') or '', reverse=True)
     except:
         pass
-    
-    return render_template('my_records.html', records=records, stats=stats)
+    page = paginate(records, offset, size)
+    cursors[media_type] = page.offset
+    session['my_records'] = {'type': media_type, 'per_page': page.size, 'cursors': cursors}
+
+    # Counts for every type come from the record mirror rather than fetching each list
+    mirror = get_records_mirror()
+    by_media_type = mirror.counts_by('media_type', user_id=current_user.id)
+    stats = {
+        'total_contributions': sum(by_media_type.values()),
+        'contributions_by_media_type': {t: by_media_type.get(t, 0) for t in MY_RECORDS_MEDIA_TYPES}
+    }
+    return render_template('my_records.html', records=page.items, page=page, stats=stats, media_type=media_type,
+                           media_types=MY_RECORDS_MEDIA_TYPES, category_names=get_category_catalog().name_by_id())
 
 
 # Continue with remaining routes from the original code
 @app.route('/landmarks')
 @login_required
 def landmarks():
-    return render_template('landmarks.html')
+    return category_page('landmarks.html', 'Landmarks')
 
 @app.route('/recipes')
 @login_required  
 def recipes():
-    return render_template('recipes.html')
+    return category_page('recipes.html', 'Recipes')
 
 @app.route('/stories')
 @login_required
 def stories():
-    return render_template('stories.html')
+    return category_page('stories.html', 'Stories')
+
+@app.route('/search')
+@login_required
+def search_records():
+    """Ranked records matching ?q= (every word as a prefix), for search-as-you-type"""
+    query = request.args.get('q', '').strip()
+    limit = min(request.args.get('limit', 20, type=int), 100)
+    records = get_records_mirror().search(query, limit=limit, **search_filters(request.args))
+    return jsonify({'query': query, 'results': records})
 
 @app.route('/profile')
 @login_required
@@ -583,8 +743,13 @@ def profile():
     return render_template('profile.html', user=current_user)
 
 
-if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5001, debug=True)
+@app.route('/change-password', methods=['POST'])
+@login_required
+def change_password():
+    data = request.get_json(silent=True) or {}
+    response = api_request('/auth/change-password', 'POST', {
+        'current_password': data.get('current_password'),
+        'new_password': data.get('new_password')
     }, token=current_user.access_token)
     
     if response and response.status_code == 200:
@@ -600,41 +765,20 @@ def logout():
     flash('You have been logged out successfully.', 'info')
     return redirect(url_for('index'))
 
-# Add missing routes that are referenced in templates
-@app.route('/stories')
-@login_required
-def stories():
-    return redirect(url_for('content', media_type='text'))
-
-@app.route('/recipes')
-@login_required
-def recipes():
-    return redirect(url_for('content', media_type='text'))
-
-@app.route('/landmarks')
-@login_required
-def landmarks():
-    return redirect(url_for('content', media_type='text'))
-
-# Remove the old content route definition that conflicts
-
-# Route for media-specific content submission pages
+# Media-specific submission links open the shared content form on that media type
 @app.route('/submit/<media_type>')
 @login_required
 def submit_media(media_type):
     if media_type not in ['text', 'audio', 'video', 'image', 'document']:
         return redirect(url_for('content'))
-    
-    # Get categories from API
-    categories = []
-    try:
-        response = api_request('/categories/', token=current_user.access_token)
-        if response and response.status_code == 200:
-            categories = response.json()
-    except:
-        pass
-    
-    return render_template(f'submit_{media_type}.html', categories=categories, media_type=media_type)
+    return redirect(url_for('content', media_type=media_type))
+
+# Per-endpoint upstream API metrics for Prometheus to scrape (METRICS_TOKEN, or localhost only)
+@app.route('/metrics')
+def metrics():
+    if not scrape_allowed(request.remote_addr, request.headers.get('Authorization')):
+        return Response('Not Found\n', status=404, content_type='text/plain')
+    return Response(render_prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -5,6 +5,7 @@ Rewritten version with improved structure, error handling, and code organization
 
 import streamlit as st
 import os
+import sys
 from typing import Optional, Dict, List, Any
 import pandas as pd
 from datetime import datetime
@@ -13,6 +14,13 @@ import json
 from dataclasses import dataclass
 import logging
 
+# Make the shared config/ and utils/ packages importable when run via `streamlit run`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import settings
+from utils.concurrency import fan_out
+from utils.deadline import deadline_scope
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -27,6 +35,7 @@ class Config:
     min_password_length: int = 6
     min_description_length: int = 32
     max_recent_contributions: int = 10
+    contribution_media_types: tuple = ('text', 'audio', 'image', 'video')
 
 config = Config()
 
@@ -119,6 +128,10 @@ class APIClientWrapper:
         """Get user contributions by media type"""
         # Implement actual contributions fetching here
         return {"contributions": []}  # Placeholder
+    
+    def get_user_contributions_by_media_types(self, user_id: str, media_types: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Get user contributions for several media types concurrently"""
+        return fan_out(lambda media_type: self.get_user_contributions_by_media(user_id=user_id, media_type=media_type), media_types)
 
 # Initialize API client
 @st.cache_resource
@@ -547,11 +560,15 @@ class MainApplication:
         """Show user dashboard"""
         st.header("📊 Dashboard Overview")
         
+        # Fetch every media type once; both widgets below render from this result
+        user_id = st.session_state.user_data.get('id')
+        contributions = self._fetch_user_contributions(user_id) if user_id else None
+        
         # User stats
         col1, col2 = st.columns(2)
         
         with col1:
-            self._show_user_contributions_metric()
+            self._show_user_contributions_metric(user_id, contributions)
         
         with col2:
             st.markdown("""
@@ -564,71 +581,74 @@ class MainApplication:
         
         # Recent activity
         st.subheader("📈 Your Recent Contributions")
-        self._show_recent_contributions()
+        self._show_recent_contributions(user_id, contributions)
+    
+    def _fetch_user_contributions(self, user_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Fetch contributions of all media types concurrently and merge them"""
+        try:
+            with st.spinner("Loading your contributions..."):
+                responses = self.api_client.get_user_contributions_by_media_types(
+                    user_id=user_id, media_types=list(config.contribution_media_types)
+                )
+        except Exception as e:
+            logger.error(f"Error fetching user contributions: {e}")
+            return None
+        
+        all_contributions = []
+        for media_type in config.contribution_media_types:
+            response = responses.get(media_type)
+            if response and response.get('contributions'):
+                all_contributions.extend(response['contributions'])
+        return all_contributions
     
-    def _show_user_contributions_metric(self):
+    def _show_user_contributions_metric(self, user_id: Optional[str], contributions: Optional[List[Dict[str, Any]]]):
         """Show user contributions metric"""
-        user_id = st.session_state.user_data.get('id')
         if not user_id:
             st.error("User ID not found")
             return
         
-        try:
-            total_contributions = 0
-            media_types = ['text', 'audio', 'image', 'video']
-            
-            for media_type in media_types:
-                response = self.api_client.get_user_contributions_by_media(user_id=user_id, media_type=media_type)
-                if response and response.get('contributions'):
-                    total_contributions += len(response['contributions'])
-            
-            st.markdown(f"""
-            <div class="metric-container">
-                <h3>Your Contributions</h3>
-                <h2>📝 {total_contributions}</h2>
-                <p>Games you've documented</p>
-            </div>
-            """, unsafe_allow_html=True)
-            
-        except Exception as e:
-            logger.error(f"Error fetching user contributions: {e}")
+        if contributions is None:
             st.error("Unable to load contribution statistics")
+            return
+        
+        st.markdown(f"""
+        <div class="metric-container">
+            <h3>Your Contributions</h3>
+            <h2>📝 {len(contributions)}</h2>
+            <p>Games you've documented</p>
+        </div>
+        """, unsafe_allow_html=True)
     
-    def _show_recent_contributions(self):
+    def _show_recent_contributions(self, user_id: Optional[str], contributions: Optional[List[Dict[str, Any]]]):
         """Show recent user contributions"""
-        user_id = st.session_state.user_data.get('id')
         if not user_id:
             st.info("Login to see your recent contributions.")
             return
         
+        if contributions is None:
+            st.error("Unable to load recent contributions")
+            return
+        
         try:
-            with st.spinner("Loading your recent contributions..."):
-                all_contributions = []
-                media_types = ['text', 'audio', 'image', 'video']
+            if contributions:
+                # Sort by timestamp
+                all_contributions = sorted(
+                    contributions,
+                    key=lambda x: datetime.fromisoformat(x['timestamp'].replace('Z', '+00:00')) 
+                    if x.get('timestamp') else datetime.min, 
+                    reverse=True
+                )
                 
-                for media_type in media_types:
-                    response = self.api_client.get_user_contributions_by_media(user_id=user_id, media_type=media_type)
-                    if response and response.get('contributions'):
-                        all_contributions.extend(response['contributions'])
+                # Limit to recent contributions
+                recent_contributions = all_contributions[:config.max_recent_contributions]
+                
+                st.success(f"Found {len(recent_contributions)} recent contributions!")
+                
+                for contrib in recent_contributions:
+                    self._display_contribution_card(contrib)
+            else:
+                st.info("No contributions found. Be the first to add a game! 🎮")
                 
-                if all_contributions:
-                    # Sort by timestamp
-                    all_contributions.sort(
-                        key=lambda x: datetime.fromisoformat(x['timestamp'].replace('Z', '+00:00')) 
-                        if x.get('timestamp') else datetime.min, 
-                        reverse=True
-                    )
-                    
-                    # Limit to recent contributions
-                    recent_contributions = all_contributions[:config.max_recent_contributions]
-                    
-                    st.success(f"Found {len(recent_contributions)} recent contributions!")
-                    
-                    for contrib in recent_contributions:
-                        self._display_contribution_card(contrib)
-                else:
-                    st.info("No contributions found. Be the first to add a game! 🎮")
-                    
         except Exception as e:
             logger.error(f"Error loading contributions: {e}")
             st.error("Unable to load recent contributions")
@@ -810,7 +830,9 @@ def main():
     # Initialize and run application
     api_client = get_api_client()
     app = MainApplication(api_client)
-    app.run()
+    # Every API call in this render shares one time budget
+    with deadline_scope(settings.RENDER_BUDGET):
+        app.run()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,14 +1,24 @@
+import json
 import requests
 import streamlit as st
-from typing import Optional, Dict, List
+from datetime import datetime
+from typing import BinaryIO, Optional, Dict, List, Tuple
 from config.settings import settings
+from utils.chunked_upload import ChunkUploadError, UploadResult, upload_in_chunks
+from utils.circuit_breaker import get_breaker
+from utils.concurrency import fan_out
+from utils.deadline import DeadlineExceeded, timeout_class_for, timeout_for
+from utils.http_transport import create_session, warm_up_async
+from utils.request_coalescing import get_coalescer, request_key
+from utils.response_cache import CachedResponse, get_response_cache
 import uuid # Import uuid for generating unique IDs
 
 class SwechaAPIClient:
     def __init__(self):
         self.base_url = settings.API_BASE_URL
-        self.session = requests.Session()
-        self.session.timeout = 30  # 30 seconds timeout
+        # Own headers (auth token), shared keep-alive connection pool
+        self.session = create_session()
+        warm_up_async(self.base_url)
         
     def set_auth_token(self, token: str):
         """Set authentication token for API requests"""
@@ -39,6 +49,69 @@ class SwechaAPIClient:
             st.error(f"Error processing response: {str(e)}")
             return None
     
+    def _get(self, path: str, params: Optional[Dict] = None) -> Optional[Dict]:
+        """GET a JSON resource, coalescing identical concurrent requests"""
+        url = f"{self.base_url}{path}"
+        key = request_key("GET", url, params, self.session.headers.get("Authorization"))
+        # Only the HTTP exchange is shared; every caller decodes and reports for its own session
+        response, cached = get_coalescer().call(key, lambda: self._conditional_get(key, url, params))
+        if cached is not None:
+            if response is None:
+                self._warn_stale(cached)
+            return json.loads(cached.payload)
+        if response is None:
+            return None
+        payload = self._handle_response(response)
+        if payload is not None:
+            get_response_cache().put(key, CachedResponse(response.content, len(response.content),
+                                                         response.headers.get("ETag"),
+                                                         response.headers.get("Last-Modified")))
+        return payload
+    
+    def _conditional_get(self, key, url: str, params: Optional[Dict]
+                         ) -> Tuple[Optional[requests.Response], Optional[CachedResponse]]:
+        """GET with If-None-Match/If-Modified-Since; returns (response, cached entry to answer from)
+
+        A fresh response comes back as (response, None), a 304 as (response,
+        cached) and a fallback to the last good copy as (None, cached).
+        """
+        cache = get_response_cache()
+        cached = cache.get(key)
+        breaker = get_breaker(url)
+        
+        # Out of time budget: answer from the last good copy if there is one
+        try:
+            timeout = timeout_for(timeout_class_for(url))
+        except DeadlineExceeded:
+            if cached is None:
+                raise
+            return None, cached
+        
+        # While the API is down, answer from the last good copy instead of waiting on a timeout
+        if not breaker.allow_request():
+            return None, cached
+        try:
+            response = breaker.call(
+                lambda: self.session.get(url, params=params, headers=cached.validators() if cached else None,
+                                         timeout=timeout)
+            )
+        except requests.RequestException:
+            if cached is None:
+                raise
+            return None, cached
+        
+        if response.status_code == 304 and cached is not None:
+            cache.touch(key)
+            return response, cached
+        if response.status_code >= 500 and cached is not None:
+            return None, cached
+        return response, None
+    
+    def _warn_stale(self, cached: CachedResponse):
+        """Flag in the UI that a cached payload is shown while the API is unavailable"""
+        saved_at = datetime.fromtimestamp(cached.stored_at).strftime("%d %b %H:%M")
+        st.warning(f"⚠️ The server is unreachable right now. Showing saved data from {saved_at}.")
+    
     def login_for_access_token(self, phone_number: str, password: str) -> Optional[Dict]:
         """Login user and get access token (POST /api/v1/auth/login)"""
         try:
@@ -49,7 +122,8 @@ class SwechaAPIClient:
             response = self.session.post(
                 f"{self.base_url}/api/v1/auth/login",
                 json=data,
-                headers={"Content-Type": "application/json"}
+                headers={"Content-Type": "application/json"},
+                timeout=timeout_for("auth")
             )
             return self._handle_response(response)
         except requests.RequestException as e:
@@ -59,8 +133,7 @@ class SwechaAPIClient:
     def read_users_me(self) -> Optional[Dict]:
         """Read Users Me (GET /api/v1/auth/me)"""
         try:
-            response = self.session.get(f"{self.base_url}/api/v1/auth/me")
-            return self._handle_response(response)
+            return self._get("/api/v1/auth/me")
         except requests.RequestException as e:
             st.error(f"Error fetching user profile: {str(e)}")
             return None
@@ -75,7 +148,8 @@ class SwechaAPIClient:
             response = self.session.post(
                 f"{self.base_url}/api/v1/auth/change-password",
                 json=data,
-                headers={"Content-Type": "application/json"}
+                headers={"Content-Type": "application/json"},
+                timeout=timeout_for("auth")
             )
             return self._handle_response(response)
         except requests.RequestException as e:
@@ -89,7 +163,8 @@ class SwechaAPIClient:
             response = self.session.post(
                 f"{self.base_url}/api/v1/auth/signup/send-otp",
                 json=data,
-                headers={"Content-Type": "application/json"}
+                headers={"Content-Type": "application/json"},
+                timeout=timeout_for("auth")
             )
             return self._handle_response(response)
         except requests.RequestException as e:
@@ -110,7 +185,8 @@ class SwechaAPIClient:
             response = self.session.post(
                 f"{self.base_url}/api/v1/auth/signup/verify-otp",
                 json=data,
-                headers={"Content-Type": "application/json"}
+                headers={"Content-Type": "application/json"},
+                timeout=timeout_for("auth")
             )
             return self._handle_response(response)
         except requests.RequestException as e:
@@ -124,7 +200,8 @@ class SwechaAPIClient:
             response = self.session.post(
                 f"{self.base_url}/api/v1/auth/signup/resend-otp",
                 json=data,
-                headers={"Content-Type": "application/json"}
+                headers={"Content-Type": "application/json"},
+                timeout=timeout_for("auth")
             )
             return self._handle_response(response)
         except requests.RequestException as e:
@@ -139,7 +216,8 @@ class SwechaAPIClient:
             response = self.session.post(
                 f"{self.base_url}/api/v1/users/",
                 json=user_data,
-                headers={"Content-Type": "application/json"}
+                headers={"Content-Type": "application/json"},
+                timeout=timeout_for("metadata")
             )
             return self._handle_response(response)
         except requests.RequestException as e:
@@ -163,7 +241,8 @@ class SwechaAPIClient:
                 f"{self.base_url}/api/v1/records/upload/chunk",
                 files=files,
                 data=data,
-                headers=headers
+                headers=headers,
+                timeout=timeout_for("upload")
             )
             response_data = self._handle_response(response)
             if response_data:
@@ -173,6 +252,18 @@ class SwechaAPIClient:
             st.error(f"File chunk upload error: {str(e)}")
             return None
 
+    def upload_file(self, fileobj: BinaryIO, filename: str, chunk_size: Optional[int] = None) -> Optional[UploadResult]:
+        """Upload a whole file as sequential chunks of one upload_uuid; pass the result to finalize_record_upload"""
+        def send_chunk(upload_uuid: str, chunk_index: int, total_chunks: int, data: bytes):
+            if self.upload_file_chunk(data, filename, chunk_index, total_chunks, upload_uuid) is None:
+                raise ChunkUploadError(chunk_index=chunk_index)
+
+        try:
+            return upload_in_chunks(fileobj, send_chunk, chunk_size=chunk_size)
+        except ChunkUploadError as e:
+            st.error(f"Upload stopped at chunk {e.chunk_index + 1}")
+            return None
+
     def finalize_record_upload(self, title: str, description: str, media_type: str, filename: str, total_chunks: int, release_rights: str, language: str, upload_uuid: str, user_id: str, category_id: str, latitude: Optional[float] = None, longitude: Optional[float] = None, use_uid_filename: Optional[bool] = None) -> Optional[Dict]:
         """Finalize chunked upload and create a record (POST /api/v1/records/upload)"""
         try:
@@ -205,7 +296,8 @@ class SwechaAPIClient:
             response = self.session.post(
                 f"{self.base_url}/api/v1/records/upload",
                 data=data, # Send data as form-encoded
-                headers=headers
+                headers=headers,
+                timeout=timeout_for("upload")
             )
             return self._handle_response(response)
         except requests.RequestException as e:
@@ -215,17 +307,19 @@ class SwechaAPIClient:
     def get_user_contributions_by_media(self, user_id: str, media_type: str) -> Optional[List[Dict]]:
         """Get User Contributions By Media (GET /api/v1/users/{user_id}/contributions/{media_type})"""
         try:
-            response = self.session.get(f"{self.base_url}/api/v1/users/{user_id}/contributions/{media_type}")
-            return self._handle_response(response)
+            return self._get(f"/api/v1/users/{user_id}/contributions/{media_type}")
         except requests.RequestException as e:
             st.error(f"Network error fetching user contributions by media type: {str(e)}")
             return None
 
+    def get_user_contributions_by_media_types(self, user_id: str, media_types: List[str]) -> Dict[str, Optional[Dict]]:
+        """Fetch contributions for several media types concurrently, keyed by media type"""
+        return fan_out(lambda media_type: self.get_user_contributions_by_media(user_id, media_type), media_types)
+
     def get_categories(self) -> Optional[List[Dict]]:
         """Get Categories (GET /api/v1/categories/)"""
         try:
-            response = self.session.get(f"{self.base_url}/api/v1/categories/")
-            return self._handle_response(response)
+            return self._get("/api/v1/categories/")
         except requests.RequestException as e:
             st.error(f"Network error fetching categories: {str(e)}")
             return None
@@ -234,8 +328,7 @@ class SwechaAPIClient:
         """Get Users (GET /api/v1/users/)"""
         try:
             params = {"skip": skip, "limit": limit}
-            response = self.session.get(f"{self.base_url}/api/v1/users/", params=params)
-            return self._handle_response(response)
+            return self._get("/api/v1/users/", params=params)
         except requests.RequestException as e:
             st.error(f"Network error fetching users: {str(e)}")
             return None
@@ -243,8 +336,7 @@ class SwechaAPIClient:
     def get_user(self, user_id: str) -> Optional[Dict]:
         """Get User (GET /api/v1/users/{user_id})"""
         try:
-            response = self.session.get(f"{self.base_url}/api/v1/users/{user_id}")
-            return self._handle_response(response)
+            return self._get(f"/api/v1/users/{user_id}")
         except requests.RequestException as e:
             st.error(f"Network error fetching user: {str(e)}")
             return None
@@ -255,7 +347,8 @@ class SwechaAPIClient:
             response = self.session.put(
                 f"{self.base_url}/api/v1/users/{user_id}",
                 json=user_data,
-                headers={"Content-Type": "application/json"}
+                headers={"Content-Type": "application/json"},
+                timeout=timeout_for("metadata")
             )
             return self._handle_response(response)
         except requests.RequestException as e:
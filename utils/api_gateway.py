@@ -0,0 +1,97 @@
+"""
+Resilient calls to the corpus API, shared by every front end.
+
+api_call wraps one request in the protections the Streamlit and Flask apps
+all need: connect/read timeouts from the call's timeout class capped by the
+current deadline, the endpoint group's circuit breaker, one upstream call
+for identical GETs in flight, and the last good copy of a GET served while
+the API is unreachable or failing.
+
+Front ends keep only their own reporting: on_stale is told when a saved
+response is served instead of a fresh one, and on_error when a call failed
+with nothing saved to fall back on, so Streamlit can show a warning and
+Flask can flash or print.
+"""
+
+from typing import Any, Callable, Dict, Optional
+
+import requests
+
+from utils.circuit_breaker import get_breaker
+from utils.deadline import DeadlineExceeded, timeout_class_for, timeout_for
+from utils.http_transport import get_session
+from utils.request_coalescing import get_coalescer, request_key
+from utils.response_cache import CachedResponse, get_stale_cache
+
+# on_stale(endpoint, stored_at): a saved response from stored_at (epoch seconds) is being served
+StaleCallback = Callable[[str, float], None]
+# on_error(endpoint, error): the call failed and no saved response could stand in
+ErrorCallback = Callable[[str, requests.RequestException], None]
+
+# Methods that send a body: JSON by default, form fields with form_data or files
+_BODY_METHODS = ("POST", "PUT", "PATCH")
+
+
+def api_call(api_url: str, endpoint: str, method: str = "GET", data: Optional[Dict[str, Any]] = None,
+             token: Optional[str] = None, form_data: bool = False, files: Optional[Dict] = None,
+             on_stale: Optional[StaleCallback] = None,
+             on_error: Optional[ErrorCallback] = None) -> Optional[requests.Response]:
+    """Call endpoint under api_url (with /api/v1); returns the response, a saved one for a GET, or None
+
+    A GET answered with a 5xx, skipped by an open breaker or a spent
+    deadline, or failing in transit is served from the stale cache when a
+    good copy exists. Any non-GET failure returns None.
+    """
+    url = f"{api_url}{endpoint}"
+    headers = {}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    # Don't set Content-Type for multipart uploads (requests will set it automatically)
+    if not form_data and not files:
+        headers["Content-Type"] = "application/json"
+    stale_key = request_key("GET", url, data, token) if method == "GET" else None
+
+    def stale(error: Optional[requests.RequestException] = None) -> Optional[requests.Response]:
+        entry = get_stale_cache().get(stale_key) if stale_key else None
+        if entry is not None:
+            if on_stale:
+                on_stale(endpoint, entry.stored_at)
+            return entry.payload
+        if error is not None and on_error:
+            on_error(endpoint, error)
+        return None
+
+    # Connect/read timeouts for this class of call, capped by what is left of the current budget
+    try:
+        timeout = timeout_for(timeout_class_for(endpoint, upload=bool(files or form_data)))
+    except DeadlineExceeded as e:
+        return stale(e)
+
+    # Fail fast while the API is known to be down instead of waiting out a timeout
+    breaker = get_breaker(endpoint)
+    if not breaker.allow_request():
+        return stale()
+
+    session = get_session()
+    try:
+        if method == "GET":
+            # Identical GETs in flight (reruns, other sessions or requests) share one upstream call
+            response = get_coalescer().call(
+                stale_key,
+                lambda: breaker.call(lambda: session.get(url, headers=headers, params=data, timeout=timeout)),
+                cacheable=lambda r: r.status_code == 200,
+            )
+            if response.status_code == 200:
+                get_stale_cache().put(stale_key, CachedResponse(response, len(response.content)))
+            elif response.status_code >= 500:
+                return stale() or response
+            return response
+        if method in _BODY_METHODS:
+            body = {"data": data} if form_data or files else {"json": data}
+            return breaker.call(lambda: session.request(method, url, files=files, headers=headers,
+                                                        timeout=timeout, **body))
+        if method == "DELETE":
+            return breaker.call(lambda: session.delete(url, headers=headers, timeout=timeout))
+        raise ValueError(f"Unsupported API method: {method}")
+    except requests.exceptions.RequestException as e:
+        return stale(e)
@@ -0,0 +1,487 @@
+"""
+Bulk import of field collections from a folder or a CSV/JSONL manifest.
+
+A village visit produces hundreds of stories, songs and photos; entering them
+one at a time through the submit form does not scale. The importer reads
+rows, validates every one locally against the same language and
+release-rights vocabularies the form uses, resolves category names once, then
+uploads records concurrently under a shared request-rate limit. Each outcome
+is appended to a JSONL result log, so a rerun with the same log skips what
+was already imported and large files resume from their last acknowledged
+chunk.
+
+Manifest columns (CSV header or JSONL keys): title, description, language,
+category, release_rights, latitude, longitude, file, and optionally
+media_type. file paths are relative to the manifest. A row without a file is
+a text record whose description is uploaded as its content.
+
+In a folder, every media file becomes a record titled after its name; a
+.txt file with the same name supplies its description, and other .txt files
+become text records. Values missing from a row come from the command-line
+defaults.
+
+    python import_records.py visit-2025-03/manifest.csv --phone 9xxxxxxxxx
+    python import_records.py photos/ --language telugu --category "Festivals" \\
+        --release-rights creator --description "Sankranti at the village square"
+"""
+
+import argparse
+import csv
+import getpass
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import as_completed
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+import requests
+
+from config.settings import settings
+from utils.chunked_upload import ChunkUploadError, chunk_fields
+from utils.concurrency import session_executor
+from utils.deadline import timeout_for
+from utils.http_transport import create_session
+from utils.upload_journal import get_upload_journal, resumable_upload
+
+MEDIA_TYPES_BY_EXTENSION = {
+    "txt": "text",
+    "jpg": "image", "jpeg": "image", "png": "image", "gif": "image", "webp": "image",
+    "mp3": "audio", "wav": "audio", "ogg": "audio", "m4a": "audio",
+    "mp4": "video", "mov": "video", "avi": "video", "mkv": "video",
+    "pdf": "document", "doc": "document", "docx": "document",
+}
+
+CONTENT_TYPES = {
+    "txt": "text/plain", "jpg": "image/jpeg", "jpeg": "image/jpeg", "png": "image/png", "gif": "image/gif",
+    "webp": "image/webp", "mp3": "audio/mpeg", "wav": "audio/wav", "ogg": "audio/ogg", "m4a": "audio/mp4",
+    "mp4": "video/mp4", "mov": "video/quicktime", "avi": "video/x-msvideo", "mkv": "video/x-matroska",
+    "pdf": "application/pdf", "doc": "application/msword",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+MEDIA_TYPES = set(MEDIA_TYPES_BY_EXTENSION.values())
+
+# Same minimum the submit form enforces
+MIN_DESCRIPTION_LENGTH = 10
+
+DEFAULT_FIELDS = ("description", "language", "category", "release_rights", "latitude", "longitude")
+
+
+class RowError(ValueError):
+    """A manifest row that cannot be imported as written"""
+
+
+@dataclass
+class ImportRow:
+    """One validated record, ready to upload"""
+    key: str  # stable across reruns, used by the result log
+    source: str  # where the row came from, for messages
+    title: str
+    description: str
+    language: str
+    release_rights: str
+    category_id: str
+    media_type: str
+    path: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+    @property
+    def extension(self) -> str:
+        if self.path is None:
+            return "txt"
+        return os.path.splitext(self.path)[1].lstrip(".").lower()
+
+    @property
+    def filename(self) -> str:
+        """Upload filename derived from the title, as the submit form does"""
+        clean_title = "".join(c for c in self.title if c.isalnum() or c in (" ", "-", "_")).strip()
+        return f"{(clean_title or 'content')[:50]}.{self.extension}"
+
+
+def read_manifest(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield raw rows of a CSV or JSONL manifest, each tagged with its line number"""
+    if path.lower().endswith((".jsonl", ".ndjson")):
+        with open(path, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    yield {"_source": f"line {line_no}", "_error": f"invalid JSON: {e}"}
+                    continue
+                yield dict(row, _source=f"line {line_no}")
+    else:
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            for line_no, row in enumerate(csv.DictReader(f), 2):
+                yield dict({k.strip().lower(): v for k, v in row.items() if k}, _source=f"line {line_no}")
+
+
+def scan_folder(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield raw rows for the media files in a folder, pairing each with a same-named .txt description"""
+    files = []
+    for root, dirs, names in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        files.extend(os.path.join(root, n) for n in sorted(names) if not n.startswith("."))
+    stems_with_media = {os.path.splitext(f)[0] for f in files
+                        if MEDIA_TYPES_BY_EXTENSION.get(os.path.splitext(f)[1].lstrip(".").lower(), "text") != "text"}
+
+    for file_path in files:
+        stem, ext = os.path.splitext(file_path)
+        ext = ext.lstrip(".").lower()
+        if ext not in MEDIA_TYPES_BY_EXTENSION:
+            continue
+        relative = os.path.relpath(file_path, path)
+        title = os.path.basename(stem).replace("_", " ").replace("-", " ").strip()
+        if ext == "txt":
+            if stem in stems_with_media:
+                continue  # the description of a media file, not a record of its own
+            with open(file_path, encoding="utf-8") as f:
+                yield {"_source": relative, "title": title, "description": f.read().strip()}
+            continue
+        row = {"_source": relative, "title": title, "file": relative}
+        sidecar = f"{stem}.txt"
+        if os.path.exists(sidecar):
+            with open(sidecar, encoding="utf-8") as f:
+                row["description"] = f.read().strip()
+        yield row
+
+
+def _lookup(choice: str, mapping: Dict[str, str]) -> Optional[str]:
+    """API value for a form choice or an API value, matched case-insensitively"""
+    folded = choice.strip().casefold()
+    for label, value in mapping.items():
+        if folded in (label.casefold(), value.casefold()):
+            return value
+    return None
+
+
+def validate_row(raw: Dict[str, Any], defaults: Dict[str, Any], categories: Dict[str, str],
+                 base_dir: str) -> ImportRow:
+    """Check one raw row against the form's rules and return it ready to upload
+
+    Raises RowError listing every problem with the row.
+    """
+    if raw.get("_error"):
+        raise RowError(raw["_error"])
+
+    def value(name: str) -> str:
+        found = raw.get(name)
+        if found is None or str(found).strip() == "":
+            found = defaults.get(name)
+        return "" if found is None else str(found).strip()
+
+    problems = []
+    title = value("title")
+    if not title:
+        problems.append("title is required")
+
+    description = value("description")
+    if len(description) < MIN_DESCRIPTION_LENGTH:
+        problems.append(f"description must be at least {MIN_DESCRIPTION_LENGTH} characters long")
+
+    language = _lookup(value("language"), settings.LANGUAGE_MAPPING) if value("language") else None
+    if language is None:
+        problems.append(f"language {value('language')!r} is not one of: {', '.join(settings.LANGUAGE_MAPPING)}")
+
+    release_rights = _lookup(value("release_rights"), settings.RELEASE_RIGHTS_MAPPING) if value("release_rights") else None
+    if release_rights is None:
+        problems.append(f"release_rights {value('release_rights')!r} is not one of: "
+                        f"{', '.join(sorted(set(settings.RELEASE_RIGHTS_MAPPING.values())))}")
+
+    category = value("category")
+    category_id = categories.get(category.casefold()) if category else None
+    if category_id is None:
+        problems.append(f"category {category!r} does not exist" if category else "category is required")
+
+    path = None
+    if value("file"):
+        path = os.path.normpath(os.path.join(base_dir, value("file")))
+        if not os.path.isfile(path):
+            problems.append(f"file {value('file')!r} not found")
+    extension = os.path.splitext(path)[1].lstrip(".").lower() if path else "txt"
+    media_type = value("media_type").lower() or MEDIA_TYPES_BY_EXTENSION.get(extension, "")
+    if media_type not in MEDIA_TYPES:
+        problems.append(f"cannot tell the media type of {extension!r} files; set media_type")
+
+    latitude = longitude = None
+    if value("latitude") or value("longitude"):
+        try:
+            latitude, longitude = float(value("latitude")), float(value("longitude"))
+            if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+                problems.append("latitude/longitude out of range")
+        except ValueError:
+            problems.append("latitude and longitude must both be numbers")
+
+    if problems:
+        raise RowError("; ".join(problems))
+
+    key_source = os.path.relpath(path, base_dir) if path else f"{title}\n{description}"
+    return ImportRow(
+        key=hashlib.sha256(key_source.encode("utf-8")).hexdigest()[:16],
+        source=raw.get("_source", ""), title=title, description=description, language=language,
+        release_rights=release_rights, category_id=str(category_id), media_type=media_type,
+        path=path, latitude=latitude, longitude=longitude,
+    )
+
+
+class RateLimiter:
+    """Token bucket shared by all upload workers: at most rate requests per second"""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = max(1.0, float(burst if burst is not None else rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a request may be sent"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class ResultLog:
+    """Append-only JSONL of per-row outcomes; rows already imported are skipped on rerun"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def imported_keys(self) -> Set[str]:
+        """Keys of rows whose latest outcome is a successful import"""
+        latest: Dict[str, str] = {}
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # a line cut short by an interrupted run
+                    if entry.get("key"):
+                        latest[entry["key"]] = entry.get("status")
+        return {key for key, status in latest.items() if status == "imported"}
+
+    def write(self, **entry: Any) -> None:
+        entry["at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        line = json.dumps(entry, ensure_ascii=False)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class Importer:
+    """Uploads validated rows to the corpus API with one authenticated session"""
+
+    def __init__(self, api_url: str, token: str, user_id: str, limiter: RateLimiter, window: int = 1):
+        self.api_url = api_url
+        self.user_id = user_id
+        self.limiter = limiter
+        self.window = window
+        self.session = create_session()
+        self.session.headers["Authorization"] = f"Bearer {token}"
+
+    def _post(self, endpoint: str, data: Dict[str, Any], files=None) -> requests.Response:
+        self.limiter.acquire()
+        return self.session.post(f"{self.api_url}{endpoint}", data=data, files=files, timeout=timeout_for("upload"))
+
+    def import_row(self, row: ImportRow) -> Optional[str]:
+        """Upload one row's content, finalize its record and return the record uid"""
+        filename = row.filename
+        content_type = CONTENT_TYPES.get(row.extension, "application/octet-stream")
+
+        def send_chunk(upload_uuid: str, chunk_index: int, total_chunks: int, chunk: bytes):
+            response = self._post("/records/upload/chunk", chunk_fields(filename, chunk_index, total_chunks, upload_uuid),
+                                  files={"chunk": (filename, chunk, content_type)})
+            if response.status_code != 200:
+                raise ChunkUploadError(chunk_index=chunk_index, response=response)
+
+        if row.path:
+            with open(row.path, "rb") as f:
+                upload = resumable_upload(f, send_chunk, get_upload_journal(), self.user_id, filename,
+                                          window=self.window)
+        else:
+            upload = resumable_upload(BytesIO(row.description.encode("utf-8")), send_chunk, get_upload_journal(),
+                                      self.user_id, filename, window=self.window)
+
+        record_data = {
+            "title": row.title,
+            "description": row.description,
+            "category_id": row.category_id,
+            "user_id": self.user_id,
+            "media_type": row.media_type,
+            "upload_uuid": upload.upload_uuid,
+            "filename": filename,
+            "total_chunks": upload.total_chunks,
+            "release_rights": row.release_rights,
+            "language": row.language,
+            "use_uid_filename": False,
+        }
+        if row.latitude is not None:
+            record_data["latitude"] = row.latitude
+            record_data["longitude"] = row.longitude
+
+        response = self._post("/records/upload", record_data)
+        get_upload_journal().record_finalize(upload.upload_uuid, response.status_code)
+        if response.status_code != 201:
+            try:
+                detail = response.json().get("detail")
+            except ValueError:
+                detail = response.text[:200]
+            raise RowError(f"API Error ({response.status_code}): {detail}")
+        try:
+            return response.json().get("uid")
+        except ValueError:
+            return None
+
+
+def run_import(rows: List[ImportRow], importer: Importer, log: ResultLog, workers: int,
+               report: Callable[[str], None] = print) -> Dict[str, int]:
+    """Upload rows concurrently, logging each outcome; returns counts by outcome"""
+    counts = {"imported": 0, "failed": 0}
+    total = len(rows)
+
+    def upload(row: ImportRow) -> Optional[str]:
+        return importer.import_row(row)
+
+    with session_executor(max(1, workers), "bulk-import") as executor:
+        futures = {executor.submit(upload, row): row for row in rows}
+        for done, future in enumerate(as_completed(futures), 1):
+            row = futures[future]
+            try:
+                record_uid = future.result()
+            except ChunkUploadError as e:
+                error = f"chunk {(e.chunk_index or 0) + 1} failed"
+                if e.response is not None:
+                    error += f" (HTTP {e.response.status_code})"
+            except (RowError, requests.RequestException, OSError) as e:
+                error = str(e)
+            else:
+                counts["imported"] += 1
+                log.write(key=row.key, source=row.source, title=row.title, status="imported", record_uid=record_uid)
+                report(f"[{done}/{total}] ✅ {row.title} → {record_uid}")
+                continue
+            counts["failed"] += 1
+            log.write(key=row.key, source=row.source, title=row.title, status="failed", error=error)
+            report(f"[{done}/{total}] ❌ {row.title} ({row.source}): {error}")
+    return counts
+
+
+def _api_url(url: str) -> str:
+    url = url.rstrip("/")
+    return url if url.endswith("/api/v1") else f"{url}/api/v1"
+
+
+def _authenticate(api_url: str, args: argparse.Namespace) -> Dict[str, str]:
+    """Return {'token', 'user_id'} from --token or a phone/password login"""
+    session = create_session()
+    token = args.token or os.getenv("SWECHA_TOKEN")
+    if not token:
+        phone = args.phone or os.getenv("SWECHA_PHONE") or input("Phone number: ")
+        password = os.getenv("SWECHA_PASSWORD") or getpass.getpass("Password: ")
+        response = session.post(f"{api_url}/auth/login", json={"phone": phone, "password": password},
+                                timeout=timeout_for("auth"))
+        if response.status_code != 200:
+            raise SystemExit(f"❌ Login failed ({response.status_code}): {response.text[:200]}")
+        token = response.json()["access_token"]
+    response = session.get(f"{api_url}/auth/me", headers={"Authorization": f"Bearer {token}"},
+                           timeout=timeout_for("auth"))
+    if response.status_code != 200:
+        raise SystemExit(f"❌ Could not read the account for this token ({response.status_code})")
+    return {"token": token, "user_id": str(response.json()["id"])}
+
+
+def _category_index(api_url: str, token: str) -> Dict[str, str]:
+    """Case-insensitive name (and id) → id, fetched once for the whole run"""
+    response = create_session().get(f"{api_url}/categories/", headers={"Authorization": f"Bearer {token}"},
+                                    timeout=timeout_for("metadata"))
+    if response.status_code != 200:
+        return {}
+    index = {}
+    for category in response.json():
+        if category.get("id") is None:
+            continue
+        index[str(category["id"]).casefold()] = str(category["id"])
+        for label in (category.get("name"), category.get("title")):
+            if label:
+                index[str(label).casefold()] = str(category["id"])
+    return index
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk import records from a folder or a CSV/JSONL manifest")
+    parser.add_argument("source", help="folder of media files, or a .csv/.jsonl manifest")
+    parser.add_argument("--api-url", default=settings.API_BASE_URL, help="corpus API origin")
+    parser.add_argument("--phone", help="account phone number (or SWECHA_PHONE; password from SWECHA_PASSWORD or a prompt)")
+    parser.add_argument("--token", help="access token instead of logging in (or SWECHA_TOKEN)")
+    parser.add_argument("--log", help="result log (default: <source>.import-log.jsonl)")
+    parser.add_argument("--workers", type=int, default=4, help="records uploaded at once")
+    parser.add_argument("--window", type=int, default=1, help="chunks of one file in flight at once")
+    parser.add_argument("--rate", type=float, default=10.0, help="max API requests per second (0 = unlimited)")
+    parser.add_argument("--dry-run", action="store_true", help="validate rows without uploading")
+    defaults = parser.add_argument_group("defaults for values missing from a row")
+    for name in DEFAULT_FIELDS:
+        defaults.add_argument(f"--{name.replace('_', '-')}", dest=f"default_{name}")
+    args = parser.parse_args(argv)
+
+    source = os.path.abspath(args.source)
+    if os.path.isdir(source):
+        raw_rows, base_dir = list(scan_folder(source)), source
+    elif os.path.isfile(source):
+        raw_rows, base_dir = list(read_manifest(source)), os.path.dirname(source)
+    else:
+        parser.error(f"{args.source} is neither a folder nor a manifest file")
+    log = ResultLog(args.log or f"{source.rstrip(os.sep)}.import-log.jsonl")
+    row_defaults = {name: getattr(args, f"default_{name}") for name in DEFAULT_FIELDS}
+
+    api_url = _api_url(args.api_url)
+    auth = _authenticate(api_url, args)
+    categories = _category_index(api_url, auth["token"])
+    if not categories:
+        raise SystemExit("❌ Could not load categories from the API")
+
+    already_imported = log.imported_keys()
+    rows, invalid, skipped = [], 0, 0
+    for raw in raw_rows:
+        try:
+            row = validate_row(raw, row_defaults, categories, base_dir)
+        except RowError as e:
+            invalid += 1
+            print(f"⚠️  {raw.get('_source', '?')}: {e}")
+            if not args.dry_run:
+                log.write(key=None, source=raw.get("_source"), title=raw.get("title"), status="invalid", error=str(e))
+            continue
+        if row.key in already_imported:
+            skipped += 1
+            continue
+        rows.append(row)
+
+    print(f"📋 {len(rows)} to import, {skipped} already imported, {invalid} invalid")
+    if args.dry_run or not rows:
+        return 1 if invalid else 0
+
+    importer = Importer(api_url, auth["token"], auth["user_id"], RateLimiter(args.rate), window=args.window)
+    started = time.monotonic()
+    counts = run_import(rows, importer, log, args.workers)
+    print(f"🏁 Imported {counts['imported']}, failed {counts['failed']}, invalid {invalid} "
+          f"in {time.monotonic() - started:.1f}s; results in {log.path}")
+    return 1 if counts["failed"] or invalid else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
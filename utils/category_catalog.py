@@ -0,0 +1,209 @@
+"""
+Process-wide category catalog.
+
+Categories change rarely, yet every form render used to fetch them. The
+catalog keeps them in memory with a TTL, revalidates stale entries in the
+background while still serving them, persists a snapshot to disk so a fresh
+process starts warm, and keeps id/name indexes for O(1) lookups.
+
+The catalog is shared by every user of the process and refreshes on its
+own thread, so its fetcher must not depend on any one session: use
+api_category_fetcher, which talks to the API through the shared transport
+with no credential or a service token (CATEGORY_API_TOKEN), never a
+user's token or front-end helpers such as Streamlit's api_request.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from config.settings import settings
+from utils.circuit_breaker import get_breaker
+from utils.deadline import timeout_for
+from utils.http_transport import get_session
+
+logger = logging.getLogger(__name__)
+
+CategoryFetcher = Callable[[], Optional[List[Dict]]]
+
+# Listing endpoints, newest first; older deployments only serve /category/
+_CATEGORY_ENDPOINTS = ("/categories/", "/category/")
+
+
+def api_category_fetcher(api_url: str, token: Optional[str] = None) -> CategoryFetcher:
+    """Fetcher reading categories from api_url (with /api/v1) through the shared session
+
+    token defaults to CATEGORY_API_TOKEN (anonymous when unset); it is a
+    process-wide credential, never the token of whichever user is browsing.
+    """
+    token = token if token is not None else settings.CATEGORY_API_TOKEN
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+
+    def fetch() -> Optional[List[Dict]]:
+        for endpoint in _CATEGORY_ENDPOINTS:
+            breaker = get_breaker(endpoint)
+            if not breaker.allow_request():
+                continue
+            try:
+                response = breaker.call(lambda: get_session().get(
+                    f"{api_url.rstrip('/')}{endpoint}", headers=headers, timeout=timeout_for("metadata")))
+            except requests.RequestException as e:
+                logger.warning(f"Category fetch from {endpoint} failed: {e}")
+                continue
+            if response.status_code == 200:
+                try:
+                    categories = response.json()
+                except ValueError:
+                    continue
+                if isinstance(categories, list):
+                    return categories
+        return None
+    return fetch
+
+
+class CategoryCatalog:
+    """Cached category list with id→name and name→id indexes"""
+
+    def __init__(self, snapshot_path: Optional[str] = None, ttl: float = 600,
+                 max_stale: float = 86400, fetcher: Optional[CategoryFetcher] = None):
+        self.snapshot_path = snapshot_path
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._fetcher = fetcher
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._categories: List[Dict] = []
+        self._name_by_id: Dict[str, str] = {}
+        self._id_by_name: Dict[str, str] = {}
+        self._fetched_at = 0.0
+        self._load_snapshot()
+
+    def set_fetcher(self, fetcher: CategoryFetcher) -> None:
+        """Use fetcher for subsequent refreshes (e.g. one carrying a fresh token)"""
+        self._fetcher = fetcher
+
+    @property
+    def age(self) -> float:
+        """Seconds since the categories were last fetched from the API"""
+        return time.time() - self._fetched_at if self._fetched_at else float("inf")
+
+    def categories(self) -> List[Dict]:
+        """Return the categories, refreshing synchronously only when missing or too stale"""
+        age = self.age
+        if not self._categories or age > self.ttl + self.max_stale:
+            self.refresh()
+        elif age > self.ttl:
+            self._refresh_in_background()
+        return self._categories
+
+    def name_for(self, category_id: str, default: Optional[str] = None) -> Optional[str]:
+        """Return the category name for an id"""
+        if not self._categories:
+            self.categories()
+        return self._name_by_id.get(str(category_id), default)
+
+    def id_for(self, name: str) -> Optional[str]:
+        """Return the category id for a name"""
+        if not self._categories:
+            self.categories()
+        return self._id_by_name.get(name)
+
+    def id_by_name(self) -> Dict[str, str]:
+        """Return the name→id index (e.g. for select boxes)"""
+        if not self._categories:
+            self.categories()
+        return self._id_by_name
+
+    def name_by_id(self) -> Dict[str, str]:
+        """Return the id→name index (e.g. for labelling records in bulk)"""
+        if not self._categories:
+            self.categories()
+        return self._name_by_id
+
+    def refresh(self) -> bool:
+        """Fetch categories from the API; keeps serving the old ones on failure"""
+        if self._fetcher is None:
+            return False
+        # One refresh at a time; concurrent callers keep using what we already have
+        if not self._refresh_lock.acquire(blocking=not self._categories):
+            return False
+        try:
+            if self._categories and self.age <= self.ttl:
+                return True  # another caller refreshed while we waited
+            categories = self._fetcher()
+            if not categories:
+                return False
+            self._set(categories, time.time())
+            self._save_snapshot()
+            return True
+        except Exception as e:
+            logger.error(f"Category refresh failed: {e}")
+            return False
+        finally:
+            self._refresh_lock.release()
+
+    def _refresh_in_background(self) -> None:
+        """Stale-while-revalidate: refresh without blocking the caller"""
+        if self._refresh_lock.locked():
+            return
+        threading.Thread(target=self.refresh, daemon=True, name="category-refresh").start()
+
+    def _set(self, categories: List[Dict], fetched_at: float) -> None:
+        """Swap in a new category list and rebuild the indexes"""
+        valid = [c for c in categories if c.get("id") is not None and c.get("name")]
+        name_by_id = {str(c["id"]): c["name"] for c in valid}
+        id_by_name = {c["name"]: c["id"] for c in valid}
+        with self._lock:
+            self._categories = valid
+            self._name_by_id = name_by_id
+            self._id_by_name = id_by_name
+            self._fetched_at = fetched_at
+
+    def _load_snapshot(self) -> None:
+        """Load the on-disk snapshot written by a previous process"""
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            self._set(snapshot.get("categories", []), float(snapshot.get("fetched_at", 0)))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable category snapshot: {e}")
+
+    def _save_snapshot(self) -> None:
+        """Atomically write the current categories to disk"""
+        if not self.snapshot_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.snapshot_path), exist_ok=True)
+            tmp_path = f"{self.snapshot_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"fetched_at": self._fetched_at, "categories": self._categories}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            logger.warning(f"Could not write category snapshot: {e}")
+
+
+_catalog: Optional[CategoryCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_category_catalog(fetcher: Optional[CategoryFetcher] = None) -> CategoryCatalog:
+    """Return the process-wide catalog, loading its snapshot on first use"""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = CategoryCatalog(
+                    snapshot_path=os.path.join(settings.CACHE_DIR, "categories.json"),
+                    ttl=settings.CATEGORY_CACHE_TTL,
+                    max_stale=settings.CATEGORY_MAX_STALE,
+                )
+    if fetcher is not None:
+        _catalog.set_fetcher(fetcher)
+    return _catalog
@@ -0,0 +1,504 @@
+"""
+Chunked file upload for /records/upload/chunk.
+
+Files are read in slices and each slice is sent as one chunk of a single
+upload_uuid, so a large video never has to be held in memory as one
+multipart body or fit in one request timeout. Up to a window of chunks is
+in flight at once so high-latency links keep the uplink busy; each chunk is
+acknowledged individually and a failed chunk is retried on its own. The
+caller finalizes only once every chunk index has been acknowledged.
+
+Chunk sizes adapt to the link (ChunkSizer): each acknowledged chunk's
+request time gives a throughput estimate, and the next chunk is sized so
+that one request takes about UPLOAD_CHUNK_TARGET_SECONDS, within
+UPLOAD_CHUNK_MIN..UPLOAD_CHUNK_MAX. Fast links get few large requests and
+little per-request overhead; slow links get small chunks that are cheap to
+retry. As the number of chunks is therefore only known at the end, each
+chunk carries the current estimate of total_chunks and the result reports
+the exact count for the finalize call. The chosen sizes and throughput are
+recorded in the API metrics. A caller that passes chunk_size explicitly
+gets exactly that size for every chunk.
+
+The engine is transport agnostic: front ends pass a send_chunk callable
+that performs the actual request with their own api_request helper and
+raises ChunkUploadError on failure.
+
+Chunks are sliced without copying where the source allows it: a file on
+disk is memory-mapped and an in-memory upload (BytesIO, a Streamlit
+UploadedFile, a small spooled file) exposes its buffer, so each chunk is a
+memoryview into the same bytes. Together with the streaming multipart body
+in utils.http_transport no per-chunk copy is made on the way to the socket,
+whatever the size of the file.
+
+upload_stream covers sources that can only be read once, front to back,
+such as a request body being received, whose size is only bounded by its
+Content-Length.
+"""
+
+import io
+import math
+import mmap
+import os
+import tempfile
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+import requests
+
+from config.settings import settings
+from utils.concurrency import session_executor, submit_in_context
+from utils.deadline import DeadlineExceeded
+from utils.metrics import get_metrics
+
+# Adaptive chunk sizes are multiples of this
+SIZE_STEP = 64 * 1024
+# Weight of the latest chunk in the running throughput estimate
+THROUGHPUT_SMOOTHING = 0.5
+
+# Per-request throughput the last upload in this process settled on, to size the next one's first chunks
+_link_throughput: Optional[float] = None
+
+# Chunk payloads are bytes or zero-copy memoryview slices of the source
+ChunkData = Union[bytes, memoryview]
+# send_chunk(upload_uuid, chunk_index, total_chunks, data)
+SendChunk = Callable[[str, int, int, ChunkData], None]
+# on_progress(chunks_done, total_chunks)
+ProgressCallback = Callable[[int, int], None]
+# on_ack(chunk_index, offset, length)
+AckCallback = Callable[[int, int, int], None]
+# on_send(chunk_index), before a chunk index is sent for the first time
+SendCallback = Callable[[int], None]
+# {chunk_index: (offset, length)} of chunks the API already holds
+AckedChunks = Mapping[int, Tuple[int, int]]
+
+
+class ChunkUploadError(Exception):
+    """A chunk could not be uploaded"""
+
+    def __init__(self, message: str = "Failed to upload chunk", chunk_index: Optional[int] = None,
+                 response: Any = None):
+        super().__init__(message)
+        self.chunk_index = chunk_index
+        self.response = response
+
+
+@dataclass
+class UploadResult:
+    """What the finalize call (/records/upload) needs to know about the chunks sent"""
+    upload_uuid: str
+    total_chunks: int
+    total_bytes: int  # bytes sent by this attempt
+    resumed_chunks: int = 0  # chunks acknowledged by an earlier attempt and not resent
+    elapsed: float = 0.0  # seconds this attempt took
+    chunk_sizes: List[int] = field(default_factory=list)  # sizes sent by this attempt, in index order
+
+    @property
+    def throughput(self) -> float:
+        """Effective bytes per second of this attempt"""
+        return self.total_bytes / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def file_size(fileobj: BinaryIO) -> int:
+    """Size of a seekable file object in bytes, leaving its position unchanged"""
+    position = fileobj.tell()
+    try:
+        return fileobj.seek(0, os.SEEK_END)
+    finally:
+        fileobj.seek(position)
+
+
+def chunk_count(size: int, chunk_size: int) -> int:
+    """Number of chunks needed for size bytes (an empty file is still one chunk)"""
+    return max(1, math.ceil(size / chunk_size))
+
+
+class ChunkSizer:
+    """Chooses each chunk's size so that one chunk request takes about target_seconds
+
+    Throughput is an exponentially weighted average of what each acknowledged
+    chunk achieved in its successful request, so it reflects the share of the
+    link one request gets with the upload window in flight. A size may at
+    most double per chunk, so one lucky chunk cannot overshoot. The first
+    chunks are sized from the throughput the previous upload measured, or
+    from initial when this process has not uploaded yet. With adaptive off
+    every chunk has the initial size and nothing is learned from it.
+    """
+
+    def __init__(self, initial: int, min_size: Optional[int] = None, max_size: Optional[int] = None,
+                 target_seconds: Optional[float] = None, adaptive: Optional[bool] = None):
+        self.adaptive = settings.UPLOAD_ADAPTIVE if adaptive is None else adaptive
+        self.min_size = max(SIZE_STEP, min_size or settings.UPLOAD_CHUNK_MIN)
+        self.max_size = max(self.min_size, max_size or settings.UPLOAD_CHUNK_MAX)
+        self.target_seconds = target_seconds or settings.UPLOAD_CHUNK_TARGET_SECONDS
+        self.throughput: Optional[float] = None  # bytes per second per request
+        if not self.adaptive:
+            self.size = initial
+        elif _link_throughput:
+            self.size = self._bounded(_link_throughput * self.target_seconds)
+        else:
+            self.size = self._bounded(initial)
+
+    def _bounded(self, size: float) -> int:
+        size = min(self.max_size, max(self.min_size, int(size)))
+        return max(self.min_size, size - size % SIZE_STEP)
+
+    def observe(self, length: int, seconds: float) -> None:
+        """Feed the time one chunk of length bytes took to be acknowledged"""
+        if length < self.min_size or seconds <= 0:
+            return  # a short last chunk measures latency more than throughput
+        rate = length / seconds
+        if self.throughput is None:
+            self.throughput = rate
+        else:
+            self.throughput += THROUGHPUT_SMOOTHING * (rate - self.throughput)
+        if self.adaptive:
+            global _link_throughput
+            _link_throughput = self.throughput
+            self.size = self._bounded(min(self.throughput * self.target_seconds, self.size * 2))
+
+    def next_size(self) -> int:
+        """Size of the next chunk to read"""
+        return self.size
+
+
+def default_sizer(chunk_size: Optional[int] = None) -> ChunkSizer:
+    """Fixed sizes for an explicit chunk_size, sizes adapting from UPLOAD_CHUNK_SIZE otherwise"""
+    if chunk_size:
+        return ChunkSizer(chunk_size, adaptive=False)
+    return ChunkSizer(settings.UPLOAD_CHUNK_SIZE)
+
+
+def plan_chunks(size: int, acked: AckedChunks, sizer: ChunkSizer,
+                min_chunks: int = 0) -> Iterator[Tuple[int, int, int]]:
+    """Yield (index, offset, length) of every chunk still to send
+
+    Bytes between chunks an earlier attempt got acknowledged are split
+    evenly over the indices missing there, so every index still maps to one
+    contiguous range; after the last acknowledged chunk sizes come from
+    sizer, read at the moment each chunk is planned. At least min_chunks
+    indices are planned (chunks are shortened to stretch the rest of the
+    file over them), so every index an earlier attempt sent is overwritten
+    and the API holds no chunk beyond the new total.
+    """
+    index = offset = 0
+    for acked_index in sorted(acked):
+        acked_offset, acked_length = acked[acked_index]
+        missing = acked_index - index
+        for k in range(missing):
+            start = offset + (acked_offset - offset) * k // missing
+            end = offset + (acked_offset - offset) * (k + 1) // missing
+            yield index + k, start, end - start
+        index, offset = acked_index + 1, acked_offset + acked_length
+    # The API needs at least one chunk to finalize, even for an empty file
+    while offset < size or index < max(min_chunks, 1):
+        length = min(sizer.next_size(), size - offset)
+        if index < min_chunks:
+            length = min(length, -(-(size - offset) // (min_chunks - index)))
+        yield index, offset, length
+        index += 1
+        offset += length
+
+
+def record_chunk(length: int, seconds: float) -> None:
+    """Add one acknowledged chunk to the upload telemetry"""
+    if settings.METRICS_ENABLED:
+        get_metrics().observe_chunk(length, seconds)
+
+
+def record_upload(result: "UploadResult") -> None:
+    """Add one finished upload to the upload telemetry"""
+    if settings.METRICS_ENABLED and result.total_bytes:
+        get_metrics().observe_upload(result.total_bytes, result.elapsed)
+
+
+@contextmanager
+def file_buffer(fileobj: BinaryIO) -> Iterator[Optional[memoryview]]:
+    """Zero-copy view of all of fileobj's bytes, or None when it can only be read
+
+    In-memory files expose their buffer and files on disk are memory-mapped.
+    Slices of the view must not be written to the file while it is open.
+    """
+    if isinstance(fileobj, tempfile.SpooledTemporaryFile):
+        # Still in memory until it rolls over; asking for fileno() would force that
+        fileobj = getattr(fileobj, "_file", fileobj)
+    mapped = None
+    if isinstance(fileobj, io.BytesIO):
+        view = fileobj.getbuffer()
+    else:
+        try:
+            fileno = fileobj.fileno()
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            yield None
+            return
+        if file_size(fileobj) == 0:
+            yield None  # an empty file cannot be mapped
+            return
+        try:
+            mapped = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            yield None
+            return
+        view = memoryview(mapped)
+    try:
+        yield view
+    finally:
+        view.release()
+        if mapped is not None:
+            try:
+                mapped.close()
+            except BufferError:
+                pass  # a slice outlived the upload (e.g. in a traceback); the map closes when it is freed
+
+
+def read_full(stream: BinaryIO, size: int) -> bytes:
+    """Read size bytes from a stream that may return short reads; fewer only at its end"""
+    data = stream.read(size)
+    if not data or len(data) == size:
+        return data or b""
+    parts = [data]
+    remaining = size - len(data)
+    while remaining:
+        more = stream.read(remaining)
+        if not more:
+            break
+        parts.append(more)
+        remaining -= len(more)
+    return b"".join(parts)
+
+
+def chunk_fields(filename: str, chunk_index: int, total_chunks: int, upload_uuid: str) -> Dict[str, Any]:
+    """Form fields accompanying each chunk"""
+    return {
+        "filename": filename,
+        "chunk_index": chunk_index,
+        "total_chunks": total_chunks,
+        "upload_uuid": upload_uuid,
+    }
+
+
+def record_retry() -> None:
+    """Add one resent chunk to the upload telemetry"""
+    if settings.METRICS_ENABLED:
+        get_metrics().observe_chunk_retry()
+
+
+def send_with_retry(send_chunk: SendChunk, upload_uuid: str, chunk_index: int, total_chunks: int,
+                    data: ChunkData, max_attempts: int, backoff: float) -> Tuple[int, float]:
+    """Send one chunk, retrying just that chunk with exponential backoff
+
+    Returns its index and how long the successful attempt took.
+    """
+    for attempt in range(1, max_attempts + 1):
+        try:
+            start = time.perf_counter()
+            send_chunk(upload_uuid, chunk_index, total_chunks, data)
+            return chunk_index, time.perf_counter() - start
+        except DeadlineExceeded:
+            raise  # retrying cannot help once the time budget is spent
+        except (ChunkUploadError, requests.RequestException) as e:
+            if attempt == max_attempts:
+                if isinstance(e, ChunkUploadError):
+                    raise
+                raise ChunkUploadError(str(e), chunk_index=chunk_index) from e
+            time.sleep(backoff * 2 ** (attempt - 1))
+            record_retry()
+    raise ChunkUploadError(chunk_index=chunk_index)
+
+
+def send_windowed(chunks: Iterable[Tuple[int, int, ChunkData]], send_chunk: SendChunk, upload_uuid: str,
+                  window: int, max_attempts: int, backoff: float, ack: Callable[[int, float], None]) -> None:
+    """Send (index, total_chunks, data) items with up to window in flight, calling ack(index, seconds)
+
+    chunks is consumed on the calling thread and only while fewer than window
+    chunks are in flight, so a slow API slows the reading of the source down
+    rather than letting chunks pile up in memory; it also means each item is
+    produced after the acks of all but window - 1 earlier chunks.
+    """
+    if window == 1:
+        for index, total_chunks, data in chunks:
+            ack(*send_with_retry(send_chunk, upload_uuid, index, total_chunks, data, max_attempts, backoff))
+        return
+
+    in_flight: Dict[Future, int] = {}
+
+    def settle(futures: Iterable[Future]) -> None:
+        # Ack every chunk that got through before raising the first failure, so none goes unrecorded
+        error = None
+        for future in futures:
+            in_flight.pop(future)
+            try:
+                chunk_index, seconds = future.result()
+            except BaseException as e:
+                error = error or e
+                continue
+            ack(chunk_index, seconds)
+        if error is not None:
+            raise error
+
+    with session_executor(window, "chunk-upload") as executor:
+        try:
+            for index, total_chunks, data in chunks:
+                while len(in_flight) >= window:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    settle(done)
+                future = submit_in_context(executor, send_with_retry, send_chunk, upload_uuid,
+                                           index, total_chunks, data, max_attempts, backoff)
+                in_flight[future] = index
+            settle(list(in_flight))
+        except BaseException:
+            for future in in_flight:
+                future.cancel()
+            # Chunks already on their way still finish; record the ones that succeed
+            done, _ = wait(in_flight)
+            try:
+                settle(done)
+            except BaseException:
+                pass  # the first failure is the one to report
+            raise
+
+
+def upload_in_chunks(fileobj: BinaryIO, send_chunk: SendChunk, chunk_size: Optional[int] = None,
+                     upload_uuid: Optional[str] = None,
+                     on_progress: Optional[ProgressCallback] = None,
+                     window: Optional[int] = None, max_attempts: Optional[int] = None,
+                     skip: Optional[AckedChunks] = None, on_ack: Optional[AckCallback] = None,
+                     sizer: Optional[ChunkSizer] = None, sent_chunks: int = 0,
+                     on_send: Optional[SendCallback] = None) -> UploadResult:
+    """Send fileobj from its start as chunks of one upload_uuid, up to window at a time
+
+    Returns only once every chunk index has been acknowledged, so the result
+    can be finalized; raises ChunkUploadError if a chunk still fails after
+    max_attempts. skip holds the byte ranges of chunks acknowledged by an
+    earlier attempt, which are not resent, and sent_chunks how many chunk
+    indices it sent in all, acknowledged or not: the file is never planned
+    in fewer chunks, so none of those is left behind on the API. on_send is
+    called with each higher index before it is first sent, for the caller to
+    record as the new sent_chunks. Every chunk is chunk_size bytes
+    when it is given; otherwise sizer (by default an adaptive ChunkSizer
+    from the settings) picks each chunk's size. on_progress and on_ack are
+    always called from the calling thread.
+    """
+    sizer = sizer or default_sizer(chunk_size)
+    upload_uuid = upload_uuid or str(uuid.uuid4())
+    window = max(1, window or settings.UPLOAD_WINDOW)
+    max_attempts = max(1, max_attempts or settings.UPLOAD_CHUNK_ATTEMPTS)
+    backoff = settings.UPLOAD_RETRY_BACKOFF
+
+    fileobj.seek(0)
+    size = file_size(fileobj)
+    acked: Dict[int, Tuple[int, int]] = {i: r for i, r in (skip or {}).items() if 0 <= r[0] and sum(r) <= size}
+    resumed = len(acked)
+    last_index = max(acked, default=-1)
+    planned: Dict[int, Tuple[int, int]] = {}
+    estimate = max(last_index + 1, sent_chunks, 1)
+    result = UploadResult(upload_uuid=upload_uuid, total_chunks=0, total_bytes=0, resumed_chunks=resumed)
+    started = time.perf_counter()
+
+    def ack(chunk_index: int, seconds: float) -> None:
+        offset, length = planned.pop(chunk_index)
+        acked[chunk_index] = (offset, length)
+        result.total_bytes += length
+        sizer.observe(length, seconds)
+        record_chunk(length, seconds)
+        if on_ack:
+            on_ack(chunk_index, offset, length)
+        if on_progress:
+            on_progress(len(acked), max(estimate, len(acked)))
+
+    if resumed and on_progress:
+        on_progress(resumed, estimate)
+
+    # No more workers than chunks left at the starting size
+    window = max(1, min(window, chunk_count(size - sum(length for _, length in acked.values()), sizer.size)))
+    with file_buffer(fileobj) as buffer:
+        def chunks() -> Iterator[Tuple[int, int, ChunkData]]:
+            nonlocal estimate, last_index
+            for index, offset, length in plan_chunks(size, acked, sizer, min_chunks=sent_chunks):
+                planned[index] = (offset, length)
+                if on_send and index >= sent_chunks:
+                    on_send(index)
+                last_index = max(last_index, index)
+                remaining = size - offset - length
+                estimate = max(last_index + 1, sent_chunks,
+                               index + 1 + (math.ceil(remaining / sizer.size) if remaining else 0))
+                result.chunk_sizes.append(length)
+                if buffer is not None:
+                    data = buffer[offset:offset + length]
+                else:
+                    fileobj.seek(offset)
+                    data = read_full(fileobj, length)
+                yield index, estimate, data
+
+        send_windowed(chunks(), send_chunk, upload_uuid, window, max_attempts, backoff, ack)
+
+    result.total_chunks = last_index + 1
+    missing = set(range(result.total_chunks)) - set(acked)
+    if missing:
+        raise ChunkUploadError(f"Chunks {sorted(missing)} were not acknowledged", chunk_index=min(missing))
+    result.elapsed = time.perf_counter() - started
+    record_upload(result)
+    return result
+
+
+def upload_stream(stream: BinaryIO, send_chunk: SendChunk, size_hint: int, chunk_size: Optional[int] = None,
+                  upload_uuid: Optional[str] = None, on_progress: Optional[ProgressCallback] = None,
+                  window: Optional[int] = None, max_attempts: Optional[int] = None,
+                  sizer: Optional[ChunkSizer] = None) -> UploadResult:
+    """Send a read-once stream as chunks of one upload_uuid, reading it strictly front to back
+
+    size_hint is an upper bound on the stream's length (e.g. the request's
+    Content-Length) used to estimate total_chunks; the returned total_chunks
+    is the exact count to finalize with. At most window chunks plus the one
+    being read are held in memory at any time. Chunk sizes are chosen as in
+    upload_in_chunks.
+    """
+    sizer = sizer or default_sizer(chunk_size)
+    upload_uuid = upload_uuid or str(uuid.uuid4())
+    window = max(1, window or settings.UPLOAD_WINDOW)
+    max_attempts = max(1, max_attempts or settings.UPLOAD_CHUNK_ATTEMPTS)
+    acked = 0
+    read = 0
+    estimate = 1
+    result = UploadResult(upload_uuid=upload_uuid, total_chunks=0, total_bytes=0)
+    lengths: Dict[int, int] = {}
+    started = time.perf_counter()
+
+    def chunks() -> Iterator[Tuple[int, int, ChunkData]]:
+        nonlocal read, estimate
+        index = 0
+        while True:
+            size = sizer.next_size()
+            data = read_full(stream, size)
+            if not data and index:
+                return
+            read += len(data)
+            lengths[index] = len(data)
+            result.chunk_sizes.append(len(data))
+            result.total_chunks = index + 1
+            remaining = max(0, size_hint - read) if len(data) == size else 0
+            estimate = index + 1 + (math.ceil(remaining / sizer.size) if remaining else 0)
+            yield index, estimate, data
+            if len(data) < size:
+                return
+            index += 1
+
+    def ack(chunk_index: int, seconds: float) -> None:
+        nonlocal acked
+        length = lengths.pop(chunk_index)
+        acked += 1
+        result.total_bytes += length
+        sizer.observe(length, seconds)
+        record_chunk(length, seconds)
+        if on_progress:
+            on_progress(acked, max(estimate, acked))
+
+    send_windowed(chunks(), send_chunk, upload_uuid, window, max_attempts, settings.UPLOAD_RETRY_BACKOFF, ack)
+    if acked != result.total_chunks:
+        raise ChunkUploadError("Not every chunk was acknowledged", chunk_index=acked)
+    result.elapsed = time.perf_counter() - started
+    record_upload(result)
+    return result
@@ -0,0 +1,128 @@
+"""
+Circuit breakers for the corpus API, one per endpoint group.
+
+When the API is down every call would otherwise wait out its full timeout
+on every rerun. A breaker opens after consecutive failures, fails fast
+while open, and lets a single probe through (half-open) once the reset
+timeout has passed; the probe's outcome closes or re-opens it. Timeouts
+caused by the caller's own deadline say nothing about the upstream and are
+not counted.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict
+
+from config.settings import settings
+from utils.deadline import budget_exhausted
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe"""
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        """Current state: closed, open or half_open"""
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def allow_request(self) -> bool:
+        """Return True if a call may go upstream now"""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            # Reset timeout elapsed: let exactly one probe through
+            if self._probe_in_flight:
+                return False
+            self._state = HALF_OPEN
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        """The upstream answered; close the circuit"""
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """The upstream failed or timed out; open the circuit once over the threshold"""
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """The call ended without telling us anything about the upstream; count it neither way"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def call(self, fn: Callable[[], Any],
+             is_failure: Callable[[Any], bool] = lambda response: response.status_code >= 500) -> Any:
+        """Run fn() and record its outcome; exceptions count as failures (except budget timeouts) and are re-raised"""
+        try:
+            result = fn()
+        except Exception as e:
+            if budget_exhausted(e):
+                self.release_probe()
+            else:
+                self.record_failure()
+            raise
+        if is_failure(result):
+            self.record_failure()
+        else:
+            self.record_success()
+        return result
+
+
+def endpoint_group(endpoint: str) -> str:
+    """Map an endpoint path to its group, e.g. '/users/42/contributions' -> 'users'"""
+    path = endpoint.split("?", 1)[0]
+    if "/api/v1/" in path:
+        path = path.split("/api/v1/", 1)[1]
+    segments = [s for s in path.split("/") if s]
+    return segments[0] if segments else "root"
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(endpoint: str) -> CircuitBreaker:
+    """Return the shared breaker for the endpoint's group"""
+    group = endpoint_group(endpoint)
+    with _breakers_lock:
+        breaker = _breakers.get(group)
+        if breaker is None:
+            breaker = _breakers[group] = CircuitBreaker(
+                group,
+                failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+                reset_timeout=settings.CIRCUIT_RESET_TIMEOUT,
+            )
+        return breaker
+
+
+def all_breakers() -> Dict[str, CircuitBreaker]:
+    """Return every breaker created so far, keyed by group"""
+    with _breakers_lock:
+        return dict(_breakers)
@@ -0,0 +1,65 @@
+"""
+Helpers for running independent API calls concurrently.
+"""
+
+import contextvars
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _script_run_ctx():
+    """Return the current Streamlit script context, if running under Streamlit"""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    return get_script_run_ctx(suppress_warning=True)
+
+
+def _attach_script_run_ctx(ctx) -> None:
+    """Let a worker thread call st.* on behalf of the session that spawned it"""
+    if ctx is None:
+        return
+    from streamlit.runtime.scriptrunner import add_script_run_ctx
+    add_script_run_ctx(ctx=ctx)
+
+
+def session_executor(max_workers: int, thread_name_prefix: str) -> ThreadPoolExecutor:
+    """Thread pool whose workers may call st.* for the Streamlit session that created it"""
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix,
+                              initializer=_attach_script_run_ctx, initargs=(_script_run_ctx(),))
+
+
+def submit_in_context(executor: ThreadPoolExecutor, fn: Callable[..., Any], *args: Any) -> Future:
+    """Submit fn(*args) to run in a copy of the caller's context (deadline, request-scoped state)"""
+    return executor.submit(contextvars.copy_context().run, fn, *args)
+
+
+def fan_out(func: Callable[[Any], Any], items: Iterable[Hashable],
+            max_workers: Optional[int] = None) -> Dict[Hashable, Any]:
+    """Call func(item) for every item concurrently and return {item: result}
+
+    A call that raises yields None for its item, so one slow or failing
+    request never hides the results of the others.
+    """
+    items = list(dict.fromkeys(items))
+    if not items:
+        return {}
+
+    workers = min(max_workers or settings.API_FANOUT_MAX_WORKERS, len(items))
+
+    def run(item):
+        try:
+            return func(item)
+        except Exception as e:
+            logger.error(f"Concurrent call for {item!r} failed: {e}")
+            return None
+
+    with session_executor(workers, "api-fanout") as executor:
+        futures = {item: submit_in_context(executor, run, item) for item in items}
+        return {item: future.result() for item, future in futures.items()}
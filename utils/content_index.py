@@ -0,0 +1,122 @@
+"""
+Local index of uploaded content by SHA-256, for spotting resubmissions.
+
+Contributors often submit the same photo or recording more than once. Before
+a file is uploaded its SHA-256 is computed in a single streaming pass and
+looked up here; a hit names the record the same user already created from
+those exact bytes, so the upload can be skipped in favour of that record.
+Successful submissions are added to the index with the uid the API returned.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, Optional
+
+from config.settings import settings
+
+# Bytes read per step while hashing, so large videos are never held in memory
+HASH_READ_SIZE = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS content_hashes (
+    owner TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    record_uid TEXT NOT NULL,
+    filename TEXT,
+    title TEXT,
+    size INTEGER,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (owner, sha256)
+);
+CREATE INDEX IF NOT EXISTS content_hashes_by_record ON content_hashes (record_uid);
+"""
+
+
+def sha256_of(fileobj: BinaryIO, read_size: int = HASH_READ_SIZE) -> str:
+    """Hex SHA-256 of a seekable file, read in fixed-size steps; its position is left unchanged"""
+    position = fileobj.tell()
+    try:
+        fileobj.seek(0)
+        digest = hashlib.sha256()
+        while True:
+            block = fileobj.read(read_size)
+            if not block:
+                return digest.hexdigest()
+            digest.update(block)
+    finally:
+        fileobj.seek(position)
+
+
+@dataclass
+class IndexedContent:
+    """A record previously created from the same bytes"""
+    record_uid: str
+    filename: Optional[str]
+    title: Optional[str]
+    size: Optional[int]
+    created_at: float
+
+
+class ContentIndex:
+    """SQLite map of (user, content SHA-256) to the record created from it"""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def lookup(self, owner: str, sha256: str) -> Optional[IndexedContent]:
+        """Record this owner already created from content with this hash, if any"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT record_uid, filename, title, size, created_at FROM content_hashes"
+                " WHERE owner = ? AND sha256 = ?",
+                (owner, sha256),
+            ).fetchone()
+        return IndexedContent(*row) if row else None
+
+    def add(self, owner: str, sha256: str, record_uid: str, filename: Optional[str] = None,
+            title: Optional[str] = None, size: Optional[int] = None) -> None:
+        """Remember that record_uid was created from content with this hash"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO content_hashes"
+                " (owner, sha256, record_uid, filename, title, size, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (owner, sha256, record_uid, filename, title, size, time.time()),
+            )
+
+    def forget_record(self, record_uid: str) -> None:
+        """Drop index entries for a record that no longer exists"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM content_hashes WHERE record_uid = ?", (record_uid,))
+
+
+_index: Optional[ContentIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_content_index() -> ContentIndex:
+    """Return the process-wide content-hash index"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = ContentIndex(settings.CONTENT_INDEX_PATH)
+    return _index
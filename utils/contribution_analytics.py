@@ -0,0 +1,175 @@
+"""
+Columnar analytics over contributions and records.
+
+Records arrive in two shapes: API records and contributions (title,
+language, media_type, category_id and created_at/timestamp at the top level)
+and the older game contributions (game_name, region and category under
+metadata). contributions_frame reads each record once into a DataFrame with
+one column per field. language, media_type, region and category are
+categoricals, and created_at is a UTC datetime. Statistics, top-N lists and
+time buckets are then group-bys over those columns, rather than a Python
+pass over the dicts for every figure. mirror_frame builds the same frame
+straight from the record mirror's columns, skipping the JSON.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from utils.record_mirror import RecordMirror
+
+# Media types the API accepts, in display order
+MEDIA_TYPES = ("text", "audio", "video", "image", "document")
+
+FRAME_COLUMNS = ("uid", "title", "language", "media_type", "region", "category", "category_id",
+                 "user_id", "status", "has_file", "created_at")
+
+CATEGORICAL_COLUMNS = ("language", "media_type", "region", "category")
+
+# Mirror columns read by mirror_frame, in FRAME_COLUMNS order minus region, category and has_file
+_MIRROR_COLUMNS = ("uid", "title", "language", "media_type", "category_id", "user_id", "status", "created_at")
+
+
+# Each column is read from all records in one comprehension: (records, their metadata) -> raw values.
+# category holds only names carried in metadata here; the rest come from category ids afterwards.
+_READERS: Dict[str, Callable[[List[Dict], List[Dict]], list]] = {
+    "uid": lambda records, metadata: [r.get("uid") or r.get("id") for r in records],
+    "title": lambda records, metadata: [r.get("title") or m.get("game_name") for r, m in zip(records, metadata)],
+    "language": lambda records, metadata: [r.get("language") or m.get("language") for r, m in zip(records, metadata)],
+    "media_type": lambda records, metadata: [r.get("media_type") or r.get("type") for r in records],
+    "region": lambda records, metadata: [m.get("region") or r.get("region") for r, m in zip(records, metadata)],
+    "category": lambda records, metadata: [m.get("category") for m in metadata],
+    "category_id": lambda records, metadata: [r.get("category_id") for r in records],
+    "user_id": lambda records, metadata: [r.get("user_id") for r in records],
+    "status": lambda records, metadata: [r.get("status") for r in records],
+    "has_file": lambda records, metadata: [bool(r.get("file_ids") or r.get("file_url") or r.get("file_name"))
+                                           for r in records],
+    "created_at": lambda records, metadata: [r.get("created_at") or r.get("timestamp") or m.get("created_at")
+                                             for r, m in zip(records, metadata)],
+}
+
+
+def _ids(values: Sequence) -> np.ndarray:
+    # Ids arrive as ints or strings; compare them as strings, converting each distinct id once
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+    return np.array([str(value) for value in uniques] + [None], dtype=object)[codes]
+
+
+def _categorical(values: Sequence, leading: Sequence[str] = ()) -> pd.Categorical:
+    # Categories in order of first appearance (after any leading ones), so ties in top_n keep record order
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+    categorical = pd.Categorical.from_codes(codes, categories=uniques)
+    if leading:
+        categorical = categorical.add_categories([value for value in leading if value not in set(uniques)])
+        categorical = categorical.reorder_categories(
+            list(leading) + [value for value in uniques if value not in leading])
+    return categorical
+
+
+def _column(name: str, values: Sequence) -> Any:
+    """Values of one FRAME_COLUMNS column in its typed form"""
+    if name in ("category_id", "user_id"):
+        return _ids(values)
+    if name in CATEGORICAL_COLUMNS:
+        return _categorical(values, MEDIA_TYPES if name == "media_type" else ())
+    if name == "has_file":
+        return pd.array(values, dtype="boolean")
+    if name == "created_at":
+        return pd.to_datetime(pd.Series(values, dtype=object), utc=True, errors="coerce", format="ISO8601")
+    return np.asarray(values, dtype=object)
+
+
+def _frame(columns: Dict[str, Sequence], category_ids: Optional[Sequence],
+           category_names: Optional[Mapping[Any, str]]) -> pd.DataFrame:
+    if "category" in columns and category_ids is not None and category_names:
+        # Names carried by the records win; the rest are looked up by category id
+        names = {str(k): v for k, v in category_names.items()}
+        columns["category"] = [name if name is not None else names.get(category_id)
+                               for name, category_id in zip(columns["category"], _ids(category_ids))]
+    return pd.DataFrame({name: _column(name, values) for name, values in columns.items()}, copy=False)
+
+
+def contributions_frame(records: Iterable[Dict], category_names: Optional[Mapping[Any, str]] = None,
+                        columns: Sequence[str] = FRAME_COLUMNS) -> pd.DataFrame:
+    """Typed frame of records in either shape, with the given FRAME_COLUMNS
+
+    Category names come from category_names by category id, unless a
+    record carries its own under metadata.
+    """
+    unknown = set(columns) - set(FRAME_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown contribution columns: {', '.join(sorted(unknown))}")
+    records = list(records)
+    metadata = [r.get("metadata") or {} for r in records]
+    category_ids = _READERS["category_id"](records, metadata) if "category" in columns and category_names else None
+    return _frame({name: _READERS[name](records, metadata) for name in columns}, category_ids, category_names)
+
+
+def mirror_frame(mirror: RecordMirror, category_names: Optional[Mapping[Any, str]] = None,
+                 **filters) -> pd.DataFrame:
+    """Typed frame of the mirrored records matching filters (region and has_file are unknown there)"""
+    rows = mirror.columns(*_MIRROR_COLUMNS, **filters)
+    columns = dict(zip(_MIRROR_COLUMNS, map(list, zip(*rows)))) if rows else {name: [] for name in _MIRROR_COLUMNS}
+    count = len(rows)
+    columns.update(region=[None] * count, category=[None] * count, has_file=[None] * count)
+    return _frame({name: columns[name] for name in FRAME_COLUMNS}, columns["category_id"], category_names)
+
+
+def user_contributions_frame(body: Dict, category_names: Optional[Mapping[Any, str]] = None) -> pd.DataFrame:
+    """Typed frame of a /users/{id}/contributions response, whose entries carry their media type only in the list name"""
+    records = [dict(entry, media_type=media_type)
+               for media_type in MEDIA_TYPES for entry in body.get(f"{media_type}_contributions") or []]
+    return contributions_frame(records, category_names)
+
+
+def top_n(frame: pd.DataFrame, column: str, n: int = 5, missing: Optional[str] = None) -> Dict[str, int]:
+    """The n most frequent values of column with their counts; with missing, absent values count under that label
+
+    Equal counts keep the order the values first appear in.
+    """
+    values = frame[column]
+    if missing is not None and values.isna().any():
+        values = values.astype(object).fillna(missing)
+    counts = values.value_counts(sort=False)
+    counts = counts[counts > 0].sort_values(ascending=False, kind="stable")
+    return {str(value): int(count) for value, count in counts.head(n).items()}
+
+
+def counts_by_media_type(frame: pd.DataFrame) -> Dict[str, int]:
+    """Record count for every media type, zero included"""
+    counts = frame["media_type"].value_counts(sort=False)
+    return {media_type: int(counts.get(media_type, 0)) for media_type in MEDIA_TYPES}
+
+
+def summary(frame: pd.DataFrame) -> Dict[str, Any]:
+    """Headline figures: totals, distinct values and counts by media type"""
+    return {
+        "total": len(frame),
+        "languages": int(frame["language"].nunique()),
+        "regions": int(frame["region"].nunique()),
+        "categories": int(frame["category"].nunique()),
+        "with_files": int(frame["has_file"].sum()),
+        "by_media_type": counts_by_media_type(frame),
+    }
+
+
+def time_buckets(frame: pd.DataFrame, freq: str = "W", by: Optional[str] = None) -> pd.DataFrame:
+    """Records created per period (a pandas period frequency such as "D", "W" or "M"), one column per value of by
+
+    Rows are indexed by the start of each period (UTC). Periods with nothing
+    created are included with zero counts; records without a creation time
+    are left out.
+    """
+    dated = frame[frame["created_at"].notna()]
+    periods = dated["created_at"].dt.tz_convert(None).dt.to_period(freq)
+    if by is None:
+        counts = dated.groupby(periods).size().to_frame("count")
+    else:
+        counts = dated.groupby([periods, dated[by]], observed=True).size().unstack(fill_value=0)
+        counts.columns = counts.columns.astype(str)
+    if not len(counts):
+        return pd.DataFrame(index=pd.DatetimeIndex([], name="period"), columns=counts.columns, dtype="int64")
+    counts = counts.reindex(pd.period_range(counts.index.min(), counts.index.max(), freq=freq), fill_value=0)
+    counts.index = counts.index.to_timestamp().rename("period")
+    return counts
@@ -0,0 +1,118 @@
+"""
+Deadline propagation for page renders and Flask requests.
+
+Each render or request runs inside a deadline scope with a total time
+budget. Every API call derives its connect/read timeouts from its timeout
+class (metadata, auth or upload) capped by the budget that is left, and
+optional widgets can check has_budget() to skip themselves once it runs out.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Iterator, Optional, Tuple
+
+import requests
+
+from config.settings import settings
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """Raised when a call would start after the current budget is spent"""
+
+
+class Deadline:
+    """Absolute point in time by which the current unit of work must finish"""
+
+    def __init__(self, budget: float):
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget
+
+    def remaining(self) -> float:
+        """Seconds left, never negative"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+_current: ContextVar[Optional[Deadline]] = ContextVar("api_deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Return the deadline of the enclosing scope, if any"""
+    return _current.get()
+
+
+def start_deadline(budget: float, inherit: bool = True) -> Token:
+    """Start a deadline scope; with inherit, it never outlives an enclosing one"""
+    deadline = Deadline(budget)
+    parent = _current.get()
+    if inherit and parent is not None and parent.expires_at < deadline.expires_at:
+        deadline = parent
+    return _current.set(deadline)
+
+
+def end_deadline(token: Token) -> None:
+    """Restore the deadline that was active before start_deadline()"""
+    _current.reset(token)
+
+
+@contextmanager
+def deadline_scope(budget: float, inherit: bool = True) -> Iterator[Deadline]:
+    """Run the enclosed block under a total time budget"""
+    token = start_deadline(budget, inherit)
+    try:
+        yield _current.get()
+    finally:
+        end_deadline(token)
+
+
+def has_budget(min_remaining: Optional[float] = None) -> bool:
+    """Return False once less than min_remaining seconds are left"""
+    deadline = _current.get()
+    if deadline is None:
+        return True
+    if min_remaining is None:
+        min_remaining = settings.OPTIONAL_WIDGET_MIN_BUDGET
+    return deadline.remaining() >= min_remaining
+
+
+def budget_exhausted(error: BaseException) -> bool:
+    """Whether error is a timeout caused by the caller's budget running out rather than a slow upstream
+
+    True for DeadlineExceeded, and for any timeout that fired once the
+    current deadline had expired, i.e. one cut short by timeout_for's cap.
+    """
+    if isinstance(error, DeadlineExceeded):
+        return True
+    deadline = _current.get()
+    return isinstance(error, requests.exceptions.Timeout) and deadline is not None and deadline.expired
+
+
+def timeout_class_for(endpoint: str, upload: bool = False) -> str:
+    """Pick the timeout class for a call: upload, auth or metadata"""
+    if upload:
+        return "upload"
+    if endpoint.lstrip("/").split("/", 1)[0] == "auth" or "/auth/" in endpoint:
+        return "auth"
+    return "metadata"
+
+
+def timeout_for(timeout_class: str) -> Tuple[float, float]:
+    """Return (connect, read) timeouts for the class, capped by the remaining budget"""
+    read_timeouts = {
+        "metadata": settings.API_METADATA_TIMEOUT,
+        "auth": settings.API_AUTH_TIMEOUT,
+        "upload": settings.API_UPLOAD_TIMEOUT,
+    }
+    connect, read = settings.API_CONNECT_TIMEOUT, read_timeouts[timeout_class]
+
+    deadline = _current.get()
+    if deadline is None:
+        return connect, read
+    remaining = deadline.remaining()
+    if remaining <= 0:
+        raise DeadlineExceeded(f"No time budget left for this {timeout_class} call")
+    return min(connect, remaining), min(read, remaining)
@@ -4,6 +4,9 @@ from typing import List, Dict, Any
 import math
 from datetime import datetime
 
+from utils.contribution_analytics import contributions_frame, top_n
+from utils.text_search import normalize_text
+
 def validate_email(email: str) -> bool:
     """Validate email format"""
     pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
@@ -62,13 +65,13 @@ def filter_contributions(contributions: List[Dict], filters: Dict[str, Any]) ->
         filtered = [c for c in filtered 
                    if c.get('metadata', {}).get('category') == filters['category']]
     
-    # Filter by search term
+    # Filter by search term (a substring of the name, description or rules), compared
+    # in the search index's normalised form so Indic spelling variants match
     if filters.get('search_term'):
-        search_lower = filters['search_term'].lower()
-        filtered = [c for c in filtered if (
-            search_lower in c.get('metadata', {}).get('game_name', '').lower() or
-            search_lower in c.get('metadata', {}).get('description', '').lower() or
-            search_lower in c.get('metadata', {}).get('rules', '').lower()
+        search_term = normalize_text(filters['search_term'])
+        filtered = [c for c in filtered if any(
+            search_term in normalize_text(c.get('metadata', {}).get(field, ''))
+            for field in ('game_name', 'description', 'rules')
         )]
     
     return filtered
@@ -100,26 +103,15 @@ def generate_game_stats(contributions: List[Dict]) -> Dict[str, Any]:
     if not contributions:
         return {}
     
-    stats = {
-        'total_games': len(contributions),
-        'regions': len(set(c.get('metadata', {}).get('region', 'Unknown') 
-                          for c in contributions)),
-        'categories': len(set(c.get('metadata', {}).get('category', 'Unknown') 
-                             for c in contributions)),
-        'with_files': sum(1 for c in contributions if c.get('file_ids')),
-        'top_regions': {},
-        'top_categories': {}
+    frame = contributions_frame(contributions, columns=('region', 'category', 'has_file'))
+    return {
+        'total_games': len(frame),
+        'regions': int(frame['region'].nunique(dropna=False)),
+        'categories': int(frame['category'].nunique(dropna=False)),
+        'with_files': int(frame['has_file'].sum()),
+        'top_regions': top_n(frame, 'region', 5, missing='Unknown'),
+        'top_categories': top_n(frame, 'category', 5, missing='Unknown')
     }
-    
-    # Calculate top regions and categories
-    regions = [c.get('metadata', {}).get('region', 'Unknown') for c in contributions]
-    categories = [c.get('metadata', {}).get('category', 'Unknown') for c in contributions]
-    
-    from collections import Counter
-    stats['top_regions'] = dict(Counter(regions).most_common(5))
-    stats['top_categories'] = dict(Counter(categories).most_common(5))
-    
-    return stats
 
 def validate_file_upload(uploaded_file, max_size_mb: int = 10) -> tuple[bool, str]:
     """Validate uploaded file"""
@@ -0,0 +1,241 @@
+"""
+Shared HTTP transport for talking to the corpus API.
+
+Every front end (Streamlit app, Flask apps and SwechaAPIClient) goes through
+sessions built here so that they all draw from one keep-alive connection
+pool per host instead of opening a fresh TCP + TLS connection per call.
+Those sessions also record per-endpoint metrics for every call.
+
+Multipart uploads whose file parts are in memory (chunk uploads) are sent as
+a MultipartBody: the part headers are encoded separately and the payloads
+are handed to the socket as they are, instead of being copied into one
+joined request body. Callers keep using files=... as usual.
+"""
+
+import threading
+import time
+import uuid
+from collections.abc import Mapping
+from http.cookiejar import DefaultCookiePolicy
+from typing import Any, Iterator, List, Optional, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.exceptions import MaxRetryError
+from urllib3.util.retry import Retry
+
+from config.settings import settings
+from utils.metrics import get_metrics
+
+_lock = threading.RLock()
+_adapter: Optional[HTTPAdapter] = None
+_session: Optional[requests.Session] = None
+_warmed_hosts = set()
+
+
+def _build_adapter() -> HTTPAdapter:
+    """Create the pooled adapter shared by every session"""
+    retries = Retry(
+        total=settings.HTTP_MAX_RETRIES,
+        connect=settings.HTTP_MAX_RETRIES,
+        read=0,
+        status=0,
+        backoff_factor=0.2,
+        allowed_methods=None,
+    )
+    return HTTPAdapter(
+        pool_connections=settings.HTTP_POOL_CONNECTIONS,
+        pool_maxsize=settings.HTTP_POOL_MAXSIZE,
+        pool_block=False,
+        max_retries=retries,
+    )
+
+
+def _body_size(request: requests.PreparedRequest) -> int:
+    """Size of a prepared request body without consuming streamed bodies"""
+    body = request.body
+    if isinstance(body, bytes):
+        return len(body)
+    if isinstance(body, str):
+        return len(body.encode("utf-8"))
+    return int(request.headers.get("Content-Length") or 0)
+
+
+class MultipartBody:
+    """multipart/form-data body sent part by part, with file payloads never copied
+
+    requests sends any iterable with a length as a streamed body with a
+    Content-Length; iterating again (for a connection retry) starts over.
+    """
+
+    def __init__(self, fields: Any, files: Mapping):
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self._parts: List[Union[bytes, memoryview]] = []
+        pending = b""
+        for name, value in self._field_items(fields):
+            pending += self._part_header(name) + str(value).encode("utf-8") + b"\r\n"
+        for name, spec in files.items():
+            filename, payload = spec[0], spec[1]
+            content_type = spec[2] if len(spec) > 2 and spec[2] else "application/octet-stream"
+            pending += self._part_header(name, filename, content_type)
+            self._parts += [pending, memoryview(payload).cast("B")]
+            pending = b"\r\n"
+        self._parts.append(pending + f"--{self.boundary}--\r\n".encode())
+        self._length = sum(len(part) for part in self._parts)
+
+    @staticmethod
+    def supports(files: Any) -> bool:
+        """Whether every file in a requests files= mapping is an in-memory buffer"""
+        return isinstance(files, Mapping) and bool(files) and all(
+            isinstance(spec, tuple) and len(spec) >= 2 and isinstance(spec[1], (bytes, bytearray, memoryview))
+            for spec in files.values()
+        )
+
+    @staticmethod
+    def _field_items(fields: Any) -> Iterator[tuple]:
+        items = fields.items() if isinstance(fields, Mapping) else (fields or ())
+        for name, value in items:
+            if value is None:
+                continue  # requests leaves these out too
+            for item in value if isinstance(value, (list, tuple)) else (value,):
+                yield name, item
+
+    def _part_header(self, name: str, filename: Optional[str] = None, content_type: Optional[str] = None) -> bytes:
+        disposition = f'form-data; name="{_quote(name)}"'
+        if filename is not None:
+            disposition += f'; filename="{_quote(filename)}"'
+        header = f"--{self.boundary}\r\nContent-Disposition: {disposition}\r\n"
+        if content_type:
+            header += f"Content-Type: {content_type}\r\n"
+        return (header + "\r\n").encode("utf-8")
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[Union[bytes, memoryview]]:
+        return iter(self._parts)
+
+
+def _quote(value: str) -> str:
+    """Escape a form-data name or filename as urllib3 does"""
+    return value.replace("\\", "\\\\").replace('"', "%22").replace("\r", "%0D").replace("\n", "%0A")
+
+
+class InstrumentedSession(requests.Session):
+    """Session that records latency, status, bytes and retries for every call"""
+
+    def prepare_request(self, request: requests.Request) -> requests.PreparedRequest:
+        # In-memory uploads go out as a MultipartBody instead of one joined copy
+        if MultipartBody.supports(request.files) and not isinstance(request.data, (str, bytes)):
+            body = MultipartBody(request.data, request.files)
+            request.files = None
+            request.data = body
+            request.headers = CaseInsensitiveDict(request.headers or {})
+            request.headers["Content-Type"] = body.content_type
+        return super().prepare_request(request)
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if not settings.METRICS_ENABLED:
+            return super().send(request, **kwargs)
+
+        start = time.perf_counter()
+        try:
+            response = super().send(request, **kwargs)
+        except requests.RequestException as e:
+            # A MaxRetryError underneath means every configured retry was spent
+            exhausted = bool(e.args) and isinstance(e.args[0], MaxRetryError)
+            get_metrics().observe(request.method, request.url, "error", time.perf_counter() - start,
+                                  bytes_sent=_body_size(request),
+                                  retries=settings.HTTP_MAX_RETRIES if exhausted else 0)
+            raise
+
+        if kwargs.get("stream"):
+            received = int(response.headers.get("Content-Length") or 0)
+        else:
+            received = len(response.content)
+        retries = getattr(response.raw, "retries", None)
+        get_metrics().observe(
+            request.method, request.url, str(response.status_code), time.perf_counter() - start,
+            bytes_sent=_body_size(request),
+            bytes_received=received,
+            retries=len(retries.history) if retries is not None else 0,
+        )
+        return response
+
+
+def get_adapter() -> HTTPAdapter:
+    """Return the process-wide pooled adapter"""
+    global _adapter
+    if _adapter is None:
+        with _lock:
+            if _adapter is None:
+                _adapter = _build_adapter()
+    return _adapter
+
+
+def create_session(persist_cookies: bool = True) -> requests.Session:
+    """Create a session with its own headers that shares the connection pool"""
+    session = InstrumentedSession()
+    adapter = get_adapter()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Connection": "keep-alive"})
+    if not persist_cookies:
+        # The shared session serves every user, so it must never carry cookies between them
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide session used by the api_request helpers"""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = create_session(persist_cookies=False)
+    return _session
+
+
+def _origin(base_url: str) -> str:
+    parts = urlsplit(base_url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _claim_warm_up(origin: str) -> bool:
+    """True for the first caller to warm origin in this process; False for everyone after"""
+    if not settings.HTTP_WARMUP:
+        return False
+    with _lock:
+        if origin in _warmed_hosts:
+            return False
+        _warmed_hosts.add(origin)
+        return True
+
+
+def _warm(origin: str, timeout: float) -> bool:
+    try:
+        # Any response (even a 404) leaves a live TLS connection in the pool
+        get_session().head(origin, timeout=timeout, allow_redirects=False)
+        return True
+    except requests.RequestException:
+        return False
+
+
+def warm_up(base_url: str, timeout: float = 5) -> bool:
+    """Open a pooled connection to the API host before the first real call (once per host per process)"""
+    origin = _origin(base_url)
+    return _claim_warm_up(origin) and _warm(origin, timeout)
+
+
+def warm_up_async(base_url: str) -> None:
+    """Warm the connection pool in the background so start-up isn't blocked
+
+    Only the first call per host starts a thread; clients rebuilt on every
+    rerun find the host already claimed and return at once.
+    """
+    origin = _origin(base_url)
+    if _claim_warm_up(origin):
+        threading.Thread(target=_warm, args=(origin, 5), daemon=True, name="http-warm-up").start()
@@ -0,0 +1,177 @@
+"""
+Pre-upload normalisation of image contributions with Pillow.
+
+Phone photos arrive as 8-12 MB JPEGs with sideways pixels, embedded
+thumbnails and maker notes. Before upload each image is rotated according to
+its EXIF orientation, stripped of metadata, downsized to IMAGE_MAX_EDGE on its
+long edge and re-encoded as JPEG at IMAGE_QUALITY (or WebP). Decoding and
+encoding are CPU bound, so they run in a small process pool rather than on
+the Streamlit or Flask request thread. Anything Pillow cannot handle is
+uploaded unchanged.
+"""
+
+import io
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import BinaryIO, Optional, Tuple
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Formats re-encoded by the pipeline; others (GIF animations, HEIC without a plugin) pass through
+NORMALIZED_FORMATS = {"JPEG", "MPO", "PNG", "WEBP", "TIFF", "BMP"}
+
+# Colour profiles are kept so colours stay right; anything bigger is dropped with the rest of the metadata
+MAX_ICC_PROFILE_BYTES = 64 * 1024
+
+OUTPUT_TYPES = {
+    "JPEG": ("jpg", "image/jpeg"),
+    "PNG": ("png", "image/png"),
+    "WEBP": ("webp", "image/webp"),
+}
+
+
+@dataclass
+class ProcessedImage:
+    """Image bytes ready for upload and what normalising them saved"""
+    data: bytes
+    extension: str
+    content_type: str
+    original_bytes: int
+    width: Optional[int] = None
+    height: Optional[int] = None
+    changed: bool = False
+
+    @property
+    def processed_bytes(self) -> int:
+        return len(self.data)
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.original_bytes - self.processed_bytes
+
+    def summary(self) -> str:
+        """One-line description of the savings for the submit UI"""
+        if not self.changed:
+            return f"Image uploaded as is ({format_size(self.original_bytes)})."
+        percent = 100 * self.saved_bytes / self.original_bytes if self.original_bytes else 0
+        return (f"Image optimised to {self.width}×{self.height}: {format_size(self.original_bytes)} → "
+                f"{format_size(self.processed_bytes)} ({percent:.0f}% smaller).")
+
+
+def format_size(num_bytes: int) -> str:
+    """Human-readable byte count"""
+    size = float(num_bytes)
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def normalize_image_bytes(data: bytes, max_edge: int, quality: int,
+                          output_format: str) -> Optional[Tuple[bytes, str, int, int]]:
+    """Orient, strip, downsize and re-encode one image; runs in a worker process
+
+    Returns (data, format, width, height), or None when the image should be
+    uploaded unchanged.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as source:
+        if source.format not in NORMALIZED_FORMATS or getattr(source, "n_frames", 1) > 1:
+            return None
+        icc_profile = source.info.get("icc_profile")
+        image = ImageOps.exif_transpose(source)
+        image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        if output_format == "JPEG" and has_alpha:
+            output_format = "PNG"  # JPEG would flatten transparency onto black
+        if output_format == "JPEG":
+            image = image.convert("RGB")
+        elif image.mode not in ("RGB", "RGBA", "L", "LA"):
+            image = image.convert("RGBA" if has_alpha else "RGB")
+
+        options = {}
+        if icc_profile and len(icc_profile) <= MAX_ICC_PROFILE_BYTES:
+            options["icc_profile"] = icc_profile
+        if output_format == "JPEG":
+            options.update(quality=quality, optimize=True, progressive=True)
+        elif output_format == "WEBP":
+            options.update(quality=quality, method=4)
+        else:
+            options.update(optimize=True)
+
+        out = io.BytesIO()
+        image.save(out, format=output_format, **options)
+        return out.getvalue(), output_format, image.width, image.height
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_image_pool() -> ProcessPoolExecutor:
+    """Return the process-wide pool that runs image normalisation"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn, not fork: the parent runs Streamlit/Flask threads that must not be forked mid-flight
+                _pool = ProcessPoolExecutor(max_workers=settings.IMAGE_WORKERS,
+                                            mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def _reset_image_pool() -> None:
+    """Drop a pool whose workers died so the next call starts a fresh one"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def normalize_image(fileobj: BinaryIO, filename: str, content_type: Optional[str] = None) -> ProcessedImage:
+    """Normalise an uploaded image in the process pool, falling back to the original bytes"""
+    fileobj.seek(0)
+    data = fileobj.read()
+    fileobj.seek(0)
+    extension = os.path.splitext(filename)[1].lstrip(".").lower() or "bin"
+    original = ProcessedImage(data=data, extension=extension,
+                              content_type=content_type or "application/octet-stream",
+                              original_bytes=len(data))
+    if not settings.IMAGE_NORMALIZE or not data:
+        return original
+
+    output_format = settings.IMAGE_OUTPUT_FORMAT.upper()
+    if output_format not in ("JPEG", "WEBP"):
+        output_format = "JPEG"
+    try:
+        future = get_image_pool().submit(normalize_image_bytes, data, settings.IMAGE_MAX_EDGE,
+                                         settings.IMAGE_QUALITY, output_format)
+        result = future.result(timeout=settings.IMAGE_PROCESS_TIMEOUT)
+    except BrokenProcessPool as e:
+        logger.error(f"Image worker died while processing {filename}: {e}")
+        _reset_image_pool()
+        return original
+    except Exception as e:
+        logger.warning(f"Could not normalise image {filename}, uploading it unchanged: {e}")
+        return original
+
+    if result is None:
+        return original
+    processed, fmt, width, height = result
+    if len(processed) >= len(data):
+        # Already small enough; re-encoding would only cost quality
+        return original
+    extension, processed_type = OUTPUT_TYPES[fmt]
+    return ProcessedImage(data=processed, extension=extension, content_type=processed_type,
+                          original_bytes=len(data), width=width, height=height, changed=True)
@@ -0,0 +1,277 @@
+"""
+Per-endpoint metrics for calls to the corpus API.
+
+Every request made through the shared transport records its latency,
+status code, bytes sent/received and connection retries, labelled by method
+and a normalized endpoint template such as /users/{id}/contributions so that
+per-user URLs aggregate into one series. Chunked uploads additionally
+record the size and throughput of every chunk, every chunk resent after a
+failure and the effective throughput of every finished upload, which shows how adaptive chunk sizing settles on
+real links. Metrics can be rendered in the Prometheus text exposition format
+or summarised for the Streamlit admin panel.
+
+Endpoint templates and upload patterns say a lot about how the platform is
+used, so the scrape endpoint is not public: scrape_allowed admits only
+requests bearing METRICS_TOKEN, or only loopback clients when no token is
+configured.
+"""
+
+import hmac
+import ipaddress
+import re
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from config.settings import settings
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds in seconds; the last bucket (+Inf) is implicit
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Chunk sizes in bytes, 64 KB to 64 MB
+CHUNK_SIZE_BUCKETS = tuple(float(64 * 1024 * 2 ** i) for i in range(11))
+# Bytes per second, 8 KB/s (2G) to 128 MB/s
+THROUGHPUT_BUCKETS = tuple(float(8 * 1024 * 2 ** i) for i in range(15))
+
+_ID_SEGMENT = re.compile(
+    r"^(\d+"
+    r"|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+    r"|[0-9a-fA-F]{16,}"
+    r"|(?=[A-Za-z0-9_-]*\d)[A-Za-z0-9_-]{20,})$"
+)
+
+
+def normalize_endpoint(url: str) -> str:
+    """Map a URL to its endpoint template, e.g. '/users/{id}/contributions'"""
+    path = urlsplit(url).path or "/"
+    if "/api/v1" in path:
+        path = path.split("/api/v1", 1)[1] or "/"
+    segments = ["{id}" if _ID_SEGMENT.match(s) else s for s in path.split("/")]
+    return "/".join(segments)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile by interpolating within its bucket"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+class APIMetrics:
+    """Thread-safe registry of per-endpoint API call metrics"""
+
+    def __init__(self, prefix: str = "swecha_api"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._latency: Dict[Tuple[str, str], Histogram] = {}
+        self._requests: Dict[Tuple[str, str, str], int] = {}
+        self._bytes_sent: Dict[Tuple[str, str], int] = {}
+        self._bytes_received: Dict[Tuple[str, str], int] = {}
+        self._retries: Dict[Tuple[str, str], int] = {}
+        self._chunk_bytes = Histogram(CHUNK_SIZE_BUCKETS)
+        self._chunk_throughput = Histogram(THROUGHPUT_BUCKETS)
+        self._upload_throughput = Histogram(THROUGHPUT_BUCKETS)
+        self._chunk_retries = 0
+
+    def observe(self, method: str, url: str, status: str, seconds: float,
+                bytes_sent: int = 0, bytes_received: int = 0, retries: int = 0) -> None:
+        """Record one upstream call; status is the HTTP code or 'error'"""
+        key = (method.upper(), normalize_endpoint(url))
+        with self._lock:
+            histogram = self._latency.get(key)
+            if histogram is None:
+                histogram = self._latency[key] = Histogram()
+            histogram.observe(seconds)
+            status_key = key + (str(status),)
+            self._requests[status_key] = self._requests.get(status_key, 0) + 1
+            self._bytes_sent[key] = self._bytes_sent.get(key, 0) + bytes_sent
+            self._bytes_received[key] = self._bytes_received.get(key, 0) + bytes_received
+            self._retries[key] = self._retries.get(key, 0) + retries
+
+    def observe_chunk(self, length: int, seconds: float) -> None:
+        """Record one acknowledged upload chunk and the time its request took"""
+        with self._lock:
+            self._chunk_bytes.observe(length)
+            if seconds > 0:
+                self._chunk_throughput.observe(length / seconds)
+
+    def observe_upload(self, total_bytes: int, seconds: float) -> None:
+        """Record the effective throughput of one finished chunked upload"""
+        if seconds > 0:
+            with self._lock:
+                self._upload_throughput.observe(total_bytes / seconds)
+
+    def observe_chunk_retry(self) -> None:
+        """Record that a failed chunk request is about to be sent again"""
+        with self._lock:
+            self._chunk_retries += 1
+
+    def reset(self) -> None:
+        """Drop all recorded metrics"""
+        with self._lock:
+            self._latency.clear()
+            self._requests.clear()
+            self._bytes_sent.clear()
+            self._bytes_received.clear()
+            self._retries.clear()
+            self._chunk_bytes = Histogram(CHUNK_SIZE_BUCKETS)
+            self._chunk_throughput = Histogram(THROUGHPUT_BUCKETS)
+            self._upload_throughput = Histogram(THROUGHPUT_BUCKETS)
+            self._chunk_retries = 0
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        p = self.prefix
+        lines: List[str] = []
+        with self._lock:
+            lines.append(f"# HELP {p}_request_duration_seconds Latency of corpus API calls.")
+            lines.append(f"# TYPE {p}_request_duration_seconds histogram")
+            for (method, endpoint), h in sorted(self._latency.items()):
+                cumulative = 0
+                for bound, n in zip(h.buckets + (float("inf"),), h.counts):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{p}_request_duration_seconds_bucket"
+                                 f"{_labels(method=method, endpoint=endpoint, le=le)} {cumulative}")
+                lines.append(f"{p}_request_duration_seconds_sum{_labels(method=method, endpoint=endpoint)} {h.sum}")
+                lines.append(f"{p}_request_duration_seconds_count{_labels(method=method, endpoint=endpoint)} {h.count}")
+
+            lines.append(f"# HELP {p}_requests_total Corpus API calls by response status.")
+            lines.append(f"# TYPE {p}_requests_total counter")
+            for (method, endpoint, status), n in sorted(self._requests.items()):
+                lines.append(f"{p}_requests_total{_labels(method=method, endpoint=endpoint, status=status)} {n}")
+
+            for name, help_text, values in (
+                ("request_bytes_total", "Request body bytes sent to the corpus API.", self._bytes_sent),
+                ("response_bytes_total", "Response body bytes received from the corpus API.", self._bytes_received),
+                ("retries_total", "Connection retries made by the transport.", self._retries),
+            ):
+                lines.append(f"# HELP {p}_{name} {help_text}")
+                lines.append(f"# TYPE {p}_{name} counter")
+                for (method, endpoint), n in sorted(values.items()):
+                    lines.append(f"{p}_{name}{_labels(method=method, endpoint=endpoint)} {n}")
+
+            for name, help_text, h in (
+                ("upload_chunk_bytes", "Size of acknowledged upload chunks.", self._chunk_bytes),
+                ("upload_chunk_throughput_bytes_per_second", "Throughput of single chunk requests.",
+                 self._chunk_throughput),
+                ("upload_throughput_bytes_per_second", "Effective throughput of finished uploads.",
+                 self._upload_throughput),
+            ):
+                lines.append(f"# HELP {p}_{name} {help_text}")
+                lines.append(f"# TYPE {p}_{name} histogram")
+                cumulative = 0
+                for bound, n in zip(h.buckets + (float("inf"),), h.counts):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{p}_{name}_bucket{_labels(le=le)} {cumulative}")
+                lines.append(f"{p}_{name}_sum {h.sum}")
+                lines.append(f"{p}_{name}_count {h.count}")
+
+            lines.append(f"# HELP {p}_upload_chunk_retries_total Upload chunks sent again after a failed attempt.")
+            lines.append(f"# TYPE {p}_upload_chunk_retries_total counter")
+            lines.append(f"{p}_upload_chunk_retries_total {self._chunk_retries}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> List[Dict]:
+        """One row per (method, endpoint), slowest p95 first, for display"""
+        rows = []
+        with self._lock:
+            for (method, endpoint), h in self._latency.items():
+                statuses = {s: n for (m, e, s), n in self._requests.items() if (m, e) == (method, endpoint)}
+                errors = sum(n for s, n in statuses.items() if s == "error" or s.startswith("5"))
+                rows.append({
+                    "method": method,
+                    "endpoint": endpoint,
+                    "calls": h.count,
+                    "errors": errors,
+                    "mean_ms": round(1000 * h.sum / h.count, 1),
+                    "p50_ms": round(1000 * h.quantile(0.5), 1),
+                    "p95_ms": round(1000 * h.quantile(0.95), 1),
+                    "p99_ms": round(1000 * h.quantile(0.99), 1),
+                    "bytes_sent": self._bytes_sent.get((method, endpoint), 0),
+                    "bytes_received": self._bytes_received.get((method, endpoint), 0),
+                    "retries": self._retries.get((method, endpoint), 0),
+                    "statuses": statuses,
+                })
+        return sorted(rows, key=lambda r: r["p95_ms"], reverse=True)
+
+    def upload_summary(self) -> Dict:
+        """Chunk sizes and upload throughput so far, for display; quantiles are bucket estimates"""
+        with self._lock:
+            chunks, rates, uploads = self._chunk_bytes, self._chunk_throughput, self._upload_throughput
+            return {
+                "chunks": chunks.count,
+                "chunk_retries": self._chunk_retries,
+                "mean_chunk_bytes": round(chunks.sum / chunks.count) if chunks.count else None,
+                "p50_chunk_bytes": chunks.quantile(0.5),
+                "p50_chunk_bytes_per_second": rates.quantile(0.5),
+                "uploads": uploads.count,
+                "p50_upload_bytes_per_second": uploads.quantile(0.5),
+                "p5_upload_bytes_per_second": uploads.quantile(0.05),
+            }
+
+
+_metrics: Optional[APIMetrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> APIMetrics:
+    """Return the process-wide API metrics registry"""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = APIMetrics()
+    return _metrics
+
+
+def render_prometheus() -> str:
+    """Render the process-wide metrics in Prometheus text format"""
+    return get_metrics().render_prometheus()
+
+
+def scrape_allowed(remote_addr: Optional[str], authorization: Optional[str]) -> bool:
+    """Whether a scrape from remote_addr with this Authorization header may read the metrics"""
+    if not settings.METRICS_ENABLED:
+        return False
+    if settings.METRICS_TOKEN:
+        return hmac.compare_digest((authorization or "").encode(), f"Bearer {settings.METRICS_TOKEN}".encode())
+    try:
+        address = ipaddress.ip_address(remote_addr or "")
+    except ValueError:
+        return False
+    # A dual-stack server reports IPv4 clients as ::ffff:a.b.c.d
+    return (getattr(address, "ipv4_mapped", None) or address).is_loopback
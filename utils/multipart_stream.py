@@ -0,0 +1,138 @@
+"""
+Incremental reader for multipart/form-data request bodies.
+
+Flask's request.form and request.files parse the whole body before a view
+runs, spooling files to disk or memory. MultipartStream instead reads the
+raw WSGI input (request.stream) a block at a time with Werkzeug's sans-IO
+decoder: the small form fields that precede the file are collected, and the
+file itself is exposed as a read-once stream that pulls more of the body
+only as it is read. A consumer that reads slowly (because the chunks it
+forwards are still in flight) therefore leaves the rest of the body in the
+socket, and TCP flow control slows the client down.
+
+Fields must come before the file part; browsers send FormData entries in
+the order they were appended.
+"""
+
+from typing import BinaryIO, Dict, Optional
+
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData, Preamble
+
+# Bytes pulled from the request body per read
+READ_SIZE = 64 * 1024
+
+
+class MultipartError(ValueError):
+    """The request body is not well-formed multipart/form-data"""
+
+
+class UploadTooLarge(ValueError):
+    """The uploaded file is bigger than the configured maximum"""
+
+    def __init__(self, limit: int):
+        super().__init__(f"File exceeds the {limit // (1024 * 1024)} MB upload limit")
+        self.limit = limit
+
+
+class FilePart:
+    """Read-once stream over the contents of one file part"""
+
+    def __init__(self, reader: "MultipartStream", name: str, filename: str, content_type: str,
+                 max_bytes: Optional[int]):
+        self._reader = reader
+        self.name = name
+        self.filename = filename
+        self.content_type = content_type
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+        self._buffer = bytearray()
+        self._done = False
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def read(self, size: int = -1) -> bytes:
+        """Up to size bytes (all that is left when size < 0); fewer only at the end of the part"""
+        while not self._done and (size < 0 or len(self._buffer) < size):
+            event = self._reader._next_event()
+            if not isinstance(event, Data):
+                raise MultipartError("File part ended unexpectedly")
+            self.bytes_read += len(event.data)
+            if self.max_bytes is not None and self.bytes_read > self.max_bytes:
+                raise UploadTooLarge(self.max_bytes)
+            self._buffer += event.data
+            self._done = not event.more_data
+        if size < 0 or size >= len(self._buffer):
+            data = bytes(self._buffer)
+            self._buffer.clear()
+        else:
+            data = bytes(self._buffer[:size])
+            del self._buffer[:size]
+        return data
+
+    def drain(self) -> None:
+        """Skip whatever is left of the part"""
+        while self.read(READ_SIZE):
+            pass
+
+
+class MultipartStream:
+    """Fields and the first file of a multipart body, read straight from its stream"""
+
+    def __init__(self, stream: BinaryIO, boundary: str, max_field_size: int = 1024 * 1024):
+        self._stream = stream
+        self._decoder = MultipartDecoder(boundary.encode("latin-1"), max_form_memory_size=max_field_size)
+        self._ended = False
+
+    def _next_event(self):
+        while True:
+            try:
+                event = self._decoder.next_event()
+            except ValueError as e:
+                raise MultipartError(str(e)) from e
+            if not isinstance(event, NeedData):
+                return event
+            if self._ended:
+                raise MultipartError("Request body ended unexpectedly")
+            data = self._stream.read(READ_SIZE)
+            self._ended = not data
+            try:
+                self._decoder.receive_data(data or None)
+            except ValueError as e:
+                raise MultipartError(str(e)) from e
+
+    def read_fields(self, max_bytes: Optional[int] = None) -> "tuple[Dict[str, str], Optional[FilePart]]":
+        """Collect form fields up to the first file part, and return (fields, that part or None)
+
+        The body must be read on from the returned part before anything else;
+        with no file part the whole body has been consumed.
+        """
+        fields: Dict[str, str] = {}
+        while True:
+            event = self._next_event()
+            if isinstance(event, Preamble):
+                continue
+            if isinstance(event, Epilogue):
+                return fields, None
+            if isinstance(event, Field):
+                value = bytearray()
+                while True:
+                    data = self._next_event()
+                    if not isinstance(data, Data):
+                        raise MultipartError(f"Field {event.name} ended unexpectedly")
+                    value += data.data
+                    if not data.more_data:
+                        break
+                fields[event.name] = value.decode("utf-8", errors="replace")
+            elif isinstance(event, File):
+                if not event.filename:
+                    # An empty file input: the browser sends the part with no name and no data
+                    FilePart(self, event.name, "", "", None).drain()
+                    continue
+                content_type = event.headers.get("content-type", "application/octet-stream")
+                return fields, FilePart(self, event.name, event.filename, content_type, max_bytes)
+            else:
+                raise MultipartError("Unexpected data in the request body")
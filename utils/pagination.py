@@ -0,0 +1,72 @@
+"""
+Offset pagination for listing pages.
+
+Pages show a fixed number of items however many there are, so rendering
+cost stays flat as a contributor's records grow. The page size comes from
+DEFAULT_PAGE_SIZE and is capped at MAX_PAGE_SIZE; the position in a list is
+an offset (the cursor) that front ends keep in their session per list.
+"""
+
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence
+
+from config.settings import settings
+
+
+def page_size(requested: Optional[int] = None) -> int:
+    """requested clamped to 1..MAX_PAGE_SIZE; DEFAULT_PAGE_SIZE when missing"""
+    if not requested:
+        return settings.DEFAULT_PAGE_SIZE
+    return max(1, min(int(requested), settings.MAX_PAGE_SIZE))
+
+
+@dataclass
+class Page:
+    """One page of a list: its items and where they sit in the whole"""
+    items: List[Any]
+    offset: int
+    size: int
+    total: int
+
+    @property
+    def number(self) -> int:
+        """1-based page number"""
+        return self.offset // self.size + 1
+
+    @property
+    def pages(self) -> int:
+        return max(1, -(-self.total // self.size))
+
+    @property
+    def has_previous(self) -> bool:
+        return self.offset > 0
+
+    @property
+    def has_next(self) -> bool:
+        return self.offset + self.size < self.total
+
+    @property
+    def previous_offset(self) -> int:
+        return max(0, self.offset - self.size)
+
+    @property
+    def next_offset(self) -> int:
+        return self.offset + self.size
+
+    @property
+    def first(self) -> int:
+        """1-based position of the first item shown (0 when the list is empty)"""
+        return self.offset + 1 if self.items else 0
+
+    @property
+    def last(self) -> int:
+        return self.offset + len(self.items)
+
+
+def paginate(items: Sequence, offset: int = 0, size: Optional[int] = None) -> Page:
+    """The page of items starting at offset, moved back to the last page when the list has shrunk past it"""
+    size = page_size(size)
+    total = len(items)
+    offset = max(0, min(int(offset), (max(total - 1, 0) // size) * size))
+    offset -= offset % size
+    return Page(items=list(items[offset:offset + size]), offset=offset, size=size, total=total)
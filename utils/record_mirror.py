@@ -0,0 +1,536 @@
+"""
+Local SQLite mirror of the corpus API's /records/ listing.
+
+Listing pages used to re-pull records from the API on every render. The
+mirror keeps a copy of every record in SQLite, indexed by category, user,
+media type and language, so those pages read locally in milliseconds.
+
+A sync pages through /records/ with limit=1000 and writes each page in one
+transaction; a record is only rewritten when its updated_at moved. The
+newest updated_at seen is kept as a high-water mark: while the listing comes
+back newest-first, an incremental sync stops at the first page that holds
+nothing newer than the mark. Edits to old records that such a sync cannot
+reach, and deletions, are caught by a periodic full reconcile, which reads
+the whole listing and drops every mirrored record it did not see. Any sync
+that happens to read to the end of the listing counts as a reconcile.
+
+A full sync saves its position after every page, so one that is interrupted
+(the API went away, the process restarted) resumes from the next page rather
+than from the start, which also lets the first sync of a large listing
+complete across attempts.
+
+skip/limit pages can shift while a sync runs. A record created meanwhile
+may then be read twice (harmless); one moved across a page boundary by a
+concurrent deletion may be missed, and dropped by a reconcile, until the
+next reconcile sees it again.
+
+The mirror is shared by every user of the process, so it syncs with one
+process-wide credential (RECORD_API_TOKEN, or none), never the token of
+whichever user is browsing: a reconcile under a narrower view would delete
+records everyone else sees, and one user's records would be served to all.
+
+Reads never wait for the API: a mirror that was never synced or is older
+than RECORD_SYNC_INTERVAL is refreshed on a background thread, outside any
+render or request deadline, while pages show what is mirrored so far
+(nothing at first, then each page as it is committed).
+
+Titles and descriptions are also indexed for full-text search in an FTS5
+table, normalised for Indic scripts by utils.text_search. Triggers keep the
+index in step with every write to records, so a sync or a newly submitted
+record (add) is searchable as soon as it is committed. The triggers call
+fold_text, which _connect registers; write to the file through RecordMirror.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import requests
+
+from config.settings import settings
+from utils.circuit_breaker import get_breaker
+from utils.deadline import timeout_for
+from utils.http_transport import get_session
+from utils.text_search import FTS_TOKENIZER, NORMALIZATION_VERSION, match_expression, normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Largest page the API serves
+MAX_PAGE_SIZE = 1000
+
+# fetch(skip, limit) -> that page of /records/, or None when the API could not be read
+RecordPageFetcher = Callable[[int, int], Optional[List[Dict]]]
+
+# Columns the mirror can filter and group by
+FILTER_COLUMNS = ("category_id", "user_id", "media_type", "language", "status")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    uid TEXT PRIMARY KEY,
+    title TEXT,
+    description TEXT,
+    media_type TEXT,
+    language TEXT,
+    category_id TEXT,
+    user_id TEXT,
+    status TEXT,
+    latitude REAL,
+    longitude REAL,
+    created_at TEXT,
+    updated_at TEXT,
+    updated_ts REAL NOT NULL,
+    seen_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS records_by_updated ON records (updated_ts);
+CREATE INDEX IF NOT EXISTS records_by_category ON records (category_id, updated_ts);
+CREATE INDEX IF NOT EXISTS records_by_user ON records (user_id, updated_ts);
+CREATE INDEX IF NOT EXISTS records_by_media_type ON records (media_type, updated_ts);
+CREATE INDEX IF NOT EXISTS records_by_language ON records (language, updated_ts);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+# records_fts rows share the rowid of their records row
+_SEARCH_SCHEMA = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS records_fts USING fts5 (
+    title, description, tokenize = "{FTS_TOKENIZER}", prefix = '2 3'
+);
+CREATE TRIGGER IF NOT EXISTS records_fts_insert AFTER INSERT ON records BEGIN
+    INSERT INTO records_fts (rowid, title, description)
+    VALUES (new.rowid, fold_text(new.title), fold_text(new.description));
+END;
+CREATE TRIGGER IF NOT EXISTS records_fts_update AFTER UPDATE OF title, description ON records BEGIN
+    UPDATE records_fts SET title = fold_text(new.title), description = fold_text(new.description)
+    WHERE rowid = new.rowid;
+END;
+CREATE TRIGGER IF NOT EXISTS records_fts_delete AFTER DELETE ON records BEGIN
+    DELETE FROM records_fts WHERE rowid = old.rowid;
+END;
+"""
+
+# Columns of the records table that columns() can read
+_RECORD_COLUMNS = ("uid", "title", "description", "media_type", "language", "category_id", "user_id", "status",
+                   "latitude", "longitude", "created_at", "updated_at")
+
+# Title matches outrank description matches
+_TITLE_WEIGHT, _DESCRIPTION_WEIGHT = 10.0, 1.0
+
+_UPSERT = """
+INSERT INTO records (uid, title, description, media_type, language, category_id, user_id, status,
+                     latitude, longitude, created_at, updated_at, updated_ts, seen_at, data)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (uid) DO UPDATE SET
+    title = excluded.title, description = excluded.description, media_type = excluded.media_type,
+    language = excluded.language, category_id = excluded.category_id, user_id = excluded.user_id,
+    status = excluded.status, latitude = excluded.latitude, longitude = excluded.longitude,
+    created_at = excluded.created_at, updated_at = excluded.updated_at, updated_ts = excluded.updated_ts,
+    seen_at = excluded.seen_at, data = excluded.data
+WHERE excluded.updated_ts != records.updated_ts
+"""
+
+
+def parse_timestamp(value: Optional[str]) -> float:
+    """Epoch seconds of an ISO 8601 timestamp (naive ones are UTC); 0 when missing or unreadable"""
+    if not value:
+        return 0.0
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return 0.0
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def records_page_fetcher(api_url: str, token: Optional[str] = None) -> RecordPageFetcher:
+    """Fetcher reading /records/ pages from api_url (with /api/v1) through the shared session
+
+    token defaults to RECORD_API_TOKEN (anonymous when unset). Pages bypass
+    the front ends' response caches: a 1000-record page is read once per
+    sync and lives on in the mirror itself.
+    """
+    token = token if token is not None else settings.RECORD_API_TOKEN
+    url = f"{api_url.rstrip('/')}/records/"
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+
+    def fetch(skip: int, limit: int) -> Optional[List[Dict]]:
+        breaker = get_breaker("/records/")
+        if not breaker.allow_request():
+            return None
+        try:
+            response = breaker.call(lambda: get_session().get(
+                url, params={"skip": skip, "limit": limit}, headers=headers, timeout=timeout_for("metadata")))
+        except requests.RequestException as e:
+            logger.warning(f"Record page at skip={skip} failed: {e}")
+            return None
+        if response.status_code != 200:
+            logger.warning(f"Record page at skip={skip} failed with HTTP {response.status_code}")
+            return None
+        try:
+            page = response.json()
+        except ValueError:
+            return None
+        return page if isinstance(page, list) else None
+    return fetch
+
+
+@dataclass
+class SyncResult:
+    """What one sync pass did"""
+    full: bool
+    pages: int = 0
+    fetched: int = 0
+    written: int = 0
+    deleted: int = 0
+    reached_end: bool = False
+    error: Optional[str] = None
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class RecordMirror:
+    """SQLite copy of /records/ kept fresh by incremental syncs and periodic full reconciles"""
+
+    def __init__(self, path: str, fetcher: Optional[RecordPageFetcher] = None, page_size: int = MAX_PAGE_SIZE,
+                 sync_interval: float = 300, reconcile_interval: float = 86400):
+        self.path = path
+        self.page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        self.sync_interval = sync_interval
+        self.reconcile_interval = reconcile_interval
+        self._fetcher = fetcher
+        self._sync_lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            conn.executescript(_SEARCH_SCHEMA)
+            if self._state_in(conn, "search_version") != NORMALIZATION_VERSION:
+                self._rebuild_search(conn)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.create_function("fold_text", 1, normalize_text, deterministic=True)
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def set_fetcher(self, fetcher: RecordPageFetcher) -> None:
+        """Use fetcher for subsequent syncs"""
+        self._fetcher = fetcher
+
+    def _rebuild_search(self, conn: sqlite3.Connection) -> None:
+        """Re-index every record (a mirror from before search, or one normalised differently)"""
+        conn.execute("DELETE FROM records_fts")
+        conn.execute("INSERT INTO records_fts (rowid, title, description)"
+                     " SELECT rowid, fold_text(title), fold_text(description) FROM records")
+        self._set_state(conn, "search_version", NORMALIZATION_VERSION)
+
+    # --- Sync state ----------------------------------------------------------
+    @staticmethod
+    def _state_in(conn: sqlite3.Connection, key: str) -> Optional[float]:
+        row = conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _state(self, key: str) -> Optional[float]:
+        with self._connect() as conn:
+            return self._state_in(conn, key)
+
+    @property
+    def watermark(self) -> Optional[float]:
+        """Newest updated_at (epoch seconds) seen by a completed sync"""
+        return self._state("watermark")
+
+    @property
+    def last_sync(self) -> Optional[float]:
+        """When the last completed sync started"""
+        return self._state("last_sync")
+
+    @property
+    def syncing(self) -> bool:
+        """Whether a sync is running now"""
+        return self._sync_lock.locked()
+
+    @property
+    def last_reconcile(self) -> Optional[float]:
+        """When the last sync that read the whole listing started"""
+        return self._state("last_reconcile")
+
+    @property
+    def age(self) -> float:
+        """Seconds since the last completed sync started"""
+        last_sync = self.last_sync
+        return time.time() - last_sync if last_sync else float("inf")
+
+    def reconcile_due(self) -> bool:
+        last_reconcile = self.last_reconcile
+        return last_reconcile is None or time.time() - last_reconcile > self.reconcile_interval
+
+    # --- Sync ----------------------------------------------------------------
+    def ensure_fresh(self) -> None:
+        """Start a background sync when the mirror was never synced or is stale; never waits for it"""
+        if self._fetcher is None:
+            return
+        if self.age > self.sync_interval:
+            self._sync_in_background()
+
+    def _sync_in_background(self) -> None:
+        if self._sync_lock.locked():
+            return
+        # A new thread starts with an empty context, so no caller's deadline caps the sync's requests
+        threading.Thread(target=self.sync, daemon=True, name="record-sync").start()
+
+    def sync(self, full: Optional[bool] = None) -> SyncResult:
+        """Pull changes from the API; full reads the whole listing (default: when a reconcile is due)
+
+        One sync runs at a time; a caller arriving during another sync waits
+        for it and then returns without syncing again.
+        """
+        waited = self._sync_lock.locked()
+        with self._sync_lock:
+            if full is None:
+                full = self.reconcile_due()
+            if waited and not full and self.age <= self.sync_interval:
+                return SyncResult(full=False)  # the sync we waited for has just refreshed the mirror
+            return self._sync(full)
+
+    def _sync(self, full: bool) -> SyncResult:
+        started = time.time()
+        result = SyncResult(full=full)
+        if self._fetcher is None:
+            result.error = "No record fetcher configured"
+            return result
+        watermark = self.watermark
+        newest = watermark or 0.0
+        newest_first = True
+        previous_ts = float("inf")
+        skip = 0
+
+        with self._connect() as conn:
+            if full:
+                resume_started = self._state_in(conn, "full_sync_started")
+                if resume_started is not None and started - resume_started <= self.reconcile_interval:
+                    # Carry on where an interrupted full sync stopped; its pages count as seen when it began
+                    started = resume_started
+                    skip = int(self._state_in(conn, "full_sync_skip") or 0)
+                    newest = max(newest, self._state_in(conn, "full_sync_newest") or 0.0)
+                    logger.info(f"Resuming the full record sync at skip={skip}")
+                else:
+                    self._set_state(conn, "full_sync_started", started)
+                    self._set_state(conn, "full_sync_skip", 0)
+                    conn.commit()
+            while True:
+                page = self._fetcher(skip, self.page_size)
+                if page is None:
+                    result.error = f"Could not read the record page at skip={skip}"
+                    break
+                result.pages += 1
+                result.fetched += len(page)
+
+                rows = []
+                for record in page:
+                    if not record.get("uid"):
+                        continue
+                    updated_ts = parse_timestamp(record.get("updated_at"))
+                    newest_first = newest_first and updated_ts <= previous_ts
+                    previous_ts = updated_ts
+                    newest = max(newest, updated_ts)
+                    rows.append(self._row(record, updated_ts, started))
+                before = conn.total_changes
+                conn.executemany(_UPSERT, rows)
+                result.written += conn.total_changes - before
+                # Unchanged rows were not rewritten; mark them as still listed
+                conn.executemany("UPDATE records SET seen_at = ? WHERE uid = ?", [(started, row[0]) for row in rows])
+                skip += len(page)
+                if full:
+                    self._set_state(conn, "full_sync_skip", skip)
+                    self._set_state(conn, "full_sync_newest", newest)
+                conn.commit()
+
+                if len(page) < self.page_size:
+                    result.reached_end = True
+                    break
+                if (not full and watermark is not None and newest_first
+                        and previous_ts <= watermark):
+                    break  # newest-first and nothing newer than the mark: the rest is older still
+
+            if result.ok:
+                if result.reached_end:
+                    result.deleted = conn.execute("DELETE FROM records WHERE seen_at < ?", (started,)).rowcount
+                    self._set_state(conn, "last_reconcile", started)
+                if full or result.reached_end:
+                    conn.execute("DELETE FROM sync_state WHERE key IN"
+                                 " ('full_sync_started', 'full_sync_skip', 'full_sync_newest')")
+                self._set_state(conn, "watermark", newest)
+                self._set_state(conn, "last_sync", started)
+        result.seconds = time.time() - started
+        if result.ok:
+            logger.info(f"Record sync: {result.fetched} read, {result.written} written, "
+                        f"{result.deleted} deleted in {result.seconds:.1f}s")
+        else:
+            logger.error(f"Record sync stopped: {result.error}")
+        return result
+
+    def add(self, record: Dict) -> None:
+        """Mirror (and index) one record the API has just returned, ahead of the next sync"""
+        if not record.get("uid"):
+            return
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(_UPSERT, self._row(record, parse_timestamp(record.get("updated_at")), now))
+            conn.execute("UPDATE records SET seen_at = ? WHERE uid = ?", (now, str(record["uid"])))
+
+    @staticmethod
+    def _row(record: Dict, updated_ts: float, seen_at: float) -> tuple:
+        location = record.get("location") or {}
+        return (
+            str(record["uid"]), record.get("title"), record.get("description"), record.get("media_type"),
+            record.get("language"), _str_or_none(record.get("category_id")), _str_or_none(record.get("user_id")),
+            record.get("status"), location.get("latitude"), location.get("longitude"),
+            record.get("created_at"), record.get("updated_at"), updated_ts, seen_at,
+            json.dumps(record, ensure_ascii=False),
+        )
+
+    @staticmethod
+    def _set_state(conn: sqlite3.Connection, key: str, value: float) -> None:
+        conn.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, value))
+
+    # --- Reads ---------------------------------------------------------------
+    @staticmethod
+    def _where(filters: Dict[str, Any]) -> "tuple[str, list]":
+        clauses, params = [], []
+        for column, value in filters.items():
+            if column not in FILTER_COLUMNS:
+                raise ValueError(f"Cannot filter records by {column}")
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(str(value))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def records(self, limit: int = 50, offset: int = 0, **filters) -> List[Dict]:
+        """Mirrored records matching filters (FILTER_COLUMNS), most recently updated first"""
+        where, params = self._where(filters)
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT data FROM records{where} ORDER BY updated_ts DESC LIMIT ? OFFSET ?",
+                                params + [limit, offset]).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def columns(self, *names: str, **filters) -> List[tuple]:
+        """Values of the named columns for every record matching filters, for bulk analysis without the JSON"""
+        unknown = set(names) - set(_RECORD_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown record columns: {', '.join(sorted(unknown))}")
+        where, params = self._where(filters)
+        with self._connect() as conn:
+            return conn.execute(f"SELECT {', '.join(names)} FROM records{where}", params).fetchall()
+
+    def count(self, **filters) -> int:
+        """Number of mirrored records matching filters"""
+        where, params = self._where(filters)
+        with self._connect() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM records{where}", params).fetchone()[0]
+
+    def counts_by(self, column: str, **filters) -> Dict[str, int]:
+        """Record counts per value of column (one of FILTER_COLUMNS) among records matching filters"""
+        if column not in FILTER_COLUMNS:
+            raise ValueError(f"Cannot group records by {column}")
+        where, params = self._where(filters)
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT {column}, COUNT(*) FROM records{where} GROUP BY {column}", params).fetchall()
+        return {value: n for value, n in rows if value is not None}
+
+    def search(self, query: str, limit: int = 20, offset: int = 0, **filters) -> List[Dict]:
+        """Records whose title or description has every word of query as a word prefix, best match first
+
+        filters (FILTER_COLUMNS) narrow the results as for records(); a query
+        with no words matches nothing.
+        """
+        expression = match_expression(query)
+        if not expression:
+            return []
+        where, params = self._where(filters)
+        where = where.replace(" WHERE ", " AND ", 1)
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT records.data FROM records_fts JOIN records ON records.rowid = records_fts.rowid"
+                f" WHERE records_fts MATCH ?{where}"
+                " ORDER BY bm25(records_fts, ?, ?), records.updated_ts DESC LIMIT ? OFFSET ?",
+                [expression] + params + [_TITLE_WEIGHT, _DESCRIPTION_WEIGHT, limit, offset]).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def get(self, uid: str) -> Optional[Dict]:
+        """One mirrored record by uid"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT data FROM records WHERE uid = ?", (str(uid),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+
+def _str_or_none(value: Any) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+_mirror: Optional[RecordMirror] = None
+_mirror_lock = threading.Lock()
+
+
+def get_record_mirror(fetcher: Optional[RecordPageFetcher] = None) -> RecordMirror:
+    """Return the process-wide record mirror"""
+    global _mirror
+    if _mirror is None:
+        with _mirror_lock:
+            if _mirror is None:
+                _mirror = RecordMirror(
+                    settings.RECORD_MIRROR_PATH,
+                    page_size=settings.RECORD_SYNC_PAGE_SIZE,
+                    sync_interval=settings.RECORD_SYNC_INTERVAL,
+                    reconcile_interval=settings.RECORD_RECONCILE_INTERVAL,
+                )
+    if fetcher is not None:
+        _mirror.set_fetcher(fetcher)
+    return _mirror
+
+
+def add_created_record(response: requests.Response) -> None:
+    """Mirror the record in a 201 response from /records/upload, so it is listed and searchable at once"""
+    try:
+        record = response.json()
+    except ValueError:
+        return
+    if isinstance(record, dict):
+        get_record_mirror().add(record)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Sync the local record mirror from the corpus API")
+    parser.add_argument("--api-url", default=settings.API_BASE_URL, help="corpus API origin")
+    parser.add_argument("--token", default=None, help="service token (default: RECORD_API_TOKEN)")
+    parser.add_argument("--full", action="store_true", help="read the whole listing and drop deleted records")
+    args = parser.parse_args(argv)
+
+    api_url = args.api_url.rstrip("/")
+    api_url = api_url if api_url.endswith("/api/v1") else f"{api_url}/api/v1"
+    mirror = get_record_mirror(records_page_fetcher(api_url, args.token))
+    result = mirror.sync(full=True if args.full else None)
+    print(json.dumps(asdict(result)))
+    print(f"{'✅' if result.ok else '❌'} {mirror.count()} records mirrored in {mirror.path}")
+    return 0 if result.ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,120 @@
+"""
+Single-flight coalescing for identical GET requests.
+
+Streamlit reruns and concurrent sessions often ask for the same resource
+while an identical request is still in flight. Callers that share a key wait
+on the one upstream request and reuse its result, which is then kept for a
+short, jittered TTL so a popular key does not stampede the API when it expires.
+"""
+
+import hashlib
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from config.settings import settings
+
+
+class _Call:
+    """One in-flight upstream request that followers wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class RequestCoalescer:
+    """Share one upstream call and its result among concurrent identical requests"""
+
+    def __init__(self, ttl: float = 0.0, jitter: float = 0.0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.jitter = jitter
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, _Call] = {}
+        self._results: Dict[Hashable, Tuple[float, Any]] = {}
+
+    def _expiry(self, now: float) -> float:
+        """Spread expiries by +/- jitter so hot keys don't all refresh at once"""
+        spread = self.ttl * self.jitter
+        return now + self.ttl + random.uniform(-spread, spread)
+
+    def _prune(self, now: float) -> None:
+        """Drop expired results, then the oldest ones if still over budget"""
+        for key in [k for k, (expires, _) in self._results.items() if expires <= now]:
+            del self._results[key]
+        while len(self._results) >= self.max_entries:
+            del self._results[next(iter(self._results))]
+
+    def call(self, key: Hashable, fn: Callable[[], Any],
+             cacheable: Callable[[Any], bool] = lambda result: result is not None) -> Any:
+        """Return fn()'s result, running it at most once per key at a time"""
+        with self._lock:
+            now = time.monotonic()
+            cached = self._results.get(key)
+            if cached and cached[0] > now:
+                return cached[1]
+
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                if call.error is None and self.ttl > 0 and cacheable(call.result):
+                    now = time.monotonic()
+                    self._prune(now)
+                    self._results[key] = (self._expiry(now), call.result)
+            call.done.set()
+
+    def invalidate(self, url_fragment: str) -> None:
+        """Forget cached results whose URL contains url_fragment"""
+        with self._lock:
+            for key in [k for k in self._results if url_fragment in k[1]]:
+                del self._results[key]
+
+    def clear(self) -> None:
+        """Forget all cached results"""
+        with self._lock:
+            self._results.clear()
+
+
+def request_key(method: str, url: str, params: Optional[Dict] = None,
+                auth: Optional[str] = None) -> Tuple:
+    """Build a coalescing key from (method, URL, params, auth principal)"""
+    principal = hashlib.sha256(auth.encode()).hexdigest()[:16] if auth else None
+    frozen_params = tuple(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+    return (method.upper(), url, frozen_params, principal)
+
+
+_coalescer: Optional[RequestCoalescer] = None
+_coalescer_lock = threading.Lock()
+
+
+def get_coalescer() -> RequestCoalescer:
+    """Return the process-wide coalescer shared by all front ends"""
+    global _coalescer
+    if _coalescer is None:
+        with _coalescer_lock:
+            if _coalescer is None:
+                _coalescer = RequestCoalescer(
+                    ttl=settings.API_COALESCE_TTL,
+                    jitter=settings.API_COALESCE_JITTER,
+                )
+    return _coalescer
@@ -0,0 +1,122 @@
+"""
+Conditional-GET response cache.
+
+Stores the raw JSON body of GET responses together with their ETag /
+Last-Modified validators. The next request for the same URL and principal
+sends If-None-Match / If-Modified-Since, and a 304 is answered from the
+cached bytes without re-downloading the body. Bodies stay immutable bytes
+and are decoded on every read, so no caller can mutate another's copy.
+Entries are evicted least-recently-used once the cached bodies exceed a
+byte budget.
+Entries also serve as the last good copy while the API is unavailable.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, Optional
+
+from config.settings import settings
+
+
+@dataclass
+class CachedResponse:
+    """Response body plus the validators needed to revalidate it"""
+    payload: Any
+    size: int
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    stored_at: float = field(default_factory=time.time)
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidating this entry"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ConditionalResponseCache:
+    """LRU cache of CachedResponse entries bounded by total body bytes"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._bytes = 0
+
+    @property
+    def size_bytes(self) -> int:
+        """Total size of the cached bodies"""
+        return self._bytes
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        """Return the entry for key and mark it most recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Hashable, entry: CachedResponse) -> None:
+        """Store entry, evicting least recently used entries to stay within budget"""
+        if entry.size > self.max_bytes:
+            self.discard(key)
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+
+    def touch(self, key: Hashable) -> None:
+        """Record a successful revalidation (304) of key"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.stored_at = time.time()
+
+    def discard(self, key: Hashable) -> None:
+        """Drop key from the cache"""
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+_cache: Optional[ConditionalResponseCache] = None
+_stale_cache: Optional[ConditionalResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ConditionalResponseCache:
+    """Return the process-wide conditional-GET cache"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ConditionalResponseCache(settings.API_RESPONSE_CACHE_BYTES)
+    return _cache
+
+
+def get_stale_cache() -> ConditionalResponseCache:
+    """Return the process-wide store of last good responses, served while the API is down"""
+    global _stale_cache
+    if _stale_cache is None:
+        with _cache_lock:
+            if _stale_cache is None:
+                _stale_cache = ConditionalResponseCache(settings.API_STALE_CACHE_BYTES)
+    return _stale_cache
@@ -0,0 +1,591 @@
+"""
+Local stand-in for the corpus API, for offline development, load tests and benchmarks.
+
+Implements the endpoints the front ends use (auth/OTP, categories, users,
+records with search/nearby and search/bbox, chunked upload and contributions)
+on an in-memory store, behind a fault-injection layer that can add latency,
+cap bandwidth in either direction, fail a fraction of calls with 5xx and hang
+others past the client's timeout.
+
+In process:
+
+    with StubCorpusAPI(faults=FaultConfig(latency=0.05)) as stub:
+        requests.get(f"{stub.base_url}/categories/")
+
+As a server (then set API_BASE_URL to the printed URL):
+
+    python -m utils.stub_api --port 8765 --latency 0.05 --error-rate 0.02
+
+The demo account is phone 9999999999 / password "password", and every OTP
+sent by the stub is 123456. Faults can be changed at runtime with
+POST /__stub__/faults (JSON body with FaultConfig fields).
+"""
+
+import argparse
+import hashlib
+import logging
+import math
+import random
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from flask import Flask, jsonify, request
+from werkzeug.serving import make_server
+
+API_PREFIX = "/api/v1"
+CONTROL_PREFIX = "/__stub__"
+MEDIA_TYPES = ("text", "audio", "video", "image", "document")
+STUB_OTP = "123456"
+DEMO_PHONE = "9999999999"
+DEMO_PASSWORD = "password"
+MAX_LIMIT = 1000
+
+SEED_CATEGORIES = (
+    "Stories", "Recipes", "Landmarks", "Folk Songs", "Cultural Practices",
+    "Traditional Arts", "Traditional Games", "Festivals",
+)
+SEED_LANGUAGES = ("telugu", "hindi", "tamil", "bengali", "kannada", "malayalam", "marathi", "english")
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+@dataclass
+class FaultConfig:
+    """Faults injected into every API call (control endpoints are exempt)"""
+    latency: float = 0.0  # seconds added before each response
+    jitter: float = 0.0  # +/- seconds of uniform noise on the latency
+    error_rate: float = 0.0  # fraction of calls answered with a 5xx
+    error_status: int = 503
+    timeout_rate: float = 0.0  # fraction of calls that hang for hang_seconds
+    hang_seconds: float = 30.0
+    download_bps: Optional[float] = None  # response bandwidth cap, bytes/second
+    upload_bps: Optional[float] = None  # request body bandwidth cap, bytes/second
+
+    def update(self, values: Dict) -> None:
+        """Apply the known fields of values in place"""
+        names = {f.name for f in fields(self)}
+        for key, value in values.items():
+            if key in names:
+                setattr(self, key, value)
+
+
+class _ThrottledInput:
+    """wsgi.input wrapper that reads no faster than the upload cap"""
+
+    def __init__(self, stream, faults: FaultConfig):
+        self._stream = stream
+        self._faults = faults
+
+    def _throttle(self, data: bytes) -> bytes:
+        if self._faults.upload_bps and data:
+            time.sleep(len(data) / self._faults.upload_bps)
+        return data
+
+    def read(self, size: int = -1) -> bytes:
+        return self._throttle(self._stream.read(size))
+
+    def readline(self, size: int = -1) -> bytes:
+        return self._throttle(self._stream.readline(size))
+
+    def __iter__(self):
+        return iter(self.readline, b"")
+
+
+class FaultInjector:
+    """WSGI middleware applying a FaultConfig to every API call"""
+
+    def __init__(self, app, faults: FaultConfig, slice_size: int = 16 * 1024):
+        self.app = app
+        self.faults = faults
+        self.slice_size = slice_size
+
+    def __call__(self, environ, start_response):
+        if environ.get("PATH_INFO", "").startswith(CONTROL_PREFIX):
+            return self.app(environ, start_response)
+
+        faults = self.faults
+        delay = faults.latency + (random.uniform(-faults.jitter, faults.jitter) if faults.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+        if faults.timeout_rate and random.random() < faults.timeout_rate:
+            time.sleep(faults.hang_seconds)
+        if faults.error_rate and random.random() < faults.error_rate:
+            body = b'{"detail": "Injected failure"}'
+            start_response(f"{faults.error_status} Injected Failure", [
+                ("Content-Type", "application/json"),
+                ("Content-Length", str(len(body))),
+            ])
+            return [body]
+
+        if faults.upload_bps:
+            environ["wsgi.input"] = _ThrottledInput(environ["wsgi.input"], faults)
+        result = self.app(environ, start_response)
+        if not faults.download_bps:
+            return result
+        return self._throttled(result)
+
+    def _throttled(self, result: Iterable[bytes]) -> Iterable[bytes]:
+        try:
+            for block in result:
+                for start in range(0, len(block), self.slice_size):
+                    piece = block[start:start + self.slice_size]
+                    time.sleep(len(piece) / self.faults.download_bps)
+                    yield piece
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+
+
+class StubStore:
+    """In-memory users, tokens, categories, records and pending chunked uploads"""
+
+    def __init__(self, seed_records: int = 0, keep_uploads: bool = True):
+        self.lock = threading.RLock()
+        # False keeps only chunk sizes, so benchmarks can push gigabytes without the stub holding them
+        self.keep_uploads = keep_uploads
+        self.users: Dict[str, Dict] = {}
+        self.passwords: Dict[str, str] = {}
+        self.tokens: Dict[str, str] = {}
+        self.categories: List[Dict] = [
+            {"id": str(uuid.uuid5(uuid.NAMESPACE_URL, f"stub-category/{name}")), "name": name,
+             "title": name, "description": f"{name} from across India", "published": True, "rank": rank}
+            for rank, name in enumerate(SEED_CATEGORIES)
+        ]
+        self.records: Dict[str, Dict] = {}
+        self.uploads: Dict[str, Dict] = {}
+        self.demo_user = self.create_user(DEMO_PHONE, "Demo User", "demo@example.com", DEMO_PASSWORD)
+        self.seed(seed_records)
+
+    def create_user(self, phone: str, name: str, email: str, password: str) -> Dict:
+        with self.lock:
+            now = _now()
+            user = {
+                "id": str(uuid.uuid4()), "phone": phone, "name": name, "email": email,
+                "gender": None, "date_of_birth": None, "place": None, "is_active": True,
+                "has_given_consent": True, "consent_given_at": now, "last_login_at": None,
+                "created_at": now, "updated_at": now,
+            }
+            self.users[user["id"]] = user
+            self.passwords[phone] = password
+            return user
+
+    def user_by_phone(self, phone: str) -> Optional[Dict]:
+        with self.lock:
+            return next((u for u in self.users.values() if u["phone"] == phone), None)
+
+    def issue_token(self, user: Dict) -> str:
+        with self.lock:
+            token = uuid.uuid4().hex
+            self.tokens[token] = user["id"]
+            user["last_login_at"] = _now()
+            return token
+
+    def add_record(self, **values) -> Dict:
+        with self.lock:
+            now = _now()
+            record = {
+                "title": "", "description": None, "media_type": "text", "file_url": None,
+                "file_name": None, "file_size": 0, "status": "pending", "location": None,
+                "reviewed": False, "reviewed_by": None, "reviewed_at": None,
+                "release_rights": "creator", "language": "telugu", "uid": str(uuid.uuid4()),
+                "user_id": self.demo_user["id"], "category_id": self.categories[0]["id"],
+                "created_at": now, "updated_at": now, "duration_seconds": 0, "file_hash": None,
+            }
+            record.update(values)
+            self.records[record["uid"]] = record
+            return record
+
+    def seed(self, count: int) -> None:
+        """Add count synthetic records spread over categories, languages, media types and India"""
+        rng = random.Random(42)
+        for i in range(count):
+            self.add_record(
+                title=f"Sample record {i}",
+                description=f"Synthetic {rng.choice(SEED_CATEGORIES).lower()} contribution number {i}",
+                media_type=rng.choice(MEDIA_TYPES),
+                language=rng.choice(SEED_LANGUAGES),
+                category_id=rng.choice(self.categories)["id"],
+                file_size=rng.randint(1_000, 5_000_000),
+                location={"latitude": round(rng.uniform(8.0, 32.0), 5), "longitude": round(rng.uniform(69.0, 89.0), 5)},
+            )
+
+
+def _haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance in metres"""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * 6_371_000 * math.asin(math.sqrt(a))
+
+
+def _contribution(record: Dict) -> Dict:
+    """Shape a record like an entry of /users/{id}/contributions"""
+    return {
+        "id": record["uid"], "size": record["file_size"], "category_id": record["category_id"],
+        "reviewed": record["reviewed"], "title": record["title"], "description": record["description"],
+        "duration": record["duration_seconds"], "timestamp": record["created_at"],
+        "location": record["location"], "release_rights": record["release_rights"],
+        "language": record["language"], "file_hash": record["file_hash"], "snr_frequency": 0,
+    }
+
+
+def create_stub_app(store: StubStore, faults: FaultConfig) -> Flask:
+    """Build the Flask app serving the stub API"""
+    app = Flask("stub_corpus_api")
+
+    def error(status: int, detail: str):
+        return jsonify({"detail": detail}), status
+
+    def current_user() -> Optional[Dict]:
+        header = request.headers.get("Authorization", "")
+        token = header[7:] if header.startswith("Bearer ") else None
+        with store.lock:
+            user_id = store.tokens.get(token) if token else None
+            return store.users.get(user_id) if user_id else None
+
+    def paginate(items: List[Dict]):
+        try:
+            skip = int(request.args.get("skip", 0))
+            limit = int(request.args.get("limit", 100))
+        except ValueError:
+            return None, error(422, "skip and limit must be integers")
+        if skip < 0 or not 1 <= limit <= MAX_LIMIT:
+            return None, error(422, f"limit must be between 1 and {MAX_LIMIT}")
+        return items[skip:skip + limit], None
+
+    def filtered_records() -> List[Dict]:
+        args = request.args
+        with store.lock:
+            records = list(store.records.values())
+        for field in ("category_id", "user_id", "media_type"):
+            if args.get(field):
+                records = [r for r in records if r[field] == args[field]]
+        return records
+
+    @app.after_request
+    def conditional(response):
+        # Mirror the real API's validators so conditional GETs can be exercised offline
+        if request.method == "GET" and response.status_code == 200 and response.is_json:
+            response.add_etag()
+            response.make_conditional(request)
+        return response
+
+    # --- Control ---------------------------------------------------------
+    @app.route(f"{CONTROL_PREFIX}/faults", methods=["GET", "POST"])
+    def stub_faults():
+        if request.method == "POST":
+            faults.update(request.get_json(force=True) or {})
+        return jsonify(asdict(faults))
+
+    @app.route(f"{CONTROL_PREFIX}/health")
+    def stub_health():
+        with store.lock:
+            return jsonify({"records": len(store.records), "pending_uploads": len(store.uploads)})
+
+    # --- Auth ------------------------------------------------------------
+    @app.route(f"{API_PREFIX}/auth/login", methods=["POST"])
+    def login():
+        body = request.get_json(silent=True) or {}
+        user = store.user_by_phone(body.get("phone", ""))
+        if user is None or store.passwords.get(user["phone"]) != body.get("password"):
+            return error(401, "Incorrect phone number or password")
+        return jsonify({"access_token": store.issue_token(user), "token_type": "bearer"})
+
+    @app.route(f"{API_PREFIX}/auth/me")
+    def me():
+        user = current_user()
+        return jsonify(user) if user else error(401, "Not authenticated")
+
+    @app.route(f"{API_PREFIX}/auth/<flow>/send-otp", methods=["POST"])
+    @app.route(f"{API_PREFIX}/auth/<flow>/resend-otp", methods=["POST"])
+    @app.route(f"{API_PREFIX}/auth/forgot-password/init", methods=["POST"], defaults={"flow": "forgot-password"})
+    def send_otp(flow):
+        phone = (request.get_json(silent=True) or {}).get("phone_number")
+        if not phone:
+            return error(422, "phone_number is required")
+        if flow in ("login", "forgot-password") and store.user_by_phone(phone) is None:
+            return error(404, "User not found")
+        return jsonify({"status": "success", "message": "OTP sent", "reference_id": uuid.uuid4().hex})
+
+    @app.route(f"{API_PREFIX}/auth/login/verify-otp", methods=["POST"])
+    def verify_login_otp():
+        body = request.get_json(silent=True) or {}
+        user = store.user_by_phone(body.get("phone_number", ""))
+        if user is None or body.get("otp_code") != STUB_OTP:
+            return error(400, "Invalid OTP")
+        return jsonify({"access_token": store.issue_token(user), "token_type": "bearer",
+                        "user_id": user["id"], "phone_number": user["phone"], "roles": []})
+
+    @app.route(f"{API_PREFIX}/auth/signup/verify-otp", methods=["POST"])
+    def verify_signup_otp():
+        body = request.get_json(silent=True) or {}
+        phone = body.get("phone_number", "")
+        if body.get("otp_code") != STUB_OTP:
+            return error(400, "Invalid OTP")
+        if store.user_by_phone(phone) is not None:
+            return error(400, "User already exists")
+        user = store.create_user(phone, body.get("name", ""), body.get("email", ""), body.get("password", ""))
+        return jsonify({"status": "success", "message": "User created", "user_id": user["id"]})
+
+    @app.route(f"{API_PREFIX}/auth/forgot-password/confirm", methods=["POST"])
+    def confirm_password_reset():
+        body = request.get_json(silent=True) or {}
+        user = store.user_by_phone(body.get("phone_number", ""))
+        if user is None or body.get("otp_code") != STUB_OTP:
+            return error(400, "Invalid OTP")
+        store.passwords[user["phone"]] = body.get("new_password", "")
+        return jsonify({"message": "Password reset successfully"})
+
+    @app.route(f"{API_PREFIX}/auth/change-password", methods=["POST"])
+    def change_password():
+        user = current_user()
+        if user is None:
+            return error(401, "Not authenticated")
+        body = request.get_json(silent=True) or {}
+        if store.passwords.get(user["phone"]) != body.get("current_password"):
+            return error(400, "Current password is incorrect")
+        store.passwords[user["phone"]] = body.get("new_password", "")
+        return jsonify({"message": "Password changed successfully"})
+
+    # --- Categories and users --------------------------------------------
+    @app.route(f"{API_PREFIX}/categories/")
+    def categories():
+        return jsonify(store.categories)
+
+    @app.route(f"{API_PREFIX}/categories/<category_id>")
+    def category(category_id):
+        found = next((c for c in store.categories if c["id"] == category_id), None)
+        return jsonify(found) if found else error(404, "Category not found")
+
+    @app.route(f"{API_PREFIX}/users/")
+    def users():
+        with store.lock:
+            page, failure = paginate(list(store.users.values()))
+        return failure or jsonify(page)
+
+    @app.route(f"{API_PREFIX}/users/<user_id>")
+    def user(user_id):
+        with store.lock:
+            found = store.users.get(user_id)
+        return jsonify(found) if found else error(404, "User not found")
+
+    @app.route(f"{API_PREFIX}/users/<user_id>/contributions")
+    def contributions(user_id):
+        if current_user() is None:
+            return error(401, "Not authenticated")
+        with store.lock:
+            mine = [r for r in store.records.values() if r["user_id"] == user_id]
+        body = {
+            "user_id": user_id,
+            "total_contributions": len(mine),
+            "contributions_by_media_type": {m: sum(r["media_type"] == m for r in mine) for m in MEDIA_TYPES},
+            "audio_duration": sum(r["duration_seconds"] for r in mine if r["media_type"] == "audio"),
+            "video_duration": sum(r["duration_seconds"] for r in mine if r["media_type"] == "video"),
+        }
+        for media_type in MEDIA_TYPES:
+            body[f"{media_type}_contributions"] = [_contribution(r) for r in mine if r["media_type"] == media_type]
+        return jsonify(body)
+
+    @app.route(f"{API_PREFIX}/users/<user_id>/contributions/<media_type>")
+    def contributions_by_media(user_id, media_type):
+        if current_user() is None:
+            return error(401, "Not authenticated")
+        if media_type not in MEDIA_TYPES:
+            return error(422, f"media_type must be one of {', '.join(MEDIA_TYPES)}")
+        with store.lock:
+            mine = [_contribution(r) for r in store.records.values()
+                    if r["user_id"] == user_id and r["media_type"] == media_type]
+        return jsonify({"user_id": user_id, "total_contributions": len(mine), "contributions": mine})
+
+    # --- Records and search ----------------------------------------------
+    @app.route(f"{API_PREFIX}/records/")
+    def records():
+        page, failure = paginate(filtered_records())
+        return failure or jsonify(page)
+
+    @app.route(f"{API_PREFIX}/records/<record_id>")
+    def record(record_id):
+        with store.lock:
+            found = store.records.get(record_id)
+        return jsonify(found) if found else error(404, "Record not found")
+
+    @app.route(f"{API_PREFIX}/records/search/nearby")
+    def search_nearby():
+        try:
+            lat = float(request.args["latitude"])
+            lng = float(request.args["longitude"])
+            radius = float(request.args["distance_meters"])
+        except (KeyError, ValueError):
+            return error(422, "latitude, longitude and distance_meters are required numbers")
+        if radius > 50_000:
+            return error(422, "distance_meters must be at most 50000")
+        hits = [r for r in filtered_records() if r["location"]
+                and _haversine_m(lat, lng, r["location"]["latitude"], r["location"]["longitude"]) <= radius]
+        page, failure = paginate(hits)
+        return failure or jsonify(page)
+
+    @app.route(f"{API_PREFIX}/records/search/bbox")
+    def search_bbox():
+        try:
+            min_lat, min_lng = float(request.args["min_lat"]), float(request.args["min_lng"])
+            max_lat, max_lng = float(request.args["max_lat"]), float(request.args["max_lng"])
+        except (KeyError, ValueError):
+            return error(422, "min_lat, min_lng, max_lat and max_lng are required numbers")
+        hits = [r for r in filtered_records() if r["location"]
+                and min_lat <= r["location"]["latitude"] <= max_lat
+                and min_lng <= r["location"]["longitude"] <= max_lng]
+        page, failure = paginate(hits)
+        return failure or jsonify(page)
+
+    # --- Chunked upload --------------------------------------------------
+    @app.route(f"{API_PREFIX}/records/upload/chunk", methods=["POST"])
+    def upload_chunk():
+        if current_user() is None:
+            return error(401, "Not authenticated")
+        chunk = request.files.get("chunk")
+        form = request.form
+        try:
+            index, total = int(form["chunk_index"]), int(form["total_chunks"])
+            upload_uuid, filename = form["upload_uuid"], form["filename"]
+        except (KeyError, ValueError):
+            return error(422, "chunk, filename, chunk_index, total_chunks and upload_uuid are required")
+        if chunk is None or not 0 <= index < total:
+            return error(422, "chunk is required and chunk_index must be below total_chunks")
+        data = chunk.read()
+        with store.lock:
+            upload = store.uploads.setdefault(upload_uuid, {"filename": filename, "chunks": {}})
+            upload["chunks"][index] = data if store.keep_uploads else len(data)
+            upload["total_chunks"] = total
+        return jsonify({"message": "Chunk uploaded", "upload_uuid": upload_uuid,
+                        "chunk_index": index, "size": len(data)})
+
+    @app.route(f"{API_PREFIX}/records/upload", methods=["POST"])
+    def upload_record():
+        if current_user() is None:
+            return error(401, "Not authenticated")
+        form = request.form
+        required = ("title", "category_id", "user_id", "media_type", "upload_uuid",
+                    "filename", "total_chunks", "release_rights", "language")
+        missing = [name for name in required if not form.get(name)]
+        if missing:
+            return error(422, f"Missing fields: {', '.join(missing)}")
+        if form["media_type"] not in MEDIA_TYPES:
+            return error(422, f"media_type must be one of {', '.join(MEDIA_TYPES)}")
+        total = int(form["total_chunks"])
+        with store.lock:
+            upload = store.uploads.get(form["upload_uuid"])
+            received = set(upload["chunks"]) if upload else set()
+            if received != set(range(total)):
+                missing_chunks = sorted(set(range(total)) - received)
+                return error(400, f"Upload incomplete: missing chunks {missing_chunks[:20]}")
+            del store.uploads[form["upload_uuid"]]
+
+        chunks = [upload["chunks"][i] for i in range(total)]
+        if store.keep_uploads:
+            content = b"".join(chunks)
+            file_size, file_hash = len(content), hashlib.sha256(content).hexdigest()
+        else:
+            file_size, file_hash = sum(chunks), None
+        location = None
+        if form.get("latitude") and form.get("longitude"):
+            location = {"latitude": float(form["latitude"]), "longitude": float(form["longitude"])}
+        record = store.add_record(
+            title=form["title"], description=form.get("description"), media_type=form["media_type"],
+            file_name=form["filename"], file_size=file_size, location=location,
+            release_rights=form["release_rights"], language=form["language"],
+            user_id=form["user_id"], category_id=form["category_id"],
+            file_hash=file_hash,
+        )
+        if form.get("use_uid_filename", "").lower() == "true":
+            record["file_name"] = record["uid"]
+        record["file_url"] = f"{request.host_url.rstrip('/')}{API_PREFIX}/records/{record['uid']}"
+        return jsonify(record), 201
+
+    return app
+
+
+class StubCorpusAPI:
+    """Run the stub API on a background thread"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 faults: Optional[FaultConfig] = None, seed_records: int = 0, quiet: bool = True,
+                 keep_uploads: bool = True):
+        if quiet:
+            # Per-request access logs would drown out load-test output
+            logging.getLogger("werkzeug").setLevel(logging.WARNING)
+        self.faults = faults or FaultConfig()
+        self.store = StubStore(seed_records=seed_records, keep_uploads=keep_uploads)
+        self.app = create_stub_app(self.store, self.faults)
+        self._server = make_server(host, port, FaultInjector(self.app, self.faults), threaded=True)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def origin(self) -> str:
+        """Scheme, host and port, e.g. for SwechaAPIClient's API_BASE_URL"""
+        return f"http://{self._server.host}:{self._server.port}"
+
+    @property
+    def base_url(self) -> str:
+        """Origin plus /api/v1, e.g. for the front ends' API_BASE_URL"""
+        return f"{self.origin}{API_PREFIX}"
+
+    def start(self) -> "StubCorpusAPI":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True, name="stub-corpus-api")
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve on the calling thread until interrupted"""
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubCorpusAPI":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the corpus API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed-records", type=int, default=0, help="synthetic records to preload")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every call")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds of latency noise")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls failing with 5xx")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="fraction of calls that hang")
+    parser.add_argument("--hang-seconds", type=float, default=30.0)
+    parser.add_argument("--download-bps", type=float, default=None, help="response bandwidth cap (bytes/s)")
+    parser.add_argument("--upload-bps", type=float, default=None, help="request bandwidth cap (bytes/s)")
+    parser.add_argument("--discard-uploads", action="store_true",
+                        help="keep only the sizes of uploaded chunks (records get no file_hash)")
+    args = parser.parse_args()
+
+    faults = FaultConfig(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        error_status=args.error_status, timeout_rate=args.timeout_rate, hang_seconds=args.hang_seconds,
+        download_bps=args.download_bps, upload_bps=args.upload_bps,
+    )
+    stub = StubCorpusAPI(args.host, args.port, faults, args.seed_records, quiet=False,
+                         keep_uploads=not args.discard_uploads)
+    print(f"🧪 Stub corpus API listening on {stub.base_url}")
+    print(f"   Demo login: {DEMO_PHONE} / {DEMO_PASSWORD}, OTP {STUB_OTP}")
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stub stopped")
+
+
+if __name__ == "__main__":
+    main()
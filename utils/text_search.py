@@ -0,0 +1,86 @@
+"""
+Text normalisation and query parsing for searching records in Indic scripts.
+
+The same Telugu, Hindi, Tamil or Bengali word can reach us as different
+code point sequences: a vowel sign typed as one precomposed character or as
+its two parts, a nukta letter as one character or as letter plus nukta,
+conjuncts with or without a zero-width joiner/non-joiner, Malayalam chillus
+in their old ZWJ spelling, and numbers in native or ASCII digits.
+normalize_text folds all of these to one form (NFKC, joiners removed,
+chillus atomic, digits ASCII, case folded), and is applied to both indexed
+text and queries so they compare equal.
+
+SQLite's default unicode61 tokenizer treats combining marks as separators,
+which splits Indic words at every vowel sign and virama. FTS_TOKENIZER adds
+the mark categories to the token characters so words stay whole, and
+search_terms splits text along the same lines.
+"""
+
+import re
+import unicodedata
+from typing import List
+
+# Bump when normalize_text changes, so stored search indexes are rebuilt
+NORMALIZATION_VERSION = 1
+
+# FTS5 tokenizer matching search_terms: letters, digits, private use and combining marks
+FTS_TOKENIZER = "unicode61 remove_diacritics 2 categories 'L* N* Co M*'"
+
+# Zero-width characters whose presence depends on the keyboard, not the word
+_INVISIBLE = dict.fromkeys(map(ord, "\u200b\u200c\u200d\u00ad\ufeff\u2060"))
+
+# Malayalam chillus written as consonant + virama + ZWJ, and their atomic letters
+_CHILLUS = {
+    "\u0d23\u0d4d\u200d": "\u0d7a", "\u0d28\u0d4d\u200d": "\u0d7b", "\u0d30\u0d4d\u200d": "\u0d7c",
+    "\u0d32\u0d4d\u200d": "\u0d7d", "\u0d33\u0d4d\u200d": "\u0d7e",
+}
+_CHILLU_PATTERN = re.compile("|".join(_CHILLUS))
+
+
+def _digit_table() -> dict:
+    # Decimal digits of the Indic blocks (Devanagari to Malayalam) as ASCII digits
+    table = {}
+    for code in range(0x0900, 0x0D80):
+        digit = unicodedata.decimal(chr(code), None)
+        if digit is not None:
+            table[code] = str(digit)
+    return table
+
+
+_DIGITS = _digit_table()
+
+
+def normalize_text(text) -> str:
+    """Fold text to the form stored in and matched against the search index"""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", str(text))
+    text = _CHILLU_PATTERN.sub(lambda match: _CHILLUS[match.group(0)], text)
+    return text.translate(_INVISIBLE).translate(_DIGITS).casefold()
+
+
+def _is_token_char(char: str) -> bool:
+    return unicodedata.category(char)[0] in "LNM" or unicodedata.category(char) == "Co"
+
+
+def search_terms(text) -> List[str]:
+    """Normalised words of text, split as the FTS tokenizer splits them"""
+    terms, current = [], []
+    for char in normalize_text(text):
+        if _is_token_char(char):
+            current.append(char)
+        elif current:
+            terms.append("".join(current))
+            current = []
+    if current:
+        terms.append("".join(current))
+    return terms
+
+
+def match_expression(query: str) -> str:
+    """FTS5 MATCH expression requiring every word of query, each as a prefix; empty if query has no words
+
+    Words are quoted, so FTS5 operators and punctuation typed by users are
+    matched as text rather than parsed.
+    """
+    return " ".join('"{}"*'.format(term.replace('"', '""')) for term in search_terms(query))
@@ -0,0 +1,568 @@
+"""
+Upload throughput benchmark against the local stub API.
+
+Runs the upload paths the front ends use against utils/stub_api.py, started
+in a child process with the requested latency, bandwidth cap and error
+rate:
+
+- content: the Streamlit app's submit_content_chunk (text typed into the form)
+- file: the Streamlit app's submit_file_content (an attached file)
+- client: SwechaAPIClient.upload_file, i.e. upload_file_chunk per chunk,
+  then finalize_record_upload
+
+Every combination of path, file size, chunk size, upload window and
+concurrency is a scenario. Each scenario runs in a fresh process, so its
+peak RSS and the adaptive chunk sizer's throughput estimate are its own.
+The report gives MB/s, p50/p95/p99 time from the first chunk to the
+finalized record, peak RSS (and, on Linux, peak RSS excluding memory-mapped
+source files), chunk retries and failures per scenario. It is
+written as JSON; --compare prints the change against an earlier report.
+
+    python benchmark_uploads.py --sizes 10KB,10MB,1GB --chunk-sizes adaptive,1MB,5MB \\
+        --concurrency 1,4 --latency 0.05 --upload-bps 12500000
+
+Sizes up to 1 MB are text; larger files are audio up to 50 MB and video
+beyond, which only affects the media_type sent at finalize. The content
+path only runs for text.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from io import FileIO
+from multiprocessing import get_context
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+from config.settings import settings
+from utils.image_pipeline import format_size
+from utils.metrics import get_metrics, normalize_endpoint
+from utils.stub_api import API_PREFIX, CONTROL_PREFIX, DEMO_PASSWORD, DEMO_PHONE, FaultConfig
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS is not reported
+    resource = None
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PATHS = ("content", "file", "client")
+MB = 1024 * 1024
+UNITS = {"B": 1, "KB": 1024, "MB": MB, "GB": 1024 * MB}
+# Errors kept per scenario in the report
+MAX_ERRORS = 5
+
+TEXT_LINE = b"Once upon a time, in a village on the banks of the Godavari, the elders told this story.\n"
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """One benchmarked combination of upload path and parameters"""
+    path: str
+    size: int
+    chunk_size: Optional[int]  # None: adaptive, starting from UPLOAD_CHUNK_SIZE
+    window: int
+    concurrency: int
+    iterations: int
+
+    @property
+    def name(self) -> str:
+        chunks = "adaptive" if self.chunk_size is None else format_size(self.chunk_size)
+        return (f"{self.path} {format_size(self.size)} chunks={chunks} "
+                f"window={self.window} concurrency={self.concurrency}")
+
+    @property
+    def media_type(self) -> str:
+        return media_for_size(self.size)[0]
+
+
+def media_for_size(size: int) -> "tuple[str, str]":
+    """(media_type, extension) of the synthetic file of a given size"""
+    if size <= MB:
+        return "text", "txt"
+    if size <= 50 * MB:
+        return "audio", "mp3"
+    return "video", "mp4"
+
+
+def parse_size(text: str) -> int:
+    """Bytes in a size such as '10KB', '1.5MB' or '1GB' (1024-based)"""
+    text = text.strip().upper()
+    for unit in sorted(UNITS, key=len, reverse=True):
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * UNITS[unit])
+    return int(text)
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """q-th quantile (0..1) of values by linear interpolation; None when empty"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def peak_rss() -> Optional[int]:
+    """Peak resident set size of this process in bytes"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def anonymous_rss() -> Optional[int]:
+    """Resident bytes not backed by a file (Linux only)
+
+    Peak RSS also counts the pages of memory-mapped upload sources, which are
+    page cache the kernel can drop at any time; this is the memory the
+    upload itself holds.
+    """
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("RssAnon:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+class AnonymousRssSampler:
+    """Track the highest anonymous RSS seen while running, sampling every interval seconds"""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak = anonymous_rss()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True, name="rss-sampler")
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            value = anonymous_rss()
+            if value is not None and value > (self.peak or 0):
+                self.peak = value
+
+    def __enter__(self) -> "AnonymousRssSampler":
+        if self.peak is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+
+def make_source(directory: str, size: int) -> str:
+    """Write (once) a synthetic file of size bytes and return its path"""
+    media_type, extension = media_for_size(size)
+    path = os.path.join(directory, f"source-{size}.{extension}")
+    if os.path.exists(path) and os.path.getsize(path) == size:
+        return path
+    if media_type == "text":
+        block = TEXT_LINE * (MB // len(TEXT_LINE) + 1)
+    else:
+        block = random.Random(size).randbytes(MB)
+    with open(path, "wb") as f:
+        remaining = size
+        while remaining:
+            written = f.write(block[:min(remaining, len(block))])
+            remaining -= written
+    return path
+
+
+class BenchmarkFile(FileIO):
+    """A file on disk with the name/type/size attributes of a Streamlit UploadedFile"""
+
+    def __init__(self, path: str, content_type: str):
+        super().__init__(path, "rb")
+        self.type = content_type
+        self.size = os.path.getsize(path)
+
+
+class UploadFailed(RuntimeError):
+    """An upload path reported failure"""
+
+
+def _quiet_streamlit() -> None:
+    # Outside `streamlit run` every st.* call warns about the missing script context.
+    # The config is parsed first, as parsing it resets the log level.
+    import streamlit.logger
+    from streamlit import config
+    config.get_config_options()
+    streamlit.logger.set_log_level("error")
+
+
+def _load_streamlit_app():
+    """Import src/app.py as a module, in Streamlit's bare mode"""
+    _quiet_streamlit()
+    spec = importlib.util.spec_from_file_location("benchmark_streamlit_app", os.path.join(ROOT_DIR, "src", "app.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _login(api_url: str) -> Dict[str, str]:
+    """Token, user id and a category id for the stub's demo account"""
+    response = requests.post(f"{api_url}/auth/login", json={"phone": DEMO_PHONE, "password": DEMO_PASSWORD}, timeout=30)
+    response.raise_for_status()
+    token = response.json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    user = requests.get(f"{api_url}/auth/me", headers=headers, timeout=30).json()
+    categories = requests.get(f"{api_url}/categories/", headers=headers, timeout=30).json()
+    return {"token": token, "user_id": str(user["id"]), "category_id": str(categories[0]["id"])}
+
+
+def _set_faults(api_origin: str, faults: Dict[str, Any]) -> None:
+    requests.post(f"{api_origin}{CONTROL_PREFIX}/faults", json=faults, timeout=30).raise_for_status()
+
+
+def _uploader(scenario: Scenario, source_path: str, auth: Dict[str, str]) -> Callable[[int], None]:
+    """Return upload(i), which runs iteration i of the scenario's path and raises UploadFailed"""
+    media_type, extension = media_for_size(scenario.size)
+    content_type = {"text": "text/plain", "audio": "audio/mpeg", "video": "video/mp4"}[media_type]
+    description = "Benchmark upload of synthetic content"
+    run_id = f"{os.getpid()}-{int(time.time())}"
+
+    if scenario.path == "client":
+        from utils.api_client import SwechaAPIClient
+        _quiet_streamlit()
+
+        def upload(i: int) -> None:
+            client = SwechaAPIClient()
+            client.set_auth_token(auth["token"])
+            filename = f"benchmark-{run_id}-{i}.{extension}"
+            with open(source_path, "rb") as f:
+                result = client.upload_file(f, filename)
+            if result is None:
+                raise UploadFailed("upload_file returned no result")
+            record = client.finalize_record_upload(
+                title=f"Benchmark {run_id} {i}", description=description, media_type=media_type,
+                filename=filename, total_chunks=result.total_chunks,
+                release_rights=next(iter(settings.RELEASE_RIGHTS_MAPPING.values())),
+                language=next(iter(settings.LANGUAGE_MAPPING.values())),
+                upload_uuid=result.upload_uuid, user_id=auth["user_id"], category_id=auth["category_id"],
+            )
+            if record is None:
+                raise UploadFailed("finalize_record_upload returned no record")
+        return upload
+
+    app = _load_streamlit_app()
+    app.st.session_state.access_token = auth["token"]
+    app.st.session_state.user_data = {"id": auth["user_id"]}
+    text = None
+    if scenario.path == "content":
+        with open(source_path, encoding="utf-8") as f:
+            text = f.read()
+
+    def upload(i: int) -> None:
+        data = {
+            "title": f"Benchmark {run_id} {i}",
+            "category_id": auth["category_id"],
+            "media_type": media_type,
+            "release_rights": next(iter(settings.RELEASE_RIGHTS_MAPPING)),
+            "language": next(iter(settings.LANGUAGE_MAPPING)),
+        }
+        if scenario.path == "content":
+            success, message = app.submit_content_chunk(data, text)
+        else:
+            with BenchmarkFile(source_path, content_type) as f:
+                success, message = app.submit_file_content(data, f, description)
+        if not success:
+            raise UploadFailed(message)
+    return upload
+
+
+def run_scenario(scenario: Scenario, api_origin: str, source_path: str, work_dir: str,
+                 faults: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one scenario in this (fresh) process and return its measurements"""
+    api_url = f"{api_origin}{API_PREFIX}"
+    # src/app.py reads API_BASE_URL with the /api/v1 prefix, settings without it
+    os.environ["API_BASE_URL"] = api_url
+    settings.API_BASE_URL = api_origin
+    settings.UPLOAD_ADAPTIVE = scenario.chunk_size is None
+    settings.UPLOAD_CHUNK_SIZE = scenario.chunk_size or settings.UPLOAD_CHUNK_SIZE
+    settings.UPLOAD_WINDOW = scenario.window
+    settings.UPLOAD_JOURNAL_PATH = os.path.join(work_dir, f"journal-{os.getpid()}.sqlite3")
+    settings.METRICS_ENABLED = True
+
+    auth = _login(api_url)
+    upload = _uploader(scenario, source_path, auth)
+    get_metrics().reset()
+    baseline_rss = peak_rss()
+
+    durations: List[float] = []
+    errors: List[str] = []
+    lock = threading.Lock()
+
+    def timed(i: int) -> None:
+        start = time.perf_counter()
+        try:
+            upload(i)
+        except Exception as e:
+            with lock:
+                errors.append(f"{type(e).__name__}: {e}")
+            return
+        with lock:
+            durations.append(time.perf_counter() - start)
+
+    _set_faults(api_origin, faults)
+    try:
+        started = time.perf_counter()
+        with AnonymousRssSampler() as anonymous, \
+                ThreadPoolExecutor(max_workers=scenario.concurrency, thread_name_prefix="benchmark") as executor:
+            list(executor.map(timed, range(scenario.iterations)))
+        wall = time.perf_counter() - started
+    finally:
+        _set_faults(api_origin, asdict(FaultConfig()))
+
+    metrics = get_metrics()
+    uploads = metrics.upload_summary()
+    endpoints = metrics.summary()
+    chunk_endpoint = normalize_endpoint(f"{API_PREFIX}/records/upload/chunk")
+    chunk_calls = sum(row["calls"] for row in endpoints if row["endpoint"] == chunk_endpoint)
+    uploaded = len(durations) * scenario.size
+    peak = peak_rss()
+    return {
+        "scenario": scenario.name,
+        **asdict(scenario),
+        "media_type": scenario.media_type,
+        "uploads": len(durations),
+        "failed": len(errors),
+        "bytes": uploaded,
+        "wall_seconds": round(wall, 3),
+        "mb_per_s": round(uploaded / MB / wall, 3) if wall > 0 else None,
+        "time_to_finalize": {
+            "p50": _rounded(percentile(durations, 0.5)),
+            "p95": _rounded(percentile(durations, 0.95)),
+            "p99": _rounded(percentile(durations, 0.99)),
+            "max": _rounded(max(durations) if durations else None),
+        },
+        "peak_rss_mb": round(peak / MB, 1) if peak else None,
+        "baseline_rss_mb": round(baseline_rss / MB, 1) if baseline_rss else None,
+        "peak_anonymous_rss_mb": round(anonymous.peak / MB, 1) if anonymous.peak else None,
+        "chunk_requests": chunk_calls,
+        "mean_chunk_bytes": uploads["mean_chunk_bytes"],
+        "chunk_retries": uploads["chunk_retries"],
+        "transport_retries": sum(row["retries"] for row in endpoints),
+        "errors": errors[:MAX_ERRORS],
+    }
+
+
+def _rounded(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 3)
+
+
+class StubServer:
+    """utils/stub_api.py in a child process, so its memory is not counted against the client"""
+
+    def __init__(self, port: Optional[int] = None):
+        self.port = port or _free_port()
+        self.origin = f"http://127.0.0.1:{self.port}"
+        self._process: Optional[subprocess.Popen] = None
+
+    def start(self) -> "StubServer":
+        self._process = subprocess.Popen(
+            [sys.executable, "-m", "utils.stub_api", "--port", str(self.port), "--discard-uploads"],
+            cwd=ROOT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                if requests.get(f"{self.origin}{CONTROL_PREFIX}/health", timeout=1).status_code == 200:
+                    return self
+            except requests.RequestException:
+                pass
+            if self._process.poll() is not None:
+                break
+            time.sleep(0.2)
+        self.stop()
+        raise RuntimeError("The stub API did not start")
+
+    def stop(self) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            self._process.wait(timeout=10)
+            self._process = None
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_scenarios(paths: List[str], sizes: List[int], chunk_sizes: List[Optional[int]], windows: List[int],
+                    concurrency: List[int], iterations: int) -> List[Scenario]:
+    """Every combination, skipping the content path for files that are not text"""
+    return [
+        Scenario(path, size, chunk_size, window, workers, iterations)
+        for size in sizes
+        for path in paths
+        if path != "content" or media_for_size(size)[0] == "text"
+        for chunk_size in chunk_sizes
+        for window in windows
+        for workers in concurrency
+    ]
+
+
+def run_benchmark(scenarios: List[Scenario], api_origin: str, work_dir: str, faults: Dict[str, Any],
+                  report: Callable[[str], None] = print) -> List[Dict[str, Any]]:
+    """Run each scenario in its own process and return the results in order"""
+    sources = {size: make_source(work_dir, size) for size in sorted({s.size for s in scenarios})}
+    results = []
+    for n, scenario in enumerate(scenarios, 1):
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            result = pool.submit(run_scenario, scenario, api_origin, sources[scenario.size], work_dir, faults).result()
+        results.append(result)
+        report(f"[{n}/{len(scenarios)}] {format_result(result)}")
+    return results
+
+
+def format_result(result: Dict[str, Any]) -> str:
+    status = "✅" if not result["failed"] else "⚠️ "
+    p95 = result["time_to_finalize"]["p95"]
+    peak, anonymous = result["peak_rss_mb"], result["peak_anonymous_rss_mb"]
+    rss = "-" if peak is None else f"{peak:.0f} MB"
+    if anonymous is not None:
+        rss += f" ({anonymous:.0f} MB anonymous)"
+    return (f"{status} {result['scenario']}: {result['mb_per_s'] or 0:.1f} MB/s, "
+            f"p95 {'-' if p95 is None else f'{p95:.2f}s'}, peak RSS {rss}, "
+            f"{result['chunk_retries']} retries, {result['failed']} failed")
+
+
+def compare(previous: Dict[str, Any], current: Dict[str, Any], report: Callable[[str], None] = print) -> None:
+    """Print MB/s and p95 changes for scenarios present in both reports"""
+    before = {r["scenario"]: r for r in previous.get("results", [])}
+    report(f"Compared with {previous.get('created_at')} ({previous.get('git_commit') or 'unknown commit'}):")
+    matched = 0
+    for result in current["results"]:
+        old = before.get(result["scenario"])
+        if old is None:
+            continue
+        matched += 1
+        line = f"  {result['scenario']}: "
+        if old.get("mb_per_s") and result.get("mb_per_s") is not None:
+            line += f"MB/s {old['mb_per_s']:.1f} → {result['mb_per_s']:.1f} ({result['mb_per_s'] / old['mb_per_s'] - 1:+.0%})"
+        old_p95, new_p95 = old["time_to_finalize"]["p95"], result["time_to_finalize"]["p95"]
+        if old_p95 and new_p95 is not None:
+            line += f", p95 {old_p95:.2f}s → {new_p95:.2f}s ({new_p95 / old_p95 - 1:+.0%})"
+        report(line)
+    if not matched:
+        report("  no scenarios in common")
+
+
+def _list(parse: Callable[[str], Any]) -> Callable[[str], List[Any]]:
+    return lambda text: [parse(item) for item in text.split(",") if item.strip()]
+
+
+def _chunk_size(text: str) -> Optional[int]:
+    return None if text.strip().lower() == "adaptive" else parse_size(text)
+
+
+def _path(text: str) -> str:
+    text = text.strip()
+    if text not in PATHS:
+        raise argparse.ArgumentTypeError(f"path must be one of {', '.join(PATHS)}")
+    return text
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the upload paths against the local stub API")
+    parser.add_argument("--paths", type=_list(_path), default=list(PATHS), help="comma-separated: content, file, client")
+    parser.add_argument("--sizes", type=_list(parse_size), default=_list(parse_size)("10KB,1MB,25MB,100MB"),
+                        help="comma-separated file sizes, e.g. 10KB,100MB,1GB")
+    parser.add_argument("--chunk-sizes", type=_list(_chunk_size), default=[None, MB, 5 * MB],
+                        help="comma-separated first chunk sizes; 'adaptive' sizes later chunks from throughput")
+    parser.add_argument("--windows", type=_list(int), default=[settings.UPLOAD_WINDOW], help="chunks of one file in flight")
+    parser.add_argument("--concurrency", type=_list(int), default=[1, 4], help="uploads running at once")
+    parser.add_argument("--iterations", type=int, default=5, help="uploads per scenario")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds the stub adds to every call")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds of latency noise")
+    parser.add_argument("--upload-bps", type=float, default=None, help="per-request upload bandwidth cap (bytes/s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls failing with 5xx")
+    parser.add_argument("--api-url", help="origin of an already running stub API instead of starting one")
+    parser.add_argument("--work-dir", help="where source files and journals go (default: a temporary folder)")
+    parser.add_argument("--output", help="JSON report (default: upload-benchmark-<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier JSON report to compare against")
+    args = parser.parse_args(argv)
+
+    scenarios = build_scenarios(args.paths, args.sizes, args.chunk_sizes, args.windows, args.concurrency,
+                                args.iterations)
+    if not scenarios:
+        parser.error("no scenarios: the content path only runs for text sizes (1 MB or less)")
+    faults = asdict(FaultConfig(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                                upload_bps=args.upload_bps))
+    output = args.output or f"upload-benchmark-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    print(f"🏎️  {len(scenarios)} scenarios, {args.iterations} uploads each")
+
+    stub = None
+    temp_dir = None
+    try:
+        if args.api_url:
+            api_origin = args.api_url.rstrip("/").removesuffix(API_PREFIX)
+        else:
+            stub = StubServer().start()
+            api_origin = stub.origin
+        if args.work_dir:
+            os.makedirs(args.work_dir, exist_ok=True)
+            work_dir = args.work_dir
+        else:
+            temp_dir = tempfile.TemporaryDirectory(prefix="upload-benchmark-")
+            work_dir = temp_dir.name
+        results = run_benchmark(scenarios, api_origin, work_dir, faults)
+    finally:
+        if stub is not None:
+            stub.stop()
+        if temp_dir is not None:
+            temp_dir.cleanup()
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "cpus": os.cpu_count()},
+        "stub": {"api": args.api_url or "local", **{k: v for k, v in faults.items() if v}},
+        "settings": {"UPLOAD_CHUNK_SIZE": settings.UPLOAD_CHUNK_SIZE, "UPLOAD_CHUNK_MIN": settings.UPLOAD_CHUNK_MIN,
+                     "UPLOAD_CHUNK_MAX": settings.UPLOAD_CHUNK_MAX,
+                     "UPLOAD_CHUNK_TARGET_SECONDS": settings.UPLOAD_CHUNK_TARGET_SECONDS,
+                     "UPLOAD_CHUNK_ATTEMPTS": settings.UPLOAD_CHUNK_ATTEMPTS},
+        "results": results,
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"📄 Results in {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+    return 1 if any(r["failed"] for r in results) else 0
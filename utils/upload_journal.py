@@ -0,0 +1,227 @@
+"""
+On-disk journal of chunked uploads, so an interrupted upload can resume.
+
+For every upload in progress the journal records its upload_uuid, a
+fingerprint of the file (its size and a hash of all its bytes), the configured chunk size, how many chunk indices
+have been sent and the byte range of every chunk the API has acknowledged. When the same user uploads the same
+file again (after a tab reload, a dropped connection or a "Failed to save
+chunk" error), the upload continues under the same upload_uuid and only the
+missing chunks are sent. Chunk sizes adapt to the link during an upload, so
+the recorded ranges, not the chunk size, say where each chunk lies, and a
+resumed upload is never planned in fewer chunks than were already sent.
+The entry is removed once the record has been finalized.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple
+
+from config.settings import settings
+from utils.chunked_upload import (AckedChunks, ProgressCallback, SendChunk, UploadResult, file_buffer,
+                                  file_size, upload_in_chunks)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    upload_uuid TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    chunk_size INTEGER NOT NULL,
+    total_chunks INTEGER NOT NULL,  -- chunk indices sent so far
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS uploads_by_file_key
+    ON uploads (owner, fingerprint, filename, chunk_size);
+CREATE TABLE IF NOT EXISTS upload_chunks (
+    upload_uuid TEXT NOT NULL REFERENCES uploads (upload_uuid) ON DELETE CASCADE,
+    chunk_index INTEGER NOT NULL,
+    chunk_offset INTEGER NOT NULL,
+    chunk_length INTEGER NOT NULL,
+    PRIMARY KEY (upload_uuid, chunk_index)
+);
+"""
+
+
+def file_fingerprint(fileobj: BinaryIO) -> str:
+    """Identity of a file's content: its size and the SHA-256 of every byte
+
+    Resuming splices chunks of an earlier attempt into this upload, so two
+    files may only share a fingerprint if they are byte for byte the same.
+    """
+    position = fileobj.tell()
+    try:
+        size = file_size(fileobj)
+        with file_buffer(fileobj) as buffer:
+            if buffer is not None:
+                digest = hashlib.sha256(buffer)
+            else:
+                fileobj.seek(0)
+                digest = hashlib.file_digest(fileobj, "sha256")
+        return content_fingerprint(size, digest.hexdigest())
+    finally:
+        fileobj.seek(position)
+
+
+def content_fingerprint(size: int, sha256: str) -> str:
+    """file_fingerprint of a file whose size and hex SHA-256 are already known"""
+    return f"{size}:{sha256}"
+
+
+class UploadJournal:
+    """SQLite-backed record of in-progress uploads and their acknowledged chunks"""
+
+    def __init__(self, path: str, max_age: float = 86400):
+        self.path = path
+        self.max_age = max_age
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        self.prune()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA foreign_keys=ON")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def begin(self, owner: str, fingerprint: str, filename: str, chunk_size: int,
+              upload_uuid: Optional[str] = None) -> Tuple[str, AckedChunks]:
+        """Return (upload_uuid, {chunk_index: (offset, length)} acknowledged), resuming a matching upload if any
+
+        With upload_uuid the caller fixes the id (e.g. one stored with a queued
+        job); only that upload is resumed, and a new one is created under it.
+        Such uploads can share a file with others, so two queued copies of the
+        same file keep separate entries.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            if upload_uuid:
+                row = conn.execute(
+                    "SELECT upload_uuid, updated_at, fingerprint, chunk_size FROM uploads WHERE upload_uuid = ?",
+                    (upload_uuid,),
+                ).fetchone()
+                if row and (row[2], row[3]) != (fingerprint, chunk_size):
+                    row = (row[0], float("-inf"))  # same id, different bytes: start over
+            else:
+                row = conn.execute(
+                    "SELECT upload_uuid, updated_at FROM uploads"
+                    " WHERE owner = ? AND fingerprint = ? AND filename = ? AND chunk_size = ?"
+                    " ORDER BY updated_at DESC LIMIT 1",
+                    (owner, fingerprint, filename, chunk_size),
+                ).fetchone()
+            if row and now - row[1] <= self.max_age:
+                conn.execute("UPDATE uploads SET updated_at = ? WHERE upload_uuid = ?", (now, row[0]))
+                return row[0], self._acked(conn, row[0])
+            if row:
+                conn.execute("DELETE FROM uploads WHERE upload_uuid = ?", (row[0],))
+            if not upload_uuid:
+                # Another attempt at the same file gives way to the new entry
+                conn.execute("DELETE FROM uploads WHERE owner = ? AND fingerprint = ? AND filename = ? AND chunk_size = ?",
+                             (owner, fingerprint, filename, chunk_size))
+
+            upload_uuid = upload_uuid or str(uuid.uuid4())
+            conn.execute(
+                "INSERT INTO uploads (upload_uuid, owner, fingerprint, filename, chunk_size,"
+                " total_chunks, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (upload_uuid, owner, fingerprint, filename, chunk_size, 0, now, now),
+            )
+            return upload_uuid, {}
+
+    @staticmethod
+    def _acked(conn: sqlite3.Connection, upload_uuid: str) -> AckedChunks:
+        return {index: (offset, length) for index, offset, length in conn.execute(
+            "SELECT chunk_index, chunk_offset, chunk_length FROM upload_chunks WHERE upload_uuid = ?",
+            (upload_uuid,))}
+
+    def ack(self, upload_uuid: str, chunk_index: int, offset: int, length: int) -> None:
+        """Record that the API acknowledged a chunk covering length bytes from offset"""
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO upload_chunks (upload_uuid, chunk_index, chunk_offset, chunk_length)"
+                         " VALUES (?, ?, ?, ?)", (upload_uuid, chunk_index, offset, length))
+            conn.execute("UPDATE uploads SET total_chunks = MAX(total_chunks, ?), updated_at = ? WHERE upload_uuid = ?",
+                         (chunk_index + 1, time.time(), upload_uuid))
+
+    def sent(self, upload_uuid: str, chunk_index: int) -> None:
+        """Record that a chunk index is about to be sent"""
+        with self._connect() as conn:
+            conn.execute("UPDATE uploads SET total_chunks = MAX(total_chunks, ?), updated_at = ? WHERE upload_uuid = ?",
+                         (chunk_index + 1, time.time(), upload_uuid))
+
+    def sent_chunks(self, upload_uuid: str) -> int:
+        """Number of chunk indices sent so far, acknowledged or not"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT total_chunks FROM uploads WHERE upload_uuid = ?", (upload_uuid,)).fetchone()
+            return row[0] if row else 0
+
+    def acked(self, upload_uuid: str) -> AckedChunks:
+        """Byte ranges of the chunks acknowledged so far, by chunk index"""
+        with self._connect() as conn:
+            return self._acked(conn, upload_uuid)
+
+    def discard(self, upload_uuid: str) -> None:
+        """Forget an upload (finalized, or rejected so it must start over)"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM uploads WHERE upload_uuid = ?", (upload_uuid,))
+
+    def record_finalize(self, upload_uuid: str, status_code: Optional[int]) -> None:
+        """Settle an upload after its finalize call
+
+        Success or a client error ends the entry; no response or a 5xx keeps it
+        so the next attempt can retry the finalize without resending chunks.
+        """
+        if status_code is not None and status_code < 500:
+            self.discard(upload_uuid)
+
+    def prune(self) -> None:
+        """Drop uploads untouched for longer than max_age (the API will have expired their chunks)"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM uploads WHERE updated_at < ?", (time.time() - self.max_age,))
+
+
+def resumable_upload(fileobj: BinaryIO, send_chunk: SendChunk, journal: UploadJournal, owner: str,
+                     filename: str, chunk_size: Optional[int] = None,
+                     on_progress: Optional[ProgressCallback] = None,
+                     window: Optional[int] = None, upload_uuid: Optional[str] = None,
+                     fingerprint: Optional[str] = None) -> UploadResult:
+    """Upload fileobj in chunks, resuming an earlier attempt of the same file by the same owner
+
+    Pass upload_uuid to keep the same id across attempts (see UploadJournal.begin),
+    and fingerprint when the caller has already hashed the file (see
+    content_fingerprint) so it is not read through again.
+    """
+    if fingerprint is None:
+        fingerprint = file_fingerprint(fileobj)
+    upload_uuid, acked = journal.begin(owner, fingerprint, filename,
+                                       chunk_size or settings.UPLOAD_CHUNK_SIZE, upload_uuid=upload_uuid)
+    return upload_in_chunks(
+        fileobj, send_chunk, chunk_size=chunk_size, upload_uuid=upload_uuid,
+        on_progress=on_progress, window=window, skip=acked,
+        on_ack=lambda chunk_index, offset, length: journal.ack(upload_uuid, chunk_index, offset, length),
+        sent_chunks=journal.sent_chunks(upload_uuid),
+        on_send=lambda chunk_index: journal.sent(upload_uuid, chunk_index),
+    )
+
+
+_journal: Optional[UploadJournal] = None
+_journal_lock = threading.Lock()
+
+
+def get_upload_journal() -> UploadJournal:
+    """Return the process-wide upload journal"""
+    global _journal
+    if _journal is None:
+        with _journal_lock:
+            if _journal is None:
+                _journal = UploadJournal(settings.UPLOAD_JOURNAL_PATH, max_age=settings.UPLOAD_RESUME_MAX_AGE)
+    return _journal
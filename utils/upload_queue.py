@@ -0,0 +1,560 @@
+"""
+Background queue and offline outbox for content submissions.
+
+Submitting used to run every chunk upload and the finalize call inline, so
+one slow upload held a Streamlit session or a Flask worker for its whole
+duration. Now the front end stores the file, records a job and gets its id
+back at once; worker threads perform the upload (resuming through the upload
+journal) and finalize the record, updating the job's progress as they go.
+
+The queue doubles as an offline-first outbox. Files are kept as
+content-addressed blobs (named by their SHA-256) next to a SQLite job table,
+so a submission captured while the API is unreachable survives restarts.
+When a job hits a connectivity problem (no response, a timeout or a 5xx) it
+is not failed: it waits and is retried with exponential backoff. Only when
+the service itself is down (no response at all, or a gateway/unavailable
+status) does the whole queue pause for the same interval, so a kiosk without
+a network does not spend its time on timeouts while one job's server error
+does not hold up the others. Each job keeps one upload_uuid from capture
+to finalize, so retries continue the same upload instead of starting new
+ones. Only a definite rejection from the API (a 4xx) fails a job.
+
+A worker acts for the submitter with their access token, which is held only
+in process memory keyed by job id and never written to the job table; it is
+dropped as soon as the job is done or has failed. A job that outlives the
+process that queued it has no token, so it fails asking its owner to sign in
+and retry, and retrying takes a fresh token from the user's session.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from io import BytesIO
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+
+import requests
+
+from config.settings import settings
+from utils.chunked_upload import ChunkUploadError, chunk_fields
+from utils.content_index import get_content_index
+from utils.deadline import timeout_for
+from utils.http_transport import get_session
+from utils.image_pipeline import normalize_image
+from utils.record_mirror import add_created_record
+from utils.request_coalescing import get_coalescer
+from utils.upload_journal import content_fingerprint, get_upload_journal, resumable_upload
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+WAITING = "waiting"  # offline or API trouble; retried after next_attempt_at
+UPLOADING = "uploading"
+FINALIZING = "finalizing"
+DONE = "done"
+FAILED = "failed"
+
+FINISHED_STATUSES = (DONE, FAILED)
+
+# Statuses meaning the API itself is unavailable rather than failing this request
+SERVICE_DOWN_STATUSES = (502, 503, 504)
+
+BLOB_READ_SIZE = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS upload_jobs (
+    id TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    api_base_url TEXT NOT NULL,
+    title TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    content_type TEXT NOT NULL,
+    media_type TEXT NOT NULL,
+    record_data TEXT NOT NULL,
+    content_hash TEXT,
+    normalize_image INTEGER NOT NULL DEFAULT 0,
+    blob_sha TEXT NOT NULL,
+    upload_uuid TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    chunks_done INTEGER NOT NULL DEFAULT 0,
+    total_chunks INTEGER,
+    record_uid TEXT,
+    error TEXT,
+    note TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS upload_jobs_by_owner ON upload_jobs (owner, created_at);
+CREATE INDEX IF NOT EXISTS upload_jobs_by_status ON upload_jobs (status, created_at);
+"""
+
+_JOB_COLUMNS = ("id, owner, title, filename, media_type, size, status, chunks_done, total_chunks,"
+                " record_uid, error, note, created_at, updated_at, attempts, next_attempt_at")
+
+
+@dataclass
+class UploadJob:
+    """Status of one queued submission, as shown to its owner"""
+    id: str
+    owner: str
+    title: str
+    filename: str
+    media_type: str
+    size: int
+    status: str
+    chunks_done: int
+    total_chunks: Optional[int]
+    record_uid: Optional[str]
+    error: Optional[str]
+    note: Optional[str]
+    created_at: float
+    updated_at: float
+    attempts: int = 0
+    next_attempt_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    @property
+    def progress(self) -> float:
+        """Fraction of the job done, 0.0 to 1.0"""
+        if self.status == DONE:
+            return 1.0
+        if not self.total_chunks:
+            return 0.0
+        return min(1.0, self.chunks_done / self.total_chunks)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serialisable status for the Flask status API"""
+        data = asdict(self)
+        data.pop("owner")
+        data["progress"] = round(self.progress, 3)
+        data["finished"] = self.finished
+        return data
+
+
+class _Deferred(Exception):
+    """A job attempt that should be retried later rather than failed; with service_down the whole queue waits"""
+
+    def __init__(self, message: str, service_down: bool = False):
+        super().__init__(message)
+        self.service_down = service_down
+
+
+def _error_detail(response: Optional[requests.Response], default: str) -> str:
+    """Best human-readable message from an API error response"""
+    if response is None:
+        return default
+    try:
+        detail = response.json().get("detail") or response.json().get("message")
+    except ValueError:
+        return f"{default} (HTTP {response.status_code})"
+    if isinstance(detail, list) and detail:
+        return f"Validation error: {detail[0].get('msg', 'Invalid data')}"
+    if isinstance(detail, str):
+        return detail
+    return f"{default} (HTTP {response.status_code})"
+
+
+def _is_transient(response: Optional[requests.Response]) -> bool:
+    """No response or a server-side error: worth retrying later"""
+    return response is None or response.status_code >= 500 or response.status_code == 429
+
+
+def _is_service_down(response: Optional[requests.Response]) -> bool:
+    """No response at all, or the API (or the gateway in front of it) reports itself unavailable"""
+    return response is None or response.status_code in SERVICE_DOWN_STATUSES
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds to wait before attempt number attempts + 1, with +/-20% jitter"""
+    delay = min(settings.OUTBOX_RETRY_MAX, settings.OUTBOX_RETRY_BASE * 2 ** max(0, attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+class UploadQueue:
+    """Persistent job table, its blob store and the worker threads that drain it"""
+
+    def __init__(self, directory: str, workers: int = 2):
+        self.directory = directory
+        self.blob_dir = os.path.join(directory, "blobs")
+        self.path = os.path.join(directory, "jobs.sqlite3")
+        self.workers = max(1, workers)
+        os.makedirs(self.blob_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        self._wakeup = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._started = threading.Lock()
+        # Access tokens by job id; memory only, so they never reach the disk
+        self._tokens: Dict[str, str] = {}
+        # Held across installing a blob plus inserting its job, and across checking and deleting a blob
+        self._blob_lock = threading.Lock()
+        self._offline_until = 0.0
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _blob_path(self, job: sqlite3.Row) -> str:
+        return os.path.join(self.blob_dir, job["blob_sha"][:2], job["blob_sha"])
+
+    def _receive_blob(self, fileobj: BinaryIO) -> tuple:
+        """Copy fileobj into a temporary file in the blob store; returns (temp path, sha256, size)
+
+        A stream that cannot seek (a request body being received) is read
+        from where it is. _install_blob moves the file to its final name.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        if fileobj.seekable():
+            fileobj.seek(0)
+        fd, tmp_path = tempfile.mkstemp(dir=self.blob_dir, prefix=".incoming-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                while True:
+                    block = fileobj.read(BLOB_READ_SIZE)
+                    if not block:
+                        break
+                    digest.update(block)
+                    tmp.write(block)
+                    size += len(block)
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            return tmp_path, digest.hexdigest(), size
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def _install_blob(self, tmp_path: str, sha: str) -> None:
+        """Move a received file to its content-addressed name; call with _blob_lock held"""
+        final_dir = os.path.join(self.blob_dir, sha[:2])
+        os.makedirs(final_dir, exist_ok=True)
+        # Identical content is stored once
+        os.replace(tmp_path, os.path.join(final_dir, sha))
+
+    def _release_blob(self, job: sqlite3.Row) -> None:
+        """Delete a job's blob unless another unfinished job still needs it"""
+        # Under the lock a submit of the same content has either not installed the blob yet or already has its row
+        with self._blob_lock:
+            with self._connect() as conn:
+                (others,) = conn.execute(
+                    "SELECT COUNT(*) FROM upload_jobs WHERE blob_sha = ? AND id != ? AND status NOT IN (?, ?)",
+                    (job["blob_sha"], job["id"], *FINISHED_STATUSES),
+                ).fetchone()
+            if others:
+                return
+            try:
+                os.remove(self._blob_path(job))
+            except FileNotFoundError:
+                pass
+
+    def _row(self, job_id: str) -> Optional[sqlite3.Row]:
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            return conn.execute("SELECT * FROM upload_jobs WHERE id = ?", (job_id,)).fetchone()
+
+    def start(self) -> None:
+        """Start the worker threads, re-queueing jobs a previous process left mid-upload"""
+        with self._started:
+            if self._threads:
+                return
+            with self._connect() as conn:
+                conn.execute("UPDATE upload_jobs SET status = ?, updated_at = ? WHERE status IN (?, ?)",
+                             (QUEUED, time.time(), UPLOADING, FINALIZING))
+            for n in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"upload-worker-{n}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _notify(self) -> None:
+        with self._wakeup:
+            self._wakeup.notify_all()
+
+    def submit(self, fileobj: BinaryIO, *, owner: str, token: str, api_base_url: str, title: str,
+               filename: str, content_type: str, media_type: str, record_data: Dict[str, Any],
+               content_hash: Optional[str] = None, normalize: bool = False) -> str:
+        """Store fileobj in the outbox, queue its upload and return the job id once it is stored
+
+        Works without a network: the job simply waits until the API can be
+        reached. record_data holds the finalize fields other than upload_uuid,
+        filename and total_chunks, which the worker fills in.
+        """
+        job_id = str(uuid.uuid4())
+        tmp_path, blob_sha, size = self._receive_blob(fileobj)
+        self._tokens[job_id] = token
+        now = time.time()
+        # Install the blob and insert its row as one step, so a finishing job with the same content can't delete it
+        with self._blob_lock, self._connect() as conn:
+            try:
+                self._install_blob(tmp_path, blob_sha)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+            conn.execute(
+                "INSERT INTO upload_jobs (id, owner, api_base_url, title, filename, content_type,"
+                " media_type, record_data, content_hash, normalize_image, size, status, created_at, updated_at,"
+                " blob_sha, upload_uuid) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, owner, api_base_url.rstrip("/"), title, filename, content_type, media_type,
+                 json.dumps(record_data), content_hash, int(normalize), size, QUEUED, now, now,
+                 blob_sha, str(uuid.uuid4())),
+            )
+        self.start()
+        self._notify()
+        return job_id
+
+    def get(self, job_id: str, owner: Optional[str] = None) -> Optional[UploadJob]:
+        """Status of one job; with owner, only if it belongs to them"""
+        query = f"SELECT {_JOB_COLUMNS} FROM upload_jobs WHERE id = ?"
+        params: tuple = (job_id,)
+        if owner is not None:
+            query += " AND owner = ?"
+            params += (owner,)
+        with self._connect() as conn:
+            row = conn.execute(query, params).fetchone()
+        return UploadJob(*row) if row else None
+
+    def jobs_for(self, owner: str, limit: int = 50) -> List[UploadJob]:
+        """An owner's jobs, newest first"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {_JOB_COLUMNS} FROM upload_jobs WHERE owner = ? ORDER BY created_at DESC LIMIT ?",
+                (owner, limit),
+            ).fetchall()
+        return [UploadJob(*row) for row in rows]
+
+    def pending_count(self, owner: str) -> int:
+        """Jobs of an owner that have not finished yet"""
+        with self._connect() as conn:
+            (count,) = conn.execute(
+                "SELECT COUNT(*) FROM upload_jobs WHERE owner = ? AND status NOT IN (?, ?)",
+                (owner, *FINISHED_STATUSES),
+            ).fetchone()
+        return count
+
+    def retry(self, job_id: str, owner: str, token: Optional[str] = None) -> bool:
+        """Queue a failed or waiting job now, optionally with a fresh access token"""
+        job = self._row(job_id)
+        if job is None or job["owner"] != owner or job["status"] not in (FAILED, WAITING):
+            return False
+        # Hand over the token before the job becomes claimable
+        if token:
+            self._tokens[job_id] = token
+        with self._connect() as conn:
+            updated = conn.execute(
+                "UPDATE upload_jobs SET status = ?, error = NULL, next_attempt_at = NULL,"
+                " updated_at = ? WHERE id = ? AND owner = ? AND status IN (?, ?)",
+                (QUEUED, time.time(), job_id, owner, FAILED, WAITING),
+            ).rowcount
+        if updated:
+            self._offline_until = 0.0  # the user asked for it; try the network again
+            self.start()
+            self._notify()
+        return bool(updated)
+
+    def dismiss(self, job_id: str, owner: str) -> bool:
+        """Remove a finished job and, if nothing else needs it, its blob"""
+        job = self._row(job_id)
+        if job is None or job["owner"] != owner or job["status"] not in FINISHED_STATUSES:
+            return False
+        with self._connect() as conn:
+            conn.execute("DELETE FROM upload_jobs WHERE id = ?", (job_id,))
+        self._release_blob(job)
+        return True
+
+    def _update(self, job_id: str, **fields: Any) -> None:
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE upload_jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def _fail(self, job_id: str, message: str) -> None:
+        """Mark a job failed and drop its access token; a retry brings a fresh one"""
+        self._tokens.pop(job_id, None)
+        self._update(job_id, status=FAILED, error=message)
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        """Atomically take the oldest runnable job, so two workers never run the same one"""
+        now = time.time()
+        if now < self._offline_until:
+            return None
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT * FROM upload_jobs WHERE status = ? OR (status = ? AND next_attempt_at <= ?)"
+                " ORDER BY created_at LIMIT 1",
+                (QUEUED, WAITING, now),
+            ).fetchone()
+            if row is not None:
+                conn.execute("UPDATE upload_jobs SET status = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                             (UPLOADING, now, row["id"]))
+            conn.execute("COMMIT")
+            return row
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _work(self) -> None:
+        while True:
+            try:
+                job = self._claim()
+            except sqlite3.Error as e:
+                logger.error(f"Could not claim an upload job: {e}")
+                job = None
+            if job is None:
+                wait = settings.UPLOAD_QUEUE_POLL
+                if self._offline_until:
+                    wait = max(0.05, min(wait, self._offline_until - time.time()))
+                with self._wakeup:
+                    self._wakeup.wait(timeout=wait)
+                continue
+            try:
+                self._run(job)
+            except _Deferred as e:
+                self._defer(job, str(e), e.service_down)
+            except Exception as e:
+                logger.exception(f"Upload job {job['id']} crashed")
+                self._fail(job["id"], f"An error occurred: {e}")
+
+    def _defer(self, job: sqlite3.Row, reason: str, service_down: bool = False) -> None:
+        """Put a job back to wait; when the service is down, pause the whole queue for the same interval"""
+        attempts = job["attempts"] + 1  # the claim incremented the stored count
+        delay = retry_delay(attempts)
+        retry_at = time.time() + delay
+        if service_down:
+            self._offline_until = max(self._offline_until, retry_at)
+        logger.warning(f"Upload job {job['id']} deferred {delay:.0f}s after attempt {attempts}: {reason}")
+        self._update(job["id"], status=WAITING, next_attempt_at=retry_at,
+                     error=f"{reason}. Will retry automatically at {time.strftime('%H:%M:%S', time.localtime(retry_at))}.")
+
+    def _reconnected(self) -> None:
+        """The API answered: lift the offline pause and let waiting jobs go now"""
+        if self._offline_until:
+            self._offline_until = 0.0
+            with self._connect() as conn:
+                conn.execute("UPDATE upload_jobs SET next_attempt_at = ? WHERE status = ?", (time.time(), WAITING))
+        self._notify()
+
+    def _post(self, job: sqlite3.Row, endpoint: str, data: Dict[str, Any], files=None) -> requests.Response:
+        return get_session().post(
+            f"{job['api_base_url']}{endpoint}",
+            data=data,
+            files=files,
+            headers={"Authorization": f"Bearer {self._tokens.get(job['id'])}"},
+            timeout=timeout_for("upload"),
+        )
+
+    def _run(self, job: sqlite3.Row) -> None:
+        """Upload one job's blob and finalize its record; raises _Deferred on connectivity trouble"""
+        job_id, filename, content_type = job["id"], job["filename"], job["content_type"]
+        if job_id not in self._tokens:
+            # Queued by an earlier process: its token was never stored, so the owner has to supply a new one
+            self._fail(job_id, "The app restarted since this was queued. Please log in again and retry.")
+            return
+        with open(self._blob_path(job), "rb") as blob:
+            source: BinaryIO = blob
+            # The blob is named by its SHA-256, so the journal needn't hash it again
+            fingerprint: Optional[str] = content_fingerprint(job["size"], job["blob_sha"])
+            if job["normalize_image"]:
+                image = normalize_image(blob, filename, content_type)
+                source, content_type = BytesIO(image.data), image.content_type
+                filename = f"{os.path.splitext(filename)[0]}.{image.extension}"
+                fingerprint = None
+                self._update(job_id, filename=filename, note=image.summary())
+
+            def send_chunk(upload_uuid: str, chunk_index: int, total_chunks: int, chunk: bytes):
+                response = self._post(job, "/records/upload/chunk",
+                                      chunk_fields(filename, chunk_index, total_chunks, upload_uuid),
+                                      files={"chunk": (filename, chunk, content_type)})
+                if response.status_code != 200:
+                    raise ChunkUploadError(chunk_index=chunk_index, response=response)
+
+            def on_progress(done: int, total: int):
+                self._update(job_id, chunks_done=done, total_chunks=total)
+
+            try:
+                upload = resumable_upload(source, send_chunk, get_upload_journal(), owner=job["owner"],
+                                          filename=filename, on_progress=on_progress,
+                                          upload_uuid=job["upload_uuid"], fingerprint=fingerprint)
+            except ChunkUploadError as e:
+                message = _error_detail(e.response, f"Failed to upload chunk {(e.chunk_index or 0) + 1}")
+                if _is_transient(e.response):
+                    raise _Deferred("Waiting for the API: " + message, _is_service_down(e.response)) from e
+                self._fail(job_id, message)
+                return
+            except requests.RequestException as e:
+                raise _Deferred("Waiting for a connection", service_down=True) from e
+
+        self._update(job_id, status=FINALIZING)
+        record_data = dict(json.loads(job["record_data"]), upload_uuid=upload.upload_uuid,
+                           filename=filename, total_chunks=upload.total_chunks)
+        try:
+            response = self._post(job, "/records/upload", record_data)
+        except requests.RequestException as e:
+            get_upload_journal().record_finalize(upload.upload_uuid, None)
+            raise _Deferred("Waiting for a connection", service_down=True) from e
+        get_upload_journal().record_finalize(upload.upload_uuid, response.status_code)
+
+        if response.status_code != 201:
+            if _is_transient(response):
+                raise _Deferred("Waiting for the API: " + _error_detail(response, "Failed to submit content"),
+                                _is_service_down(response))
+            if response.status_code in (401, 403):
+                message = "Authentication expired. Please log in again and retry."
+            else:
+                message = _error_detail(response, "Failed to submit content")
+            self._fail(job_id, message)
+            return
+
+        add_created_record(response)
+        try:
+            record_uid = response.json().get("uid")
+        except ValueError:
+            record_uid = None
+        if record_uid and job["content_hash"]:
+            get_content_index().add(job["owner"], job["content_hash"], record_uid,
+                                    filename=filename, title=job["title"], size=job["size"])
+        self._tokens.pop(job_id, None)
+        self._update(job_id, status=DONE, record_uid=record_uid, error=None, next_attempt_at=None,
+                     chunks_done=upload.total_chunks, total_chunks=upload.total_chunks)
+        self._release_blob(job)
+        self._reconnected()
+        # Don't let a coalesced contributions list hide the new record
+        get_coalescer().invalidate("/contributions")
+
+
+_queue: Optional[UploadQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_upload_queue() -> UploadQueue:
+    """Return the process-wide upload queue, with its workers running"""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = UploadQueue(settings.UPLOAD_QUEUE_DIR, workers=settings.UPLOAD_QUEUE_WORKERS)
+                _queue.start()
+    return _queue